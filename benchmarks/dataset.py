@@ -0,0 +1,312 @@
+# benchmarks/dataset.py
+"""
+Синтетический набор данных для нагрузочных тестов и проверки на масштабе: пользователи,
+машины, записи, изображения записей и refresh-токены, загружаемые в Postgres через COPY
+(asyncpg copy_records_to_table) одной транзакцией.
+
+Распределения:
+  - машин у пользователя — от 1 до --max-cars равномерно;
+  - записей у машины — по Парето с показателем --alpha (у большинства машин несколько
+    записей, у немногих сотни), не больше --max-records;
+  - даты: регистрация пользователя — в пределах --span-days до --anchor, машина — после
+    регистрации владельца, записи — после появления машины и до её удаления, пробег растёт
+    вместе с датой записи;
+  - удалена доля --deleted-ratio машин и записей, записи и изображения удалённой машины
+    удалены вместе с ней;
+  - у доли --images-ratio записей от одного до трёх изображений;
+  - у пользователя --tokens refresh-токенов, действует только последний.
+
+Строки строит random.Random(--seed), id назначаются по порядку, даты отсчитываются от
+--anchor, поэтому один и тот же seed даёт один и тот же набор (кроме шифротекста email,
+если активный ключ шифрует AES-GCM со случайным nonce). Каждый пользователь входит
+с email user-<id>@dataset.invalid и паролем --password.
+
+Загрузка идёт только в пустые таблицы (--truncate очищает их) и в primary: шарды
+из DB_SHARDS не заполняются.
+
+Запуск:
+    alembic upgrade head
+    python -m benchmarks.dataset --users 1000000 --truncate
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Iterator
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.core.security.password import hash_password
+from src.db_clients.config import db_settings
+from src.db_clients.embedded import default_roles
+from src.models.user_models import Car, CarRecord, CarRecordImage, RefreshToken, Role, User
+from src.services.user_lookup import user_email_fields
+from src.session import db_manager
+
+# Колонки COPY в порядке внешних ключей: буферы сбрасываются в этом же порядке,
+# поэтому родительские строки всегда загружены раньше дочерних
+COLUMNS = {
+    User.__tablename__: (
+        "id", "name", "email", "email_index", "email_key_version", "password", "role_id",
+        "created_at", "updated_at", "last_activity", "is_active", "is_blocked", "is_deleted",
+    ),
+    Car.__tablename__: (
+        "id", "user_id_owner", "brand", "model", "year", "mileage", "color",
+        "created_at", "updated_at", "deleted_at", "is_active", "is_deleted",
+    ),
+    CarRecord.__tablename__: (
+        "id", "user_id_owner", "car_id", "record_type", "name", "description", "record_date", "mileage",
+        "service_place", "cost", "created_at", "updated_at", "deleted_at", "is_active", "is_deleted",
+    ),
+    CarRecordImage.__tablename__: (
+        "id", "car_record_id", "car_id", "owner_user_id", "link_to_s3",
+        "created_at", "updated_at", "deleted_at", "is_active", "is_deleted",
+    ),
+    RefreshToken.__tablename__: ("user_id", "token", "jti", "expires_at", "revoked"),
+}
+# id этих таблиц задаёт генератор, последовательности после загрузки сдвигаются за максимум
+SEQUENCE_TABLES = (User.__tablename__, Car.__tablename__, CarRecord.__tablename__, CarRecordImage.__tablename__)
+
+DEFAULT_ANCHOR = datetime(2026, 1, 1, tzinfo=timezone.utc)
+USER_ROLE_ID = 2
+
+BRANDS = {
+    "Lada": ("Vesta", "Granta", "Niva", "XRAY", "Largus"),
+    "Kia": ("Rio", "Ceed", "Sportage", "Optima"),
+    "Hyundai": ("Solaris", "Creta", "Tucson", "Elantra"),
+    "Toyota": ("Camry", "Corolla", "RAV4", "Land Cruiser"),
+    "Skoda": ("Octavia", "Rapid", "Kodiaq"),
+    "Volkswagen": ("Polo", "Tiguan", "Passat"),
+    "BMW": ("X5", "320i", "520d"),
+}
+COLORS = ("белый", "чёрный", "серебристый", "серый", "синий", "красный")
+# Тип записи: название, описание, диапазон стоимости в рублях
+RECORD_TYPES = (
+    ("service", "ТО", "Замена масла и фильтров", (3000, 25000)),
+    ("repair", "Ремонт", "Замена колодок и дисков", (2000, 120000)),
+    ("fuel", "Заправка", "АИ-95", (1500, 6000)),
+    ("tires", "Шиномонтаж", "Сезонная замена шин", (1500, 8000)),
+    ("insurance", "ОСАГО", "Продление полиса", (5000, 30000)),
+)
+SERVICE_PLACES = ("Официальный дилер", "Сервис у дома", "Гаражный кооператив", None)
+
+
+@dataclass
+class DatasetSpec:
+    users: int = 20000
+    max_cars: int = 3
+    max_records: int = 500
+    alpha: float = 0.8
+    deleted_ratio: float = 0.05
+    images_ratio: float = 0.3
+    tokens: int = 3
+    span_days: int = 3 * 365
+    anchor: datetime = DEFAULT_ANCHOR
+    seed: int = 42
+    password: str = "dataset"
+
+
+def user_email(user_id: int) -> str:
+    return f"user-{user_id}@dataset.invalid"
+
+
+def _between(rng: random.Random, start: datetime, end: datetime) -> datetime:
+    return start + (end - start) * rng.random()
+
+
+def _deleted_at(rng: random.Random, spec: DatasetSpec, created_at: datetime) -> datetime | None:
+    if rng.random() < spec.deleted_ratio:
+        return _between(rng, created_at, spec.anchor)
+    return None
+
+
+def generate(spec: DatasetSpec, password_hash: str) -> Iterator[tuple[str, tuple]]:
+    """
+    Строки набора как пары (таблица, значения в порядке COLUMNS). Родительская строка
+    выдаётся раньше дочерних, так что поток можно сбрасывать в базу в любой момент.
+    """
+    rng = random.Random(spec.seed)
+    span = timedelta(days=spec.span_days)
+    car_id = record_id = image_id = 0
+    for user_id in range(1, spec.users + 1):
+        registered = spec.anchor - span * rng.random()
+        yield User.__tablename__, (
+            user_id, f"Пользователь {user_id}", *user_email_fields(user_email(user_id)).values(), password_hash,
+            USER_ROLE_ID, registered, registered, _between(rng, registered, spec.anchor), True, False, False,
+        )
+
+        for _ in range(rng.randint(1, spec.max_cars)):
+            car_id += 1
+            bought = _between(rng, registered, spec.anchor)
+            car_deleted = _deleted_at(rng, spec, bought)
+            brand = rng.choice(tuple(BRANDS))
+            count = min(spec.max_records, int(rng.paretovariate(spec.alpha)))
+            dates = sorted(_between(rng, bought, car_deleted or spec.anchor) for _ in range(count))
+            mileages = [rng.randrange(0, 150_000)]
+            for previous, current in zip([bought] + dates, dates):
+                mileages.append(mileages[-1] + int((current - previous).days * rng.uniform(10, 80)))
+            yield Car.__tablename__, (
+                car_id, user_id, brand, rng.choice(BRANDS[brand]), rng.randint(2000, 2025), mileages[-1],
+                rng.choice(COLORS), bought, car_deleted or (dates[-1] if dates else bought), car_deleted,
+                car_deleted is None, car_deleted is not None,
+            )
+
+            for record_date, mileage in zip(dates, mileages[1:]):
+                record_id += 1
+                record_type, name, description, (low, high) = rng.choice(RECORD_TYPES)
+                deleted = car_deleted or _deleted_at(rng, spec, record_date)
+                yield CarRecord.__tablename__, (
+                    record_id, user_id, car_id, record_type, name, description, record_date, mileage,
+                    rng.choice(SERVICE_PLACES), Decimal(rng.randrange(low * 100, high * 100)) / 100,
+                    record_date, deleted or record_date, deleted, deleted is None, deleted is not None,
+                )
+                if rng.random() >= spec.images_ratio:
+                    continue
+                for _ in range(rng.randint(1, 3)):
+                    image_id += 1
+                    yield CarRecordImage.__tablename__, (
+                        image_id, record_id, car_id, user_id, f"car_records/{uuid.UUID(int=rng.getrandbits(128))}.jpg",
+                        record_date, deleted or record_date, deleted, deleted is None, deleted is not None,
+                    )
+
+        for n in range(spec.tokens):
+            yield RefreshToken.__tablename__, (
+                user_id, f"{rng.getrandbits(256):064x}", str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                spec.anchor + timedelta(days=rng.uniform(-30, 30)), n < spec.tokens - 1,
+            )
+
+
+class CopyWriter:
+    """Буферы строк по таблицам, которые сбрасываются в базу через COPY."""
+
+    def __init__(self, connection, batch_rows: int):
+        self.connection = connection
+        self.batch_rows = batch_rows
+        self.rows: dict[str, list[tuple]] = {table: [] for table in COLUMNS}
+        self.loaded: dict[str, int] = dict.fromkeys(COLUMNS, 0)
+
+    def add(self, table: str, row: tuple) -> bool:
+        """Добавляет строку; True — буфер таблицы заполнен и пора сбросить все буферы."""
+        rows = self.rows[table]
+        rows.append(row)
+        return len(rows) >= self.batch_rows
+
+    async def flush(self) -> None:
+        for table, columns in COLUMNS.items():
+            rows = self.rows[table]
+            if not rows:
+                continue
+            await self.connection.copy_records_to_table(table, records=rows, columns=columns)
+            self.loaded[table] += len(rows)
+            rows.clear()
+
+
+async def table_sizes() -> dict[str, int]:
+    async with db_manager.engine.connect() as conn:
+        return {
+            model.__tablename__: (await conn.execute(select(func.count()).select_from(model))).scalar_one()
+            for model in (User, Car, CarRecord, CarRecordImage, RefreshToken)
+        }
+
+
+async def truncate() -> None:
+    async with db_manager.engine.begin() as conn:
+        await conn.execute(text(
+            "TRUNCATE car_records_images, car_records, cars, refresh_tokens, user_shards, users RESTART IDENTITY CASCADE"
+        ))
+
+
+async def analyze() -> None:
+    async with db_manager.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in COLUMNS:
+            await conn.exec_driver_sql(f"VACUUM ANALYZE {table}")
+
+
+async def load(spec: DatasetSpec, batch_rows: int = 50000) -> dict[str, int]:
+    """Загружает набор в пустые таблицы одной транзакцией; возвращает число строк по таблицам."""
+    if any((await table_sizes()).values()):
+        raise RuntimeError("Таблицы набора данных не пусты, очистите их (--truncate)")
+    password_hash = hash_password(spec.password)
+    async with db_manager.engine.begin() as conn:
+        await conn.execute(pg_insert(Role).on_conflict_do_nothing(index_elements=[Role.id]), default_roles())
+        # COPY идёт мимо SQLAlchemy, но в том же соединении и в той же транзакции
+        writer = CopyWriter((await conn.get_raw_connection()).driver_connection, batch_rows)
+        for table, row in generate(spec, password_hash):
+            if writer.add(table, row):
+                await writer.flush()
+        await writer.flush()
+        for table in SEQUENCE_TABLES:
+            await conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 0) + 1, false) FROM {table}"
+            ))
+    return writer.loaded
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = DatasetSpec()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--max-cars", type=int, default=defaults.max_cars, help="машин на пользователя, не больше")
+    parser.add_argument("--max-records", type=int, default=defaults.max_records, help="записей на машину, не больше")
+    parser.add_argument("--alpha", type=float, default=defaults.alpha, help="показатель Парето для числа записей машины")
+    parser.add_argument("--deleted-ratio", type=float, default=defaults.deleted_ratio)
+    parser.add_argument("--images-ratio", type=float, default=defaults.images_ratio, help="доля записей с изображениями")
+    parser.add_argument("--tokens", type=int, default=defaults.tokens, help="refresh-токенов на пользователя")
+    parser.add_argument("--span-days", type=int, default=defaults.span_days, help="глубина истории в днях")
+    parser.add_argument(
+        "--anchor", type=datetime.fromisoformat, default=defaults.anchor,
+        help="дата, от которой отсчитывается история, ISO 8601",
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args, password: str = DatasetSpec.password) -> DatasetSpec:
+    anchor = args.anchor if args.anchor.tzinfo else args.anchor.replace(tzinfo=timezone.utc)
+    return DatasetSpec(
+        users=args.users, max_cars=args.max_cars, max_records=args.max_records, alpha=args.alpha,
+        deleted_ratio=args.deleted_ratio, images_ratio=args.images_ratio, tokens=args.tokens,
+        span_days=args.span_days, anchor=anchor, seed=args.seed, password=password,
+    )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--password", default=DatasetSpec.password, help="пароль всех пользователей набора")
+    parser.add_argument("--batch-rows", type=int, default=50000, help="строк в одном COPY")
+    parser.add_argument("--truncate", action="store_true", help="очистить таблицы набора перед загрузкой")
+    args = parser.parse_args()
+
+    if db_settings.db.EMBEDDED:
+        print("COPY есть только в Postgres, встроенный режим (APP_MODE=embedded) не подходит")
+        return 2
+
+    spec = spec_from_args(args, args.password)
+    try:
+        if args.truncate:
+            await truncate()
+        started = time.perf_counter()
+        loaded = await load(spec, args.batch_rows)
+        elapsed = time.perf_counter() - started
+        total = sum(loaded.values())
+        for table, rows in loaded.items():
+            print(f"{table:<20}{rows:>12}")
+        print(f"Загружено {total} строк за {elapsed:.1f} с ({total / elapsed:.0f} строк/с), seed={spec.seed}")
+        await analyze()
+    except RuntimeError as e:
+        print(e)
+        return 1
+    finally:
+        await db_manager.engine.dispose()
+        await db_manager.dispose_workloads()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
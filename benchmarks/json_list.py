@@ -0,0 +1,183 @@
+# benchmarks/json_list.py
+"""
+Сравнение двух способов отдать список машин и список записей машины:
+  python — ORM-объекты/строки, словари в Python, затем сериализация так, как это
+           делает FastAPI (валидация response_model, jsonable_encoder, json.dumps);
+  db     — JSON собирается в Postgres (json_agg/json_build_object), приложение
+           получает готовую строку и отдаёт её байты (src/repositories/*.list_*_json).
+
+Нужен Postgres из .env (json_agg есть только там). Тестовые пользователь, машины и
+записи создаются в транзакции, которая в конце откатывается, — в базе ничего не остаётся.
+Колонка «значения» сверяет ответы путей по значениям (json_values): текст JSON у них
+отличается пробелами и записью чисел и дат (src/repositories/base.py, json_array).
+С APP_MODE=embedded бенчмарк запускается без Postgres, но путь db тогда тоже собирает
+JSON в Python (src/repositories/base.py), так что это проверка работоспособности, а не замер.
+
+Запуск:
+    python -m benchmarks.json_list --rows 1000 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert, select
+
+from src.db_clients import embedded
+from src.db_clients.config import db_settings
+from src.models.user_models import Car, CarRecord, User
+from src.repositories import car_records as car_records_repository
+from src.repositories import cars as cars_repository
+from src.schemas import CarListResponse
+from src.session import db_manager
+
+
+async def seed(session, rows: int) -> tuple[int, int]:
+    """Пользователь с rows машинами, у первой машины rows записей."""
+    now = datetime.now(timezone.utc)
+    user_id = (
+        await session.execute(
+            insert(User)
+            .values(name="bench", email=f"bench-{uuid.uuid4()}", password="bench")
+            .returning(User.id)
+        )
+    ).scalar_one()
+    car_ids = (
+        await session.execute(
+            insert(Car).returning(Car.id),
+            [
+                {"user_id_owner": user_id, "brand": "Lada", "model": "Vesta", "year": 2020, "mileage": i,
+                 "color": "white", "created_at": now, "updated_at": now}
+                for i in range(rows)
+            ],
+        )
+    ).scalars().all()
+    await session.execute(
+        insert(CarRecord),
+        [
+            {"user_id_owner": user_id, "car_id": car_ids[0], "record_type": "service", "name": f"ТО {i}",
+             "description": "Замена масла и фильтров", "record_date": now, "mileage": 1000 + i,
+             "service_place": "Сервис", "cost": 4990.50, "created_at": now, "updated_at": now}
+            for i in range(rows)
+        ],
+    )
+    return user_id, car_ids[0]
+
+
+async def cars_python(session, user_id: int) -> bytes:
+    # Как в отдельном запросе: объекты каждый раз создаются заново, а не берутся из identity map
+    session.expunge_all()
+    cars = (
+        await session.execute(
+            select(Car).where(Car.user_id_owner == user_id, Car.is_active == True, Car.is_deleted == False)
+        )
+    ).scalars().all()
+    data = {
+        "cars": [
+            {
+                "id": car.id, "user_id_owner": car.user_id_owner, "brand": car.brand, "model": car.model,
+                "year": car.year, "mileage": car.mileage, "color": car.color, "created_at": car.created_at,
+                "updated_at": car.updated_at, "deleted_at": car.deleted_at, "is_active": car.is_active,
+                "is_deleted": car.is_deleted, "version": car.version,
+            }
+            for car in cars
+        ]
+    }
+    validated = CarListResponse.model_validate(data)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+async def cars_db(session, user_id: int) -> bytes:
+    return await cars_repository.list_cars_json(session, user_id_owner=user_id)
+
+
+async def records_python(session, user_id: int, car_id: int) -> bytes:
+    rows = await car_records_repository.list_records(session, user_id_owner=user_id, car_id=car_id)
+    data = [
+        {
+            "record_id": r.id, "user_id_owner": r.user_id_owner, "car_id": r.car_id,
+            "record_type": r.record_type, "name": r.name, "record_date": r.record_date,
+            "mileage": r.mileage, "service_place": r.service_place, "cost": r.cost, "version": r.version,
+        }
+        for r in rows
+    ]
+    return JSONResponse(jsonable_encoder(data)).body
+
+
+async def records_db(session, user_id: int, car_id: int) -> bytes:
+    return await car_records_repository.list_records_json(session, user_id_owner=user_id, car_id=car_id)
+
+
+def json_values(body: bytes):
+    """
+    Разобранный JSON, в котором числа — Decimal, а строки с датой — datetime: так ответы
+    обоих путей можно сравнить по значениям, а не по тексту (отличия текста — src/repositories/base.py).
+    """
+    def convert(value):
+        if isinstance(value, dict):
+            return {key: convert(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [convert(item) for item in value]
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                return value
+        return value
+
+    return convert(json.loads(body, parse_float=Decimal, parse_int=Decimal))
+
+
+async def bench(call, repeat: int) -> tuple[float, int]:
+    """Медиана в миллисекундах и размер ответа в байтах."""
+    body = await call()  # прогрев: prepared statement, кеш компиляции
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(body)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if db_settings.db.EMBEDDED:
+        await embedded.create_schema(db_manager.engine)
+
+    print(f"{'список':<10}{'строк':>8}{'python, мс':>12}{'db, мс':>10}{'выигрыш':>10}{'байт':>14}{'значения':>10}")
+    for rows in args.rows:
+        async with db_manager.get_db_session() as session:
+            user_id, car_id = await seed(session, rows)
+            cases = [
+                ("cars", lambda: cars_python(session, user_id), lambda: cars_db(session, user_id)),
+                (
+                    "records",
+                    lambda: records_python(session, user_id, car_id),
+                    lambda: records_db(session, user_id, car_id),
+                ),
+            ]
+            for name, python_path, db_path in cases:
+                python_ms, python_size = await bench(python_path, args.repeat)
+                db_ms, db_size = await bench(db_path, args.repeat)
+                same = json_values(await python_path()) == json_values(await db_path())
+                print(f"{name:<10}{rows:>8}{python_ms:>12.1f}{db_ms:>10.1f}{python_ms / db_ms:>9.2f}x"
+                      f"{python_size:>8}/{db_size:<7}{'равны' if same else 'РАЗНЫЕ':>8}")
+            await session.rollback()
+
+    await db_manager.engine.dispose()
+    if db_settings.db.EMBEDDED:
+        embedded.remove_database()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
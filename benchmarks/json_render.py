@@ -0,0 +1,150 @@
+# benchmarks/json_render.py
+"""
+Сериализация ответов: сколько стоит превратить список машин или записей в байты JSON.
+
+Сериализация:
+  jsonable       — jsonable_encoder + json.dumps, как FastAPI отдавал dict без response_model
+                   классом JSONResponse (путь по умолчанию до src/core/responses.py);
+  jsonable+orjson — jsonable_encoder + ORJSONResponse, так Default(ORJSONResponse) отдаёт dict,
+                   возвращённый эндпоинтом без response_model;
+  orjson         — dumps из src/core/responses.py напрямую: ORJSONResponse(...), который эндпоинты
+                   возвращают сами, и dump_json репозиториев;
+  pydantic       — проверка response_model и dump_json в pydantic-core, путь FastAPI для
+                   эндпоинтов с response_model.
+
+HTTP — медиана запросов в секунду к приложению через ASGI (без сети) для трёх вариантов
+класса ответа по умолчанию: JSONResponse, Default(ORJSONResponse), как в src/server.py,
+и явный ORJSONResponse, который отключает сериализацию response_model в pydantic-core.
+
+Данные строятся в памяти (Decimal в стоимости, datetime в датах), база не нужна.
+
+Запуск:
+    python -m benchmarks.json_render --rows 100 1000 --repeat 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+from fastapi.datastructures import Default
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from src.core.responses import ORJSONResponse, dumps
+from src.schemas import CarListResponse, CarRecordListItem
+
+
+def cars(rows: int) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "cars": [
+            {
+                "id": i, "user_id_owner": 1, "brand": "Lada", "model": "Vesta", "year": 2020, "mileage": 1000 + i,
+                "color": "белый", "created_at": now - timedelta(days=i), "updated_at": now, "deleted_at": None,
+                "is_active": True, "is_deleted": False, "version": 1,
+            }
+            for i in range(rows)
+        ]
+    }
+
+
+def records(rows: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "record_id": i, "user_id_owner": 1, "car_id": 1, "record_type": "service", "name": f"ТО {i}",
+            "record_date": now - timedelta(days=i), "mileage": 1000 + i, "service_place": "Сервис у дома",
+            "cost": Decimal("4990.50") + i, "version": 1,
+        }
+        for i in range(rows)
+    ]
+
+
+def serializers(model) -> dict:
+    adapter = TypeAdapter(model)
+    return {
+        "jsonable": lambda data: JSONResponse(jsonable_encoder(data)).body,
+        "jsonable+orjson": lambda data: ORJSONResponse(jsonable_encoder(data)).body,
+        "orjson": dumps,
+        "pydantic": lambda data: adapter.dump_json(adapter.validate_python(data)),
+    }
+
+
+def bench(call, repeat: int) -> float:
+    """Медиана в миллисекундах."""
+    call()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def build_app(rows: int, default_response_class) -> FastAPI:
+    app = FastAPI(default_response_class=default_response_class)
+    data = records(rows)
+
+    @app.get("/dict")
+    async def as_dict():
+        return data
+
+    @app.get("/model", response_model=List[CarRecordListItem])
+    async def as_model():
+        return data
+
+    return app
+
+
+async def requests_per_second(app: FastAPI, path: str, requests: int) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        (await client.get(path)).raise_for_status()
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get(path)
+        return requests / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=100, help="запросов на вариант в одном круге HTTP-замера")
+    parser.add_argument("--rounds", type=int, default=5, help="кругов HTTP-замера, берётся медиана")
+    args = parser.parse_args()
+
+    print(f"{'список':<10}{'строк':>7}  {'способ':<18}{'мс':>8}{'выигрыш':>10}{'байт':>10}")
+    for rows in args.rows:
+        for name, model, data in (("cars", CarListResponse, cars(rows)), ("records", List[CarRecordListItem], records(rows))):
+            baseline = None
+            for method, call in serializers(model).items():
+                ms = bench(lambda: call(data), args.repeat)
+                baseline = baseline or ms
+                print(f"{name:<10}{rows:>7}  {method:<18}{ms:>8.2f}{baseline / ms:>9.2f}x{len(call(data)):>10}")
+
+    print(f"\n{'строк':>7}  {'класс по умолчанию':<28}{'dict, зап/с':>13}{'model, зап/с':>14}")
+    variants = (
+        ("JSONResponse", Default(JSONResponse)),
+        ("Default(ORJSONResponse)", Default(ORJSONResponse)),
+        ("ORJSONResponse", ORJSONResponse),
+    )
+    for rows in args.rows:
+        apps = [build_app(rows, response_class) for _, response_class in variants]
+        # Варианты чередуются по кругам, чтобы фоновая нагрузка машины поровну легла на все
+        results = [([], []) for _ in variants]
+        for _ in range(args.rounds):
+            for app, (as_dict, as_model) in zip(apps, results):
+                as_dict.append(await requests_per_second(app, "/dict", args.requests))
+                as_model.append(await requests_per_second(app, "/model", args.requests))
+        for (label, _), (as_dict, as_model) in zip(variants, results):
+            print(f"{rows:>7}  {label:<28}{statistics.median(as_dict):>13.0f}{statistics.median(as_model):>14.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
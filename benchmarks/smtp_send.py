@@ -0,0 +1,70 @@
+# benchmarks/smtp_send.py
+"""
+Сравнение отправки писем через пул SMTP-соединений и через новое соединение на каждое письмо.
+
+Запуск (внешние сервисы не нужны, письма принимает локальный SMTP sink):
+    python -m benchmarks.smtp_send --count 200 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+from email.mime.text import MIMEText
+
+from aiosmtplib import SMTP
+
+from src.utils.smtp_pool import SMTPConnectionPool
+from src.utils.smtp_sink import SMTPSink
+
+
+def build_message(i: int) -> MIMEText:
+    message = MIMEText(f"Код проверки: {1000 + i % 9000}", "plain")
+    message["From"] = "bench@example.com"
+    message["To"] = f"user{i}@example.com"
+    message["Subject"] = "Код проверки"
+    return message
+
+
+async def send_unpooled(sink: SMTPSink, count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(i: int) -> None:
+        async with semaphore:
+            client = SMTP(hostname=sink.host, port=sink.port, username="bench", password="bench", start_tls=False)
+            await client.connect()
+            await client.send_message(build_message(i))
+            await client.quit()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(count)))
+    return time.perf_counter() - started
+
+
+async def send_pooled(sink: SMTPSink, count: int, concurrency: int) -> float:
+    pool = SMTPConnectionPool(
+        hostname=sink.host, port=sink.port, username="bench", password="bench",
+        size=concurrency, start_tls=False,
+    )
+    started = time.perf_counter()
+    await asyncio.gather(*(pool.send_message(build_message(i)) for i in range(count)))
+    elapsed = time.perf_counter() - started
+    await pool.close()
+    return elapsed
+
+
+async def main(count: int, concurrency: int) -> None:
+    async with SMTPSink(port=0) as sink:
+        unpooled = await send_unpooled(sink, count, concurrency)
+        pooled = await send_pooled(sink, count, concurrency)
+        assert len(sink.messages) == 2 * count
+
+    print(f"писем: {count}, параллельно: {concurrency}")
+    print(f"новое соединение на письмо: {unpooled:.3f} с ({count / unpooled:.0f} писем/с)")
+    print(f"пул соединений:             {pooled:.3f} с ({count / pooled:.0f} писем/с)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.concurrency))
@@ -0,0 +1,148 @@
+# benchmarks/statement_cache.py
+"""
+Сравнение трёх способов выполнить один и тот же частый запрос:
+  select()  — конструкция строится заново на каждый вызов (как было в сервисах);
+  lambda    — lambda_stmt с параметрами из замыкания;
+  registry  — готовый запрос из src/db_clients/statements.py с bindparam.
+
+Запросы выполняются на SQLite в памяти: время самой БД здесь минимально,
+поэтому разница показывает накладные расходы SQLAlchemy на построение,
+поиск в кеше компиляции и подготовку параметров.
+
+Запуск (внешние сервисы не нужны):
+    python -m benchmarks.statement_cache --iterations 20000
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, lambda_stmt, select
+
+from src.db_clients import statements
+from src.models.user_models import Car, CarRecord, RefreshToken, Role, User
+
+
+def fresh_car_owned_by(car_id, user_id_owner):
+    stmt = select(Car.id).where(Car.id == car_id, Car.user_id_owner == user_id_owner, Car.is_deleted == False)
+    return stmt, {}
+
+
+def lambda_car_owned_by(car_id, user_id_owner):
+    stmt = lambda_stmt(
+        lambda: select(Car.id).where(Car.id == car_id, Car.user_id_owner == user_id_owner, Car.is_deleted == False)
+    )
+    return stmt, {}
+
+
+def registry_car_owned_by(car_id, user_id_owner):
+    return statements.CAR_OWNED_BY, {"car_id": car_id, "user_id_owner": user_id_owner}
+
+
+def fresh_car_records_list(car_id, user_id_owner):
+    stmt = (
+        select(
+            CarRecord.id, CarRecord.user_id_owner, CarRecord.car_id, CarRecord.record_type, CarRecord.name,
+            CarRecord.record_date, CarRecord.mileage, CarRecord.service_place, CarRecord.cost,
+        )
+        .where(
+            CarRecord.car_id == car_id,
+            CarRecord.user_id_owner == user_id_owner,
+            CarRecord.is_deleted == False,
+            CarRecord.is_active == True,
+        )
+        .order_by(CarRecord.created_at.desc())
+    )
+    return stmt, {}
+
+
+def lambda_car_records_list(car_id, user_id_owner):
+    stmt = lambda_stmt(
+        lambda: select(
+            CarRecord.id, CarRecord.user_id_owner, CarRecord.car_id, CarRecord.record_type, CarRecord.name,
+            CarRecord.record_date, CarRecord.mileage, CarRecord.service_place, CarRecord.cost,
+        )
+        .where(
+            CarRecord.car_id == car_id,
+            CarRecord.user_id_owner == user_id_owner,
+            CarRecord.is_deleted == False,
+            CarRecord.is_active == True,
+        )
+        .order_by(CarRecord.created_at.desc())
+    )
+    return stmt, {}
+
+
+def registry_car_records_list(car_id, user_id_owner):
+    return statements.CAR_RECORDS_LIST, {"car_id": car_id, "user_id_owner": user_id_owner}
+
+
+def fresh_principal_by_id(user_id):
+    return select(User).where(User.id == user_id), {}
+
+
+def lambda_principal_by_id(user_id):
+    return lambda_stmt(lambda: select(User).where(User.id == user_id)), {}
+
+
+def registry_principal_by_id(user_id):
+    return statements.PRINCIPAL_BY_ID, {"user_id": user_id}
+
+
+def fresh_refresh_token_by_jti(jti, user_id):
+    return select(RefreshToken).where(RefreshToken.jti == jti, RefreshToken.user_id == user_id), {}
+
+
+def lambda_refresh_token_by_jti(jti, user_id):
+    return lambda_stmt(lambda: select(RefreshToken).where(RefreshToken.jti == jti, RefreshToken.user_id == user_id)), {}
+
+
+def registry_refresh_token_by_jti(jti, user_id):
+    return statements.REFRESH_TOKEN_BY_JTI, {"jti": jti, "user_id": user_id}
+
+
+CASES = [
+    ("car_owned_by", (fresh_car_owned_by, lambda_car_owned_by, registry_car_owned_by), lambda i: (i, i % 100)),
+    (
+        "car_records_list",
+        (fresh_car_records_list, lambda_car_records_list, registry_car_records_list),
+        lambda i: (i, i % 100),
+    ),
+    ("principal_by_id", (fresh_principal_by_id, lambda_principal_by_id, registry_principal_by_id), lambda i: (i,)),
+    (
+        "refresh_token_by_jti",
+        (fresh_refresh_token_by_jti, lambda_refresh_token_by_jti, registry_refresh_token_by_jti),
+        lambda i: (f"jti-{i}", i),
+    ),
+]
+
+
+def bench(conn, factory, args_for, iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        stmt, params = factory(*args_for(i))
+        conn.execute(stmt, params).all()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    for table in (Role.__table__, User.__table__, Car.__table__, CarRecord.__table__, RefreshToken.__table__):
+        table.create(engine)
+
+    print(f"{'запрос, мкс/вызов':<22}{'select()':>10}{'lambda':>10}{'registry':>10}{'выигрыш':>10}")
+    with engine.connect() as conn:
+        for name, factories, args_for in CASES:
+            timings = []
+            for factory in factories:
+                # Прогрев: первый вызов компилирует запрос и кладёт его в кеш
+                bench(conn, factory, args_for, 10)
+                timings.append(bench(conn, factory, args_for, args.iterations) / args.iterations * 1e6)
+            fresh, lambda_, registry = timings
+            print(f"{name:<22}{fresh:>10.1f}{lambda_:>10.1f}{registry:>10.1f}{fresh / registry:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# migrations/env.py
+import asyncio
+
+from alembic import context
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Все модули моделей должны быть импортированы, чтобы их таблицы попали в metadata
+import src.models.archive_models  # noqa: F401
+import src.models.email_models  # noqa: F401
+import src.models.organization_models  # noqa: F401
+import src.models.shard_models  # noqa: F401
+import src.models.user_models  # noqa: F401
+import src.models.verification_models  # noqa: F401
+from src.db_clients.config import db_settings
+from src.models.base_model import ORMBase
+
+target_metadata = ORMBase.metadata
+
+
+def run_migrations_offline() -> None:
+    """Генерация SQL без подключения к БД: alembic upgrade head --sql."""
+    context.configure(
+        url=db_settings.db.url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        compare_type=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    engine = create_async_engine(db_settings.db.get_async_url())
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
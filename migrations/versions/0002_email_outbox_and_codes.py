@@ -0,0 +1,74 @@
+"""email outbox, verification codes, email blind index
+
+Таблицы email_outbox и verification_codes (UNLOGGED) и колонки users.email_index /
+users.email_key_version для ротации ключей шифрования email.
+Уникальный индекс по email_index строится CONCURRENTLY вне транзакции и затем
+становится ограничением (ADD CONSTRAINT ... USING INDEX) — запись в users не блокируется
+на время построения. Если построение прервалось, удалите INVALID-индекс
+(DROP INDEX CONCURRENTLY users_email_index_key) и повторите upgrade.
+После применения заполните email_index: python -m src.services.email_reencryption
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import Text
+from sqlalchemy.dialects import postgresql
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("email_index", sa.String(length=64), nullable=True))
+    op.add_column("users", sa.Column("email_key_version", sa.Integer(), server_default="1", nullable=False))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "users_email_index_key", "users", ["email_index"],
+            unique=True, postgresql_concurrently=True, if_not_exists=True,
+        )
+    # Только метаданные: индекс уже построен, таблица не сканируется
+    op.execute("ALTER TABLE users ADD CONSTRAINT users_email_index_key UNIQUE USING INDEX users_email_index_key")
+    op.create_table('email_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('recipient', sa.String(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=Text()), nullable=False),
+    sa.Column('dedupe_key', sa.String(length=512), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_email_outbox_due', 'email_outbox', ['next_attempt_at'], unique=False, postgresql_where=sa.text("status IN ('pending', 'sending')"))
+    op.create_index('uq_email_outbox_pending_dedupe', 'email_outbox', ['dedupe_key'], unique=True, postgresql_where=sa.text("status = 'pending'"))
+    op.create_table('verification_codes',
+    sa.Column('key', sa.String(length=512), nullable=False),
+    sa.Column('code', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('consumed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key'),
+    prefixes=['UNLOGGED']
+    )
+    op.create_index('ix_verification_codes_expires_at', 'verification_codes', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table("verification_codes")
+    op.drop_table("email_outbox")
+    op.drop_constraint("users_email_index_key", "users", type_="unique")
+    op.drop_column("users", "email_key_version")
+    op.drop_column("users", "email_index")
@@ -0,0 +1,62 @@
+"""hot path indexes
+
+Индексы под запросы сервисов. Строятся CONCURRENTLY вне транзакции, поэтому
+не блокируют запись в таблицы. Если построение прервалось, Postgres оставляет
+индекс в состоянии INVALID: его нужно удалить (DROP INDEX CONCURRENTLY) и повторить upgrade.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    # get_user_cars и проверка владельца машины
+    dict(
+        index_name="ix_cars_owner_live", table_name="cars", columns=["user_id_owner"],
+        postgresql_where=sa.text("is_deleted = false"),
+    ),
+    # Список записей машины: WHERE car_id, user_id_owner ... ORDER BY created_at DESC
+    dict(
+        index_name="ix_car_records_car_owner_live", table_name="car_records",
+        columns=["car_id", "user_id_owner", sa.text("created_at DESC")],
+        postgresql_where=sa.text("is_deleted = false AND is_active = true"),
+    ),
+    # Изображения записи
+    dict(
+        index_name="ix_car_records_images_record_live", table_name="car_records_images",
+        columns=["car_record_id"], postgresql_where=sa.text("is_deleted = false"),
+    ),
+    # Ротация refresh-токена по jti, logout по значению токена, отзыв активных токенов пользователя
+    dict(index_name="ix_refresh_tokens_jti", table_name="refresh_tokens", columns=["jti"]),
+    dict(
+        index_name="ix_refresh_tokens_token", table_name="refresh_tokens", columns=["token"],
+        postgresql_using="hash",
+    ),
+    dict(
+        index_name="ix_refresh_tokens_user_active", table_name="refresh_tokens", columns=["user_id"],
+        postgresql_where=sa.text("revoked = false"),
+    ),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index in INDEXES:
+            op.create_index(**index, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index in reversed(INDEXES):
+            op.drop_index(
+                index["index_name"], table_name=index["table_name"], postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,126 @@
+"""soft delete cascade and archive tables
+
+Архивные таблицы для удалённых машин, записей и изображений (src/services/archival.py)
+и индексы для архивации: внешние ключи car_records / car_records_images и
+частичные индексы по deleted_at удалённых строк.
+
+Записи и изображения, оставшиеся живыми у уже удалённых машин и записей,
+помечаются удалёнными с deleted_at родителя — так же, как теперь делает каскадное удаление.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    dict(index_name="ix_car_records_car_id", table_name="car_records", columns=["car_id"]),
+    dict(
+        index_name="ix_car_records_images_car_record_id", table_name="car_records_images",
+        columns=["car_record_id"],
+    ),
+    dict(index_name="ix_car_records_images_car_id", table_name="car_records_images", columns=["car_id"]),
+    dict(
+        index_name="ix_cars_deleted_at", table_name="cars", columns=["deleted_at"],
+        postgresql_where=sa.text("is_deleted = true"),
+    ),
+    dict(
+        index_name="ix_car_records_deleted_at", table_name="car_records", columns=["deleted_at"],
+        postgresql_where=sa.text("is_deleted = true"),
+    ),
+    dict(
+        index_name="ix_car_records_images_deleted_at", table_name="car_records_images", columns=["deleted_at"],
+        postgresql_where=sa.text("is_deleted = true"),
+    ),
+]
+
+
+def _audit_columns() -> list[sa.Column]:
+    return [
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table('cars_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id_owner', sa.Integer(), nullable=False),
+    sa.Column('brand', sa.String(length=20), nullable=False),
+    sa.Column('model', sa.String(length=20), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('mileage', sa.Integer(), nullable=True),
+    sa.Column('color', sa.String(length=50), nullable=True),
+    *_audit_columns(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_cars_archive_user', 'cars_archive', ['user_id_owner'], unique=False)
+    op.create_table('car_records_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id_owner', sa.Integer(), nullable=False),
+    sa.Column('car_id', sa.Integer(), nullable=False),
+    sa.Column('record_type', sa.String(length=100), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('record_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('mileage', sa.Integer(), nullable=True),
+    sa.Column('service_place', sa.String(length=255), nullable=True),
+    sa.Column('cost', sa.Numeric(), nullable=True),
+    *_audit_columns(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_car_records_archive_user', 'car_records_archive', ['user_id_owner'], unique=False)
+    op.create_table('car_records_images_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('car_record_id', sa.Integer(), nullable=False),
+    sa.Column('car_id', sa.Integer(), nullable=False),
+    sa.Column('owner_user_id', sa.Integer(), nullable=False),
+    sa.Column('link_to_s3', sa.Text(), nullable=False),
+    *_audit_columns(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_car_records_images_archive_user', 'car_records_images_archive', ['owner_user_id'], unique=False
+    )
+
+    op.execute(
+        """
+        UPDATE car_records r SET is_deleted = true, is_active = false, deleted_at = c.deleted_at
+        FROM cars c
+        WHERE r.car_id = c.id AND c.is_deleted = true AND r.is_deleted = false
+        """
+    )
+    op.execute(
+        """
+        UPDATE car_records_images i SET is_deleted = true, is_active = false, deleted_at = r.deleted_at
+        FROM car_records r
+        WHERE i.car_record_id = r.id AND r.is_deleted = true AND i.is_deleted = false
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        for index in INDEXES:
+            op.create_index(**index, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index in reversed(INDEXES):
+            op.drop_index(
+                index["index_name"], table_name=index["table_name"], postgresql_concurrently=True, if_exists=True
+            )
+    op.drop_table('car_records_images_archive')
+    op.drop_table('car_records_archive')
+    op.drop_table('cars_archive')
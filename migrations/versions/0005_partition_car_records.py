@@ -0,0 +1,141 @@
+"""partition car_records by hash of user_id_owner
+
+car_records превращается в секционированную по HASH (user_id_owner) таблицу из
+PARTITIONS секций car_records_p00..car_records_pNN. Первичный ключ становится
+(id, user_id_owner), внешний ключ car_records_images ссылается на обе колонки.
+Последовательность id сохраняется, поэтому идентификаторы записей не меняются.
+
+Миграция требует простоя: car_records и car_records_images недоступны ни для записи,
+ни для чтения, пока данные копируются в новую таблицу и строятся индексы. Переименование
+таблицы, DROP INDEX и DROP CONSTRAINT берут ACCESS EXCLUSIVE и держат его до конца
+транзакции миграции, поэтому блокировка берётся сразу в этом режиме. Длительность —
+примерно время INSERT ... SELECT всей таблицы плюс построение индексов; оцените её
+на копии базы и проводите миграцию в окно обслуживания. Если блокировку не удалось
+получить за LOCK_TIMEOUT (таблицу держит долгий запрос), миграция падает, не собирая
+за собой очередь запросов приложения.
+
+Внешний ключ изображений проверяется (VALIDATE) уже после фиксации основной транзакции:
+проверка берёт только SHARE UPDATE EXCLUSIVE и не мешает работе приложения. Если она
+не прошла, исправьте строки car_records_images, выполните
+ALTER TABLE car_records_images VALIDATE CONSTRAINT car_records_images_car_record_fkey
+и alembic stamp 0005.
+
+Нужен Postgres 12+. Обслуживание секций: python -m src.services.partition_maintenance
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+LOCK_TIMEOUT = "5s"
+
+INDEXES = [
+    dict(
+        index_name="ix_car_records_car_owner_live", columns=["car_id", "user_id_owner", sa.text("created_at DESC")],
+        postgresql_where=sa.text("is_deleted = false AND is_active = true"),
+    ),
+    dict(index_name="ix_car_records_car_id", columns=["car_id"]),
+    dict(
+        index_name="ix_car_records_deleted_at", columns=["deleted_at"],
+        postgresql_where=sa.text("is_deleted = true"),
+    ),
+]
+
+
+def _columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('car_records_id_seq'::regclass)"),
+                  nullable=False),
+        sa.Column('user_id_owner', sa.Integer(), nullable=False),
+        sa.Column('car_id', sa.Integer(), nullable=False),
+        sa.Column('record_type', sa.String(length=100), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('record_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('mileage', sa.Integer(), nullable=True),
+        sa.Column('service_place', sa.String(length=255), nullable=True),
+        sa.Column('cost', sa.Numeric(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['car_id'], ['cars.id'], name='car_records_car_id_fkey'),
+        sa.ForeignKeyConstraint(['user_id_owner'], ['users.id'], name='car_records_user_id_owner_fkey'),
+    ]
+
+
+def _swap_out_old_table(old_name: str) -> None:
+    """Освобождает имена таблицы, её ограничений и индексов для новой car_records."""
+    op.execute("LOCK TABLE car_records IN ACCESS EXCLUSIVE MODE")
+    for index in INDEXES:
+        op.drop_index(index["index_name"], table_name="car_records", if_exists=True)
+    op.execute(f"ALTER TABLE car_records RENAME TO {old_name}")
+    for constraint in ("car_records_pkey", "car_records_car_id_fkey", "car_records_user_id_owner_fkey"):
+        op.execute(f"ALTER TABLE {old_name} RENAME CONSTRAINT {constraint} TO {old_name}{constraint[11:]}")
+
+
+def _copy_and_drop_old_table(old_name: str) -> None:
+    op.execute(f"INSERT INTO car_records SELECT * FROM {old_name}")
+    # Последовательность принадлежит колонке старой таблицы и удалилась бы вместе с ней
+    op.execute("ALTER SEQUENCE car_records_id_seq OWNED BY car_records.id")
+    op.drop_table(old_name)
+    for index in INDEXES:
+        op.create_index(**index, table_name="car_records")
+    op.execute("ANALYZE car_records")
+
+
+def upgrade() -> None:
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.drop_constraint("car_records_images_car_record_id_fkey", "car_records_images", type_="foreignkey")
+    _swap_out_old_table("car_records_unpartitioned")
+
+    op.create_table(
+        'car_records', *_columns(), sa.PrimaryKeyConstraint('id', 'user_id_owner', name='car_records_pkey'),
+        postgresql_partition_by="HASH (user_id_owner)",
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE car_records_p{remainder:02d} PARTITION OF car_records "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+    _copy_and_drop_old_table("car_records_unpartitioned")
+
+    # Владелец изображения всегда владелец записи; выравниваем на случай расхождений, иначе FK не пройдёт проверку
+    op.execute(
+        """
+        UPDATE car_records_images i SET owner_user_id = r.user_id_owner
+        FROM car_records r
+        WHERE r.id = i.car_record_id AND i.owner_user_id <> r.user_id_owner
+        """
+    )
+    op.execute(
+        "ALTER TABLE car_records_images ADD CONSTRAINT car_records_images_car_record_fkey "
+        "FOREIGN KEY (car_record_id, owner_user_id) REFERENCES car_records (id, user_id_owner) NOT VALID"
+    )
+    # Фиксирует транзакцию с копированием и снимает её блокировки; проверка ключа — отдельно
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE car_records_images VALIDATE CONSTRAINT car_records_images_car_record_fkey")
+
+
+def downgrade() -> None:
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.drop_constraint("car_records_images_car_record_fkey", "car_records_images", type_="foreignkey")
+    _swap_out_old_table("car_records_partitioned")
+
+    op.create_table('car_records', *_columns(), sa.PrimaryKeyConstraint('id', name='car_records_pkey'))
+    _copy_and_drop_old_table("car_records_partitioned")
+
+    op.create_foreign_key(
+        "car_records_images_car_record_id_fkey", "car_records_images", "car_records", ["car_record_id"], ["id"]
+    )
@@ -0,0 +1,32 @@
+"""user shards map
+
+Таблица user_shards (src/models/shard_models.py): в каком шарде лежат данные пользователя.
+Создаётся только в основной БД; пользователи без строки остаются в основном шарде.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_shards',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_shards')
@@ -0,0 +1,34 @@
+"""row versions for cars and car records
+
+Колонка version для оптимистической блокировки машин и записей: UPDATE выполняется
+только при совпадении версии, которую прислал клиент (If-Match), и увеличивает её.
+Архивные таблицы повторяют колонки исходных (src/models/archive_models.py).
+
+ADD COLUMN с постоянным значением по умолчанию не переписывает таблицы, а на
+секционированной car_records колонка добавляется во все секции.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['cars', 'car_records', 'cars_archive', 'car_records_archive']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_column(table, 'version')
@@ -28,3 +28,6 @@ api_router.include_router(car_records, prefix="/cars_records", tags=["Car record
 from src.api.v1.check_version import router as check_version
 api_router.include_router(check_version, prefix="/version", tags=["Version"])
 
+
+from src.api.v1.pool_metrics import router as pool_metrics
+api_router.include_router(pool_metrics, prefix="/metrics", tags=["Metrics"])
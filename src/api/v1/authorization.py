@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, Depends
 
 from services.auth_service import auth, logout
 from src.schemas import AuthRequest, AuthResponse, LogoutRequest, LogoutResponse
-from src.core.security.email import encrypt_email, decrypt_email
+from src.core.rate_limit import limit_by_ip, rate_limiter
 
 router = APIRouter()
 
 
-@router.post('/login', response_model=AuthResponse)
+@router.post('/login', response_model=AuthResponse, dependencies=[Depends(limit_by_ip("login_ip"))])
 async def auth_user(
         auth_data: AuthRequest = Body(..., example={
                 'email': 'savvin.nikita.work@yandex.ru',
@@ -54,10 +54,11 @@ async def auth_user(
         - **HTTPException 400**: При ошибке валидации входных данных
         - **HTTPException 401**: При неверных учётных данных
         - **HTTPException 401**: Если пользователь заблокирован, удалён или неактивен
+        - **HTTPException 429**: При превышении лимита попыток входа (см. заголовок Retry-After)
         """
         email = auth_data.email
-        email_encrypt = encrypt_email(email=email)
-        return await auth(email=email_encrypt, password=auth_data.password)
+        rate_limiter.hit("login_email", email.lower())
+        return await auth(email=email, password=auth_data.password)
 
 @router.post('/logout', response_model=LogoutResponse)
 async def logout_user(
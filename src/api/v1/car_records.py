@@ -1,9 +1,13 @@
 # src/api/v1/car_records.py
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, Form, Path
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, Form, Header, Path, Response
 from typing import List
-from src.services.car_records import create_car_record, delete_car_record, get_car_records, get_car_record_detail, update_car_record, delete_car_record_image
+from src.services.car_records import create_car_record, delete_car_record, get_car_records_json, get_car_record_detail, update_car_record, delete_car_record_image
+from src.core.etag import etag, expected_version
 from src.core.token import jwt_token_validator
-from src.schemas import CarRecordCreateResponse, CarRecordDetailResponse
+from src.schemas import (
+    CarRecordCreateResponse, CarRecordDeleteResponse, CarRecordDetailResponse, CarRecordImageDeleteResponse,
+    CarRecordListItem, CarRecordUpdateResponse,
+)
 from src.core.logger import logger
 
 router = APIRouter()
@@ -63,6 +67,7 @@ async def create_user_car_record(
 
 @router.delete(
     "/delete/{record_id}",
+    response_model=CarRecordDeleteResponse,
     summary="Удалить запись автомобиля",
     description="Помечает запись автомобиля как удаленную (is_deleted=true)"
 )
@@ -86,6 +91,7 @@ async def delete_user_car_record(
 
 @router.get(
     "/list",
+    response_model=List[CarRecordListItem],
     summary="Получить записи автомобиля",
     description="Возвращает список активных и неудаленных записей автомобиля"
 )
@@ -95,11 +101,13 @@ async def get_user_car_records(
 ):
     user_id_owner = int(user["sub"])
     try:
-        result = await get_car_records(
+        result = await get_car_records_json(
             car_id=car_id,
             user_id_owner=user_id_owner
         )
-        return result
+        # JSON собран в БД и отдаётся как есть: response_model только описывает ответ в OpenAPI и не
+        # проверяется. Совпадение с ним на Postgres проверяет tests/test_json_lists.py
+        return Response(content=result, media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -120,6 +128,7 @@ async def get_user_car_records(
 async def get_user_car_record(
         car_id: int,
         car_record_id: int,
+        response: Response,
         user: dict = Depends(jwt_token_validator)
 ):
     """
@@ -138,6 +147,7 @@ async def get_user_car_record(
     - mileage
     - service_place
     - cost
+    - version: версия записи (она же в заголовке ETag) для If-Match при обновлении
     - images: список изображений (bytes)
 
     Raises:
@@ -147,6 +157,7 @@ async def get_user_car_record(
     user_id_owner = int(user["sub"])
     try:
         record_detail = await get_car_record_detail(user_id_owner, car_id, car_record_id)
+        response.headers["ETag"] = etag(record_detail["version"])
         return record_detail
     except HTTPException:
         raise
@@ -158,11 +169,12 @@ async def get_user_car_record(
 
 @router.put(
     "/update",
-    response_model=dict,
+    response_model=CarRecordUpdateResponse,
     summary="Обновить запись автомобиля",
     description="Обновляет запись автомобиля и опционально добавляет новые изображения"
 )
 async def update_user_car_record(
+        response: Response,
         car_id: int = Form(...),
         car_record_id: int = Form(...),
         record_type: str = Form(...),
@@ -172,7 +184,9 @@ async def update_user_car_record(
         mileage: int | None = Form(None),
         service_place: str | None = Form(None),
         cost: float | None = Form(None),
+        version: int | None = Form(None),
         files: List[UploadFile] | None = None,
+        if_match: str | None = Header(None),
         user: dict = Depends(jwt_token_validator)
 ):
     """
@@ -183,12 +197,15 @@ async def update_user_car_record(
     - **car_record_id**: ID записи автомобиля
     - **record_type, name, description**: обязательные поля записи
     - **record_date, mileage, service_place, cost**: опциональные поля
+    - **version** / **If-Match**: версия записи, которую видел клиент; запись меняется,
+      только если её не изменили с другого устройства. Новая версия — в ответе и ETag
     - **files**: список новых изображений
     - **user**: данные текущего пользователя из токена
 
     Raises:
     - **HTTPException 400**: если обязательные поля не переданы
     - **HTTPException 404**: если запись не найдена
+    - **HTTPException 409**: если версия записи уже другая
     - **HTTPException 500**: если произошла ошибка при работе с базой данных
     """
     user_id_owner = int(user["sub"])
@@ -203,7 +220,10 @@ async def update_user_car_record(
     }
 
     try:
-        result = await update_car_record(payload, user_id_owner, car_id, car_record_id, files)
+        result = await update_car_record(
+            payload, user_id_owner, car_id, car_record_id, files, expected_version(if_match, version)
+        )
+        response.headers["ETag"] = etag(result["version"])
         return result
     except HTTPException:
         raise
@@ -215,7 +235,7 @@ async def update_user_car_record(
 
 @router.delete(
     "/delete_image/{car_record_id}/{image_id}",
-    response_model=dict,
+    response_model=CarRecordImageDeleteResponse,
     summary="Удалить изображение записи автомобиля",
     description="Помечает изображение записи автомобиля как удалённое"
 )
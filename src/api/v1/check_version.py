@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from src.core.responses import ORJSONResponse
 from src.utils.сheck_version import get_version, update_version, check_version
 
 router = APIRouter()
@@ -16,7 +17,7 @@ class VersionCheckRequest(BaseModel):
     summary="Текущая версия приложения"
 )
 async def get_current_version():
-    return get_version()
+    return ORJSONResponse(get_version())
 
 
 @router.post(
@@ -25,7 +26,7 @@ async def get_current_version():
 )
 async def update_current_version(payload: VersionUpdateRequest):
     update_version(payload.version)
-    return {"status": "ok"}
+    return ORJSONResponse({"status": "ok"})
 
 
 @router.post(
@@ -33,4 +34,4 @@ async def update_current_version(payload: VersionUpdateRequest):
     summary="Проверка версии клиента"
 )
 async def check_client_version(payload: VersionCheckRequest):
-    return check_version(payload.version)
+    return ORJSONResponse(check_version(payload.version))
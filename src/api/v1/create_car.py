@@ -1,8 +1,9 @@
 # src/api/v1/cars.py
-from fastapi import APIRouter, HTTPException, Depends
-from src.services.car import create_car, get_user_cars, update_car, delete_car
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+from src.services.car import create_car, get_user_cars_json, update_car, delete_car
+from src.core.etag import etag, expected_version
 from src.core.token import jwt_token_validator
-from src.schemas import CarCreateRequest, CarCreateResponse, CarListResponse
+from src.schemas import CarCreateRequest, CarCreateResponse, CarDeleteResponse, CarListResponse, CarUpdateRequest
 from src.core.logger import logger
 
 router = APIRouter()
@@ -67,8 +68,9 @@ async def list_user_cars(user: dict = Depends(jwt_token_validator)):
     """
     user_id_owner = int(user["sub"])
     try:
-        cars = await get_user_cars(user_id_owner)
-        return {"cars": cars}
+        # JSON собран в БД и отдаётся как есть: response_model только описывает ответ в OpenAPI и не
+        # проверяется. Совпадение с ним на Postgres проверяет tests/test_json_lists.py
+        return Response(content=await get_user_cars_json(user_id_owner), media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -84,7 +86,9 @@ async def list_user_cars(user: dict = Depends(jwt_token_validator)):
 )
 async def update_user_car(
         car_id: int,
-        payload: CarCreateRequest,
+        payload: CarUpdateRequest,
+        response: Response,
+        if_match: str | None = Header(None),
         user: dict = Depends(jwt_token_validator)
 ):
     """
@@ -93,20 +97,27 @@ async def update_user_car(
     Description:
     - Обновляет указанные поля: brand, model, year, mileage, color
     - Проверяет права владельца по user_id_owner из токена
+    - С версией машины (If-Match или поле version) обновляет, только если машину не изменили
+      с другого устройства; новая версия возвращается в поле version и заголовке ETag
 
     Parameters:
     - **car_id**: ID автомобиля для обновления
     - **payload**: JSON с обновляемыми полями
+    - **if_match**: ETag версии машины, например "3"
     - **user**: Данные текущего пользователя из токена
 
     Raises:
     - **HTTPException 400**: Если нет полей для обновления
     - **HTTPException 404**: Если машина не найдена или пользователь не владелец
+    - **HTTPException 409**: Если версия машины уже другая
     - **HTTPException 500**: Если произошла ошибка при работе с базой данных
     """
     user_id_owner = int(user["sub"])
     try:
-        result = await update_car(car_id, user_id_owner, payload.dict())
+        result = await update_car(
+            car_id, user_id_owner, payload.dict(), expected_version(if_match, payload.version)
+        )
+        response.headers["ETag"] = etag(result["version"])
         return result
     except HTTPException:
         raise
@@ -117,7 +128,7 @@ async def update_user_car(
 
 @router.delete(
     "/delete/{car_id}",
-    response_model=CarCreateResponse,
+    response_model=CarDeleteResponse,
     summary="Удалить автомобиль",
     description="Логическое удаление автомобиля текущего пользователя."
 )
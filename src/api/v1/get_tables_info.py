@@ -3,6 +3,7 @@
 from fastapi import APIRouter, HTTPException
 from src.services.check_test_conn import check_tables_info
 from src.core.logger import logger
+from src.core.responses import ORJSONResponse
 
 router = APIRouter()
 
@@ -34,7 +35,7 @@ async def get_tables_info():
     """
     try:
         result = await check_tables_info()
-        return result
+        return ORJSONResponse(result)
     except Exception as e:
         logger.error(f"Ошибка при получении информации о таблицах: {e}")
         raise HTTPException(
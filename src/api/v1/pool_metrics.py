@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+
+from src.core.responses import ORJSONResponse
+from src.session import db_manager
+
+router = APIRouter()
+
+
+@router.get(
+    "/pool",
+    summary="Состояние пулов соединений с БД текущего воркера"
+)
+async def get_pool_metrics():
+    """
+    Метрики пулов соединений (primary, классов нагрузки, read-реплик и шардов) процесса,
+    обработавшего запрос.
+
+    Каждый воркер uvicorn держит свой пул, поэтому для оценки общей нагрузки
+    на Postgres значения нужно собирать со всех воркеров (поле pid).
+    """
+    return ORJSONResponse({
+        "primary": {**db_manager.pool_metrics.snapshot(), "breaker": db_manager.breaker.snapshot()},
+        "workloads": {name: pool.pool_metrics.snapshot() for name, pool in db_manager.workloads.items()},
+        "replicas": db_manager.replicas.snapshot(),
+        "shards": {
+            name: {**shard.pool_metrics.snapshot(), "breaker": shard.breaker.snapshot()}
+            for name, shard in db_manager.shards.items()
+        },
+    })
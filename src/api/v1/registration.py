@@ -1,8 +1,9 @@
 # src/api/v1/registration.py
-from fastapi import APIRouter, HTTPException, Body, status
+from fastapi import APIRouter, HTTPException, Body, Depends, status
 from src.schemas import RegistrationRequest, RegistrationResponse, SendCodeRequest, SendCodeResponse, SendChangeCodeRequest
 from src.services.create_org_and_superuser import create_user, send_verify_code, send_change_code, change_password
 from src.core.logger import logger
+from src.core.rate_limit import limit_by_ip, rate_limiter
 
 
 router = APIRouter()
@@ -10,7 +11,8 @@ router = APIRouter()
 
 @router.post(
     "/user",
-    status_code=status.HTTP_201_CREATED, 
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_by_ip("verify_code_ip"))],
     # response_model=RegistrationResponse,
     summary="Register organization and superuser",
     description="Создает нового юзера"
@@ -53,6 +55,7 @@ async def register_user(
 @router.post(
     "/send_reg_code",
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_by_ip("send_code_ip"))],
     response_model=SendCodeResponse,
     summary="Register organization and superuser",
     description="Создает нового юзера"
@@ -83,6 +86,7 @@ async def send_code_func(
     - **HTTPException 500**: Если произошла ошибка при работе с базой данных.
     """
 
+    rate_limiter.hit("send_code_email", payload.email.lower())
     try:
         massage = await send_verify_code(payload)
         return massage
@@ -94,6 +98,7 @@ async def send_code_func(
 @router.post(
     "/send_change_code",
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_by_ip("send_code_ip"))],
     response_model=SendCodeResponse,
     summary="Register organization and superuser",
     description="Создает нового юзера"
@@ -122,6 +127,7 @@ async def send_change_code_func(
     - **HTTPException 500**: Если произошла ошибка при работе с базой данных.
     """
 
+    rate_limiter.hit("send_code_email", payload.email.lower())
     try:
         massage = await send_change_code(payload)
         return massage
@@ -132,6 +138,7 @@ async def send_change_code_func(
 @router.post(
     "/change_password",
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_by_ip("verify_code_ip"))],
     # response_model=RegistrationResponse,
     summary="Изменение пароля",
     description="Изменение пароля"
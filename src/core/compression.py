@@ -0,0 +1,164 @@
+# src/core/compression.py
+"""
+Сжатие ответов: Brotli, если клиент его принимает, иначе gzip.
+
+Middleware написано на чистом ASGI, а не через app.middleware("http"): ответ проходит
+через него по частям, поэтому потоковый ответ сжимается и уходит клиенту порциями
+по мере поступления, без буферизации целиком.
+
+Сжимаются только ответы с типом из COMPRESSION_TYPES и размером от COMPRESSION_MIN_SIZE
+байт: маленький JSON после сжатия почти не уменьшается, а время на него тратится.
+Размер потокового ответа заранее не известен — первые части копятся, пока не наберётся
+порог; если поток закончился раньше, он уходит без сжатия.
+
+Не сжимаются ответы, у которых уже есть Content-Encoding, ответы на Range-запросы (206)
+и ответы на HEAD. Сильный ETag обещает одинаковые байты, поэтому у сжатого ответа он
+получает суффикс кодировки: "3" становится "3-br" или "3-gzip". If-Match сравнивается
+строго (src/core/etag.py) и понимает такой ETag как ту же версию.
+"""
+import zlib
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Кодировки в порядке предпочтения при одинаковом q в Accept-Encoding
+ENCODINGS = ("br", "gzip")
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Кодировка из Accept-Encoding с наибольшим q; None — сжимать нельзя."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip().lower()] = q
+    best = max(ENCODINGS, key=lambda encoding: weights.get(encoding, weights.get("*", 0.0)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # Z_SYNC_FLUSH отдаёт всё сжатое до этого момента, чтобы клиент получил часть сразу
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(
+            self,
+            app: ASGIApp,
+            minimum_size: int = 1024,
+            content_types: list[str] | tuple[str, ...] = ("application/json",),
+            gzip_level: int = 6,
+            brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = {content_type.strip().lower() for content_type in content_types}
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressedResponder(self, encoding, send).send)
+
+    def compressible(self, headers: Headers, status: int) -> bool:
+        if status == 206 or "content-encoding" in headers or "content-range" in headers:
+            return False
+        media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        return media_type in self.content_types or f"{media_type.split('/', 1)[0]}/*" in self.content_types
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return BrotliCompressor(self.brotli_quality)
+        return GzipCompressor(self.gzip_level)
+
+
+class CompressedResponder:
+    """Обёртка send одного ответа: держит заголовки, пока не ясно, сжимать ли тело."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start: Message | None = None
+        self.buffered: list[bytes] = []
+        self.buffered_size = 0
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message.get("headers", []))
+            self.passthrough = not self.middleware.compressible(headers, message["status"])
+            if self.passthrough:
+                await self.downstream(message)
+            return
+        if self.passthrough or message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.compressor is not None:
+            data = self.compressor.compress(body) if more_body else self.compressor.finish(body)
+            await self.downstream({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        self.buffered.append(body)
+        self.buffered_size += len(body)
+        if more_body and self.buffered_size < self.middleware.minimum_size:
+            return
+        body = b"".join(self.buffered)
+        self.buffered.clear()
+        if self.buffered_size < self.middleware.minimum_size:
+            # Ответ закончился, не набрав порога: уходит как есть
+            await self.downstream(self.start)
+            await self.downstream({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        self.compressor = self.middleware.compressor(self.encoding)
+        data = self.compressor.compress(body) if more_body else self.compressor.finish(body)
+        headers = MutableHeaders(scope=self.start)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = etag[:-1] + f'-{self.encoding}"'
+        if more_body:
+            # Итоговая длина неизвестна: ответ уходит с Transfer-Encoding: chunked
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(data))
+        await self.downstream(self.start)
+        await self.downstream({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -1,4 +1,6 @@
 # src/core/configuration/config.py
+import base64
+import hashlib
 import logging
 from environs import Env
 
@@ -12,14 +14,85 @@ class Settings:
         self.PUBLIC_OR_LOCAL = env.str("PUBLIC_OR_LOCAL", "LOCAL")
         self.SERVICE_NAME = env.str("SERVICE_NAME", "db_template")
 
+        # server — Postgres, S3 и SMTP из окружения; embedded — всё внутри процесса, без внешних
+        # сервисов: SQLite, S3 и SMTP в памяти, детерминированные секреты (src/db_clients/embedded.py)
+        self.APP_MODE = env.str("APP_MODE", "server")  # server | embedded
+        self.EMBEDDED = self.APP_MODE == "embedded"
+
         self.HOST = env.str("HOST", '0.0.0.0')
         self.PORT = env.int('PORT', 7070)
+        # База встроенного режима принадлежит процессу, поэтому воркер один
+        self.WORKERS = env.int("WORKERS", 1 if self.EMBEDDED else 4)
 
-        self.JWT_SECRET_KEY = env.str("JWT_SECRET_KEY", "") 
+        self.JWT_SECRET_KEY = env.str("JWT_SECRET_KEY", "") or self.embedded_secret("JWT_SECRET_KEY") or ""
         self.JWT_ALGORITHM = env.str("JWT_ALGORITHM", "HS256")
         self.ACCESS_TOKEN_EXPIRE_MINUTES = env.int("ACCESS_TOKEN_EXPIRE_MINUTES", 15)
         self.REFRESH_TOKEN_EXPIRE_DAYS = env.int("REFRESH_TOKEN_EXPIRE_DAYS", 30)
 
+        # Во встроенном режиме письма принимает SMTP sink (src/utils/smtp_sink.py) на свободном порту
+        self.SMTP_HOST = env.str("SMTP_HOST", "127.0.0.1" if self.EMBEDDED else "smtp.gmail.com")
+        self.SMTP_PORT = env.int("SMTP_PORT", 0 if self.EMBEDDED else 587)
+        self.SMTP_START_TLS = env.bool("SMTP_START_TLS", not self.EMBEDDED)
+        self.SMTP_POOL_SIZE = env.int("SMTP_POOL_SIZE", 3)
+        self.SMTP_TIMEOUT = env.float("SMTP_TIMEOUT", 15.0)
+        self.SMTP_IDLE_TIMEOUT = env.float("SMTP_IDLE_TIMEOUT", 60.0)
+
+        self.EMAIL_OUTBOX_WORKERS = env.int("EMAIL_OUTBOX_WORKERS", 1)
+        self.EMAIL_OUTBOX_BATCH_SIZE = env.int("EMAIL_OUTBOX_BATCH_SIZE", 10)
+        self.EMAIL_OUTBOX_POLL_INTERVAL = env.float("EMAIL_OUTBOX_POLL_INTERVAL", 2.0)
+        self.EMAIL_OUTBOX_LEASE_SECONDS = env.int("EMAIL_OUTBOX_LEASE_SECONDS", 60)
+        self.EMAIL_OUTBOX_MAX_ATTEMPTS = env.int("EMAIL_OUTBOX_MAX_ATTEMPTS", 8)
+        self.EMAIL_OUTBOX_BACKOFF_BASE = env.float("EMAIL_OUTBOX_BACKOFF_BASE", 5.0)
+        self.EMAIL_OUTBOX_BACKOFF_MAX = env.float("EMAIL_OUTBOX_BACKOFF_MAX", 600.0)
+
+        self.VERIFY_CODE_STORE = env.str("VERIFY_CODE_STORE", "memory" if self.EMBEDDED else "postgres")  # postgres | memory
+        self.VERIFY_CODE_MAX_ATTEMPTS = env.int("VERIFY_CODE_MAX_ATTEMPTS", 5)
+        self.VERIFY_CODE_PURGE_INTERVAL = env.float("VERIFY_CODE_PURGE_INTERVAL", 300.0)
+
+        self.EMAIL_REENCRYPT_ON_STARTUP = env.bool("EMAIL_REENCRYPT_ON_STARTUP", False)
+        self.EMAIL_REENCRYPT_BATCH_SIZE = env.int("EMAIL_REENCRYPT_BATCH_SIZE", 5000)
+        self.EMAIL_REENCRYPT_PAUSE = env.float("EMAIL_REENCRYPT_PAUSE", 0.1)
+
+        # Перенос удалённых машин, записей и изображений в архивные таблицы (src/services/archival.py)
+        self.ARCHIVE_ENABLED = env.bool("ARCHIVE_ENABLED", False)
+        self.ARCHIVE_AFTER_DAYS = env.int("ARCHIVE_AFTER_DAYS", 30)
+        self.ARCHIVE_BATCH_SIZE = env.int("ARCHIVE_BATCH_SIZE", 1000)
+        self.ARCHIVE_PAUSE = env.float("ARCHIVE_PAUSE", 0.5)
+        self.ARCHIVE_INTERVAL = env.float("ARCHIVE_INTERVAL", 3600.0)
+
+        self.RATE_LIMIT_BACKEND = env.str("RATE_LIMIT_BACKEND", "memory" if self.EMBEDDED else "shm")  # shm | memory
+        self.RATE_LIMIT_SLOTS = env.int("RATE_LIMIT_SLOTS", 65536)
+        self.RATE_LIMIT_TRUST_PROXY = env.bool("RATE_LIMIT_TRUST_PROXY", False)
+        # Формат "<запросов>/<секунд>"
+        self.RATE_LIMITS = {
+            "login_ip": env.str("RATE_LIMIT_LOGIN_IP", "20/60"),
+            "login_email": env.str("RATE_LIMIT_LOGIN_EMAIL", "5/60"),
+            "send_code_ip": env.str("RATE_LIMIT_SEND_CODE_IP", "10/600"),
+            "send_code_email": env.str("RATE_LIMIT_SEND_CODE_EMAIL", "3/600"),
+            "verify_code_ip": env.str("RATE_LIMIT_VERIFY_CODE_IP", "20/600"),
+            "verify_code_email": env.str("RATE_LIMIT_VERIFY_CODE_EMAIL", "5/600"),
+        }
+
+        # Сжатие ответов (src/core/compression.py): br, если клиент его принимает, иначе gzip
+        self.COMPRESSION_ENABLED = env.bool("COMPRESSION_ENABLED", True)
+        self.COMPRESSION_MIN_SIZE = env.int("COMPRESSION_MIN_SIZE", 1024)  # байт
+        self.COMPRESSION_TYPES = env.list("COMPRESSION_TYPES", [
+            "application/json", "text/*", "application/javascript", "application/xml", "image/svg+xml",
+        ])
+        self.COMPRESSION_GZIP_LEVEL = env.int("COMPRESSION_GZIP_LEVEL", 6)
+        # 4 — быстрый уровень для динамических ответов, 11 — для статики
+        self.COMPRESSION_BROTLI_QUALITY = env.int("COMPRESSION_BROTLI_QUALITY", 4)
+
+    def embedded_secret(self, name: str) -> str | None:
+        """
+        Секрет по умолчанию для встроенного режима: 32 байта в urlsafe base64, выведенные из имени
+        переменной, одинаковые от запуска к запуску. В режиме server — None, секрет обязателен.
+        """
+        if not self.EMBEDDED:
+            return None
+        digest = hashlib.sha256(f"{self.SERVICE_NAME}:embedded:{name}".encode()).digest()
+        return base64.urlsafe_b64encode(digest).decode()
+
     def get_origins_urls(self):
         if self.PUBLIC_OR_LOCAL == 'PUBLIC':
             return 'http://11.11.11.11'
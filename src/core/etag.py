@@ -0,0 +1,42 @@
+# src/core/etag.py
+"""
+Версии машин и записей в HTTP: ETag ответа и If-Match запроса на изменение.
+
+ETag — версия строки в кавычках ("3"). Клиент присылает её обратно в If-Match
+(или полем version) и получает 409, если строку успели изменить с другого устройства.
+Без версии изменение выполняется безусловно. If-Match сравнивается строго (RFC 9110, 13.1.1):
+слабый ETag (W/"3") не подтверждает версию, и запрос получает 412.
+
+Сжатый ответ несёт свой сильный ETag с суффиксом кодировки ("3-br", "3-gzip",
+src/core/compression.py): байты у него другие, а версия та же, поэтому If-Match
+с таким ETag подтверждает версию 3.
+"""
+from fastapi import HTTPException, status
+
+from src.core.compression import ENCODINGS
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def expected_version(if_match: str | None, version: int | None = None) -> int | None:
+    """Версия из If-Match, а без заголовка — из поля version; None — проверка не нужна."""
+    if if_match is None or if_match.strip() == "*":
+        return version
+    value = if_match.strip()
+    if value.startswith("W/"):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"If-Match сравнивается только с сильным ETag, например \"3\", получено: {if_match}",
+        )
+    tag, _, encoding = value.strip('"').partition("-")
+    try:
+        if encoding and encoding not in ENCODINGS:
+            raise ValueError(encoding)
+        return int(tag)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"If-Match должен содержать ETag версии, например \"3\", получено: {if_match}",
+        )
@@ -0,0 +1,167 @@
+# src/core/rate_limit.py
+import hashlib
+import math
+import os
+import struct
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from logging import getLogger
+
+from fastapi import HTTPException, Request, status
+
+from src.core.configuration.config import settings
+
+logger = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateRule:
+    """Token bucket: capacity запросов, которые полностью восстанавливаются за period секунд."""
+    capacity: int
+    period: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "RateRule":
+        capacity, period = value.split("/")
+        return cls(capacity=int(capacity), period=float(period))
+
+
+class BucketBackend(ABC):
+    @abstractmethod
+    def consume(self, key: str, rule: RateRule, now: float) -> float:
+        """Списывает один токен. Возвращает 0, если запрос разрешён, иначе — сколько секунд ждать."""
+
+    @staticmethod
+    def _take(tokens: float, updated: float, rule: RateRule, now: float) -> tuple[float, float]:
+        tokens = min(rule.capacity, tokens + max(0.0, now - updated) * rule.refill_per_second)
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        return tokens, (1 - tokens) / rule.refill_per_second
+
+
+class InMemoryBucketBackend(BucketBackend):
+    """Бакеты в памяти процесса: лимиты не делятся между воркерами uvicorn."""
+
+    def __init__(self):
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    def consume(self, key: str, rule: RateRule, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (rule.capacity, now))
+        tokens, retry_after = self._take(tokens, updated, rule, now)
+        self._buckets[key] = (tokens, now)
+        return retry_after
+
+
+class SharedMemoryBucketBackend(BucketBackend):
+    """
+    Бакеты в сегменте разделяемой памяти, общем для всех воркеров uvicorn на хосте.
+
+    Сегмент — хеш-таблица фиксированного размера с открытой адресацией:
+    слот = (hash ключа, токены, время обновления). Доступ сериализуется flock на
+    файле рядом с сегментом. Если все слоты в окне пробирования заняты,
+    вытесняется самый давно обновлённый бакет — он почти наверняка уже полон.
+    """
+
+    _SLOT = struct.Struct("<Qdd")
+    _PROBES = 16
+
+    def __init__(self, name: str, slots: int):
+        from multiprocessing import shared_memory
+
+        self.slots = slots
+        size = slots * self._SLOT.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size, track=False)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        if self._shm.size < size:
+            raise RuntimeError(f"Сегмент {name} меньше ожидаемого ({self._shm.size} < {size})")
+
+        self._lock_fd = os.open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def consume(self, key: str, rule: RateRule, now: float) -> float:
+        import fcntl
+
+        key_hash = self._hash(key)
+        buf = self._shm.buf
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            victim, victim_updated = None, math.inf
+            for probe in range(self._PROBES):
+                offset = ((key_hash + probe) % self.slots) * self._SLOT.size
+                slot_hash, tokens, updated = self._SLOT.unpack_from(buf, offset)
+                if slot_hash == key_hash:
+                    break
+                if slot_hash == 0:
+                    tokens, updated = rule.capacity, now
+                    break
+                if updated < victim_updated:
+                    victim, victim_updated = offset, updated
+            else:
+                offset, tokens, updated = victim, rule.capacity, now
+
+            tokens, retry_after = self._take(tokens, updated, rule, now)
+            self._SLOT.pack_into(buf, offset, key_hash, tokens, now)
+            return retry_after
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    def __init__(self, backend: BucketBackend, rules: dict[str, RateRule]):
+        self.backend = backend
+        self.rules = rules
+
+    def hit(self, scope: str, key: str) -> None:
+        """
+        Учитывает запрос в бакете scope:key.
+        При превышении лимита выбрасывает HTTPException 429 с заголовком Retry-After.
+        """
+        rule = self.rules[scope]
+        retry_after = self.backend.consume(f"{scope}:{key}", rule, time.time())
+        if retry_after > 0:
+            logger.warning(f"Превышен лимит запросов {scope} для {key}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Слишком много запросов, попробуйте позже",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+def get_client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def limit_by_ip(scope: str):
+    """Зависимость FastAPI: лимит по IP клиента, проверяется до обращения к сервисам и БД."""
+    async def dependency(request: Request) -> None:
+        rate_limiter.hit(scope, get_client_ip(request))
+    return dependency
+
+
+def create_bucket_backend(backend: str) -> BucketBackend:
+    if backend == "shm":
+        return SharedMemoryBucketBackend(name=f"{settings.SERVICE_NAME}_rate_limit", slots=settings.RATE_LIMIT_SLOTS)
+    if backend == "memory":
+        return InMemoryBucketBackend()
+    raise ValueError(f"Неизвестный RATE_LIMIT_BACKEND: {backend}")
+
+
+rate_limiter = RateLimiter(
+    backend=create_bucket_backend(settings.RATE_LIMIT_BACKEND),
+    rules={scope: RateRule.parse(value) for scope, value in settings.RATE_LIMITS.items()},
+)
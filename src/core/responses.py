@@ -0,0 +1,39 @@
+# src/core/responses.py
+"""
+Сериализация ответов в JSON через orjson.
+
+orjson сам пишет datetime/date/UUID в ISO-формате, как jsonable_encoder, и выдаёт UTF-8
+без экранирования. Decimal (стоимость записей, numeric из Postgres) он не знает —
+его переводит json_default так же, как FastAPI: целое значение в int, дробное в float.
+
+ORJSONResponse — класс ответа по умолчанию для эндпоинтов без response_model.
+Эндпоинты с response_model FastAPI сериализует сам через pydantic-core прямо в байты,
+минуя класс ответа, поэтому в приложении он задаётся через Default(...): явный
+default_response_class отключил бы этот путь (fastapi/routing.py, use_dump_json).
+
+Класс по умолчанию только пишет байты: dict, возвращённый эндпоинтом без response_model,
+FastAPI сначала всё равно проводит через jsonable_encoder. Поэтому такие эндпоинты
+возвращают ORJSONResponse(...) сами — ответ уходит клиенту как есть.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def json_default(value: Any):
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
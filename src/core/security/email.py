@@ -1,41 +1,113 @@
 import os
+import hmac
+import hashlib
+import logging
+from functools import lru_cache
 from dotenv import load_dotenv
 import base64
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
 
+from src.core.configuration.config import settings
+
 # Загружаем .env
 load_dotenv()
 
-KEY = os.environ.get("EMAIL_ENCRYPT_KEY")
+logger = logging.getLogger(__name__)
+
+# Версия 1 — исходный ключ EMAIL_ENCRYPT_KEY (AES-ECB, формат без префикса).
+# Новые ключи задаются как EMAIL_ENCRYPT_KEYS="2:<base64>,3:<base64>" и шифруют AES-GCM
+# в формате "v<версия>:<base64(nonce + ciphertext)>".
+KEY = os.environ.get("EMAIL_ENCRYPT_KEY") or settings.embedded_secret("EMAIL_ENCRYPT_KEY")
 if not KEY:
     raise ValueError("Не найден EMAIL_ENCRYPT_KEY")
 key_bytes = base64.urlsafe_b64decode(KEY)[:32]
 
-def encrypt_email(email: str) -> str:
-    cipher = Cipher(algorithms.AES(key_bytes), modes.ECB(), backend=default_backend())
-    encryptor = cipher.encryptor()
+LEGACY_KEY_VERSION = 1
+KEYS: dict[int, bytes] = {LEGACY_KEY_VERSION: key_bytes}
+for item in filter(None, os.environ.get("EMAIL_ENCRYPT_KEYS", "").split(",")):
+    version, encoded = item.strip().split(":", 1)
+    KEYS[int(version)] = base64.urlsafe_b64decode(encoded)[:32]
+
+ACTIVE_KEY_VERSION = int(os.environ.get("EMAIL_ENCRYPT_ACTIVE_VERSION", max(KEYS)))
+if ACTIVE_KEY_VERSION not in KEYS:
+    raise ValueError(f"Ключ шифрования email версии {ACTIVE_KEY_VERSION} не задан")
+
+# Ключ blind index не ротируется вместе с ключами шифрования: по нему ищутся пользователи
+BLIND_INDEX_KEY = (os.environ.get("EMAIL_BLIND_INDEX_KEY") or settings.embedded_secret("EMAIL_BLIND_INDEX_KEY") or "").encode()
+if not BLIND_INDEX_KEY:
+    logger.warning("EMAIL_BLIND_INDEX_KEY не задан, ключ индекса выводится из EMAIL_ENCRYPT_KEY")
+    BLIND_INDEX_KEY = hmac.new(key_bytes, b"email-blind-index", hashlib.sha256).digest()
+
+
+@lru_cache(maxsize=None)
+def _ecb_cipher(version: int) -> Cipher:
+    return Cipher(algorithms.AES(KEYS[version]), modes.ECB(), backend=default_backend())
+
+
+@lru_cache(maxsize=None)
+def _gcm_cipher(version: int) -> AESGCM:
+    return AESGCM(KEYS[version])
+
+
+def _encrypt_legacy(email: str) -> str:
+    encryptor = _ecb_cipher(LEGACY_KEY_VERSION).encryptor()
     pad_len = 16 - (len(email.encode()) % 16)
     padded = email.encode() + bytes([pad_len]*pad_len)
     ct = encryptor.update(padded) + encryptor.finalize()
     return base64.urlsafe_b64encode(ct).decode()
 
-def decrypt_email(token: str) -> str:
-    cipher = Cipher(algorithms.AES(key_bytes), modes.ECB(), backend=default_backend())
-    decryptor = cipher.decryptor()
+
+def _decrypt_legacy(token: str) -> str:
+    decryptor = _ecb_cipher(LEGACY_KEY_VERSION).decryptor()
     padded = decryptor.update(base64.urlsafe_b64decode(token)) + decryptor.finalize()
     pad_len = padded[-1]
     return padded[:-pad_len].decode()
 
 
+def email_key_version(token: str) -> int:
+    if ":" not in token:
+        return LEGACY_KEY_VERSION
+    return int(token.split(":", 1)[0][1:])
+
+
+def encrypt_email(email: str, version: int = ACTIVE_KEY_VERSION) -> str:
+    if version == LEGACY_KEY_VERSION:
+        return _encrypt_legacy(email)
+    nonce = os.urandom(12)
+    ct = _gcm_cipher(version).encrypt(nonce, email.encode(), None)
+    return f"v{version}:" + base64.urlsafe_b64encode(nonce + ct).decode()
+
+
+def decrypt_email(token: str) -> str:
+    version = email_key_version(token)
+    if version == LEGACY_KEY_VERSION:
+        return _decrypt_legacy(token)
+    raw = base64.urlsafe_b64decode(token.split(":", 1)[1])
+    return _gcm_cipher(version).decrypt(raw[:12], raw[12:], None).decode()
+
+
+def email_blind_index(email: str) -> str:
+    """Детерминированный индекс для поиска по email, не зависящий от ключа шифрования."""
+    return hmac.new(BLIND_INDEX_KEY, email.encode(), hashlib.sha256).hexdigest()
+
+
+def legacy_encrypt_email(email: str) -> str:
+    """Шифротекст версии 1 — нужен, чтобы найти ещё не переиндексированные строки."""
+    return _encrypt_legacy(email)
+
+
 
 def test_encrypt_email_deterministic():
     email = "Admin@yandex.ru"
-    encrypted1 = encrypt_email(email)
-    encrypted2 = encrypt_email(email)
+    encrypted1 = legacy_encrypt_email(email)
+    encrypted2 = legacy_encrypt_email(email)
     assert encrypted1 == encrypted2, "Результаты шифрования не совпадают!"
     decrypted = decrypt_email(encrypted1)
     assert decrypted == email, "Дешифрование не вернуло исходный email!"
+    assert decrypt_email(encrypt_email(email)) == email, "Дешифрование активным ключом не вернуло исходный email!"
+    assert email_blind_index(email) == email_blind_index(email), "Blind index не детерминирован!"
     print("Тест пройден: шифрование детерминированное, дешифрование верное.")
     print(encrypted1)
     print(encrypted2)
@@ -9,6 +9,9 @@ from dotenv import load_dotenv
 import hmac
 import hashlib
 import os
+
+from src.core.configuration.config import settings
+
 load_dotenv()  # подгружаем .env
 
 
@@ -36,12 +39,12 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-SECRET_KEY = os.getenv("PASSWORD_SECRET_KEY")
+SECRET_KEY = os.getenv("PASSWORD_SECRET_KEY") or settings.embedded_secret("PASSWORD_SECRET_KEY")
 if not SECRET_KEY:
     raise RuntimeError("PASSWORD_SECRET_KEY не задан в .env")
 
 
-PASSWORD_SECRET_KEY = os.getenv("PASSWORD_SECRET_KEY")
+PASSWORD_SECRET_KEY = os.getenv("PASSWORD_SECRET_KEY") or settings.embedded_secret("PASSWORD_SECRET_KEY")
 
 if not PASSWORD_SECRET_KEY:
     raise RuntimeError("PASSWORD_SECRET_KEY не задан в .env")
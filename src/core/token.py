@@ -3,13 +3,12 @@ import logging
 from typing import Dict, Any, Optional
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-import pandas as pd
-from sqlalchemy import select
 
 from src.core.configuration.config import settings
 from src.utils import jwt_utils
-from src.models.user_models import User, Role, RolePermissions, Permission, UserRoles
-from src.session import db_manager
+from src.db_clients import statements
+from src.db_clients.workloads import Workload
+from src.session import db_manager, request_user_id
 
 
 logger = logging.getLogger(__name__)
@@ -30,33 +29,25 @@ class JWTTokenValidator:
                 logger.warning("Missing 'sub' in access token")
                 raise HTTPException(status_code=401, detail="Invalid token")
 
-            async with db_manager.get_db_session() as session:
+            async with db_manager.get_db_session(Workload.AUTH) as session:
                 try:
                     user_id = int(user_id_str)
                 except ValueError:
                     logger.warning(f"Invalid user ID '{user_id_str}' in access token")
                     raise HTTPException(status_code=401, detail="Invalid token")
+                request_user_id.set(user_id)
 
-                result = await session.execute(select(User).where(User.id == user_id))
+                result = await session.execute(statements.PRINCIPAL_BY_ID, {"user_id": user_id})
                 user_obj = result.scalar_one_or_none()
 
                 if not user_obj:
                     logger.warning(f"User with ID {user_id} not found")
                     raise HTTPException(status_code=401, detail="User not found")
 
-                await session.refresh(user_obj, ["role"])
-
                 payload["role"] = [user_obj.role]
 
 
-                permissions_query = (
-                    select(Permission.code)
-                    .join(RolePermissions, Permission.id == RolePermissions.c.permission_id)
-                    .join(Role, Role.id == RolePermissions.c.role_id)
-                    .join(UserRoles, UserRoles.c.role_id == Role.id)
-                    .where(UserRoles.c.user_id == user_id)
-                )
-                permissions_result = await session.execute(permissions_query)
+                permissions_result = await session.execute(statements.PRINCIPAL_PERMISSIONS, {"user_id": user_id})
                 payload["permissions"] = [row[0] for row in permissions_result.fetchall()]
 
             logger.info(f"JWT access token validated and data fetched for user_id={payload['sub']}")
@@ -0,0 +1,91 @@
+# src/db_clients/circuit_breaker.py
+import asyncio
+import math
+import time
+from logging import getLogger
+
+from fastapi import HTTPException, status
+from sqlalchemy import exc as sa_exc
+
+logger = getLogger(__name__)
+
+# Ошибки, говорящие о недоступности БД, а не о неверном запросе:
+# нет соединения, истёк таймаут пула, подключения или запроса
+DB_UNAVAILABLE_ERRORS = (
+    sa_exc.OperationalError,
+    sa_exc.InterfaceError,
+    sa_exc.TimeoutError,
+    asyncio.TimeoutError,
+    OSError,
+)
+
+
+class DatabaseUnavailable(HTTPException):
+    """503 без обращения к БД: открыт предохранитель или истёк срок обработки запроса."""
+
+    def __init__(self, detail: str, retry_after: float | None = None):
+        headers = {"Retry-After": str(max(1, math.ceil(retry_after)))} if retry_after else None
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail, headers=headers)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для обращений к БД.
+
+    closed    — запросы идут в БД; failure_threshold ошибок подряд размыкают предохранитель;
+    open      — reset_timeout секунд запросы сразу получают 503, не занимая пул и не ожидая таймаутов;
+    half_open — пропускается не больше half_open_probes пробных запросов: успех замыкает
+                предохранитель, ошибка снова размыкает его.
+    Состояние хранится в памяти процесса, у каждого воркера своё.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, half_open_probes: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+
+    def before_call(self) -> None:
+        if self.state == self.OPEN:
+            retry_after = self.opened_at + self.reset_timeout - time.monotonic()
+            if retry_after > 0:
+                raise DatabaseUnavailable("База данных временно недоступна", retry_after)
+            self.state = self.HALF_OPEN
+            self._probes = 0
+            logger.info(f"Предохранитель {self.name}: пробные запросы к БД")
+
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                raise DatabaseUnavailable("База данных временно недоступна", self.reset_timeout)
+            self._probes += 1
+
+    def release_probe(self) -> None:
+        """Вызов завершился, ничего не узнав о БД: пробный запрос полуоткрытого предохранителя возвращается."""
+        if self.state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"Предохранитель {self.name} замкнут: БД снова отвечает")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self, error: BaseException) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.error(f"Предохранитель {self.name} разомкнут после {self.failures} ошибок: {error!r}")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "failures": self.failures}
@@ -1,14 +1,229 @@
 # src/db_clients/clients.py
+"""
+Синхронный клиент Postgres (psycopg2) для скриптов и пакетных задач.
+
+Соединения берутся из потокобезопасного пула процесса:
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(...)
+
+На выходе из блока транзакция фиксируется (или откатывается при исключении),
+а соединение возвращается в пул, а не закрывается. get_db_connection() по-прежнему
+открывает отдельное соединение без пула, которое закрывает вызывающий. Размер пула, таймауты и
+время жизни соединения задаются в DBConfig (DB_SYNC_POOL_*, DB_POOL_TIMEOUT,
+DB_POOL_RECYCLE, DB_CONNECT_TIMEOUT).
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from logging import getLogger
+
 import psycopg2
+from psycopg2 import extensions
+
 from src.db_clients.config import DBConfig
 
+logger = getLogger(__name__)
+
 config = DBConfig()
 
+
+@dataclass
+class _PooledConnection:
+    conn: "extensions.connection"
+    created_at: float = field(default_factory=time.monotonic)
+    released_at: float = field(default_factory=time.monotonic)
+
+
+class SyncConnectionPool:
+    """
+    Пул соединений psycopg2 с ограничением размера.
+
+    Если все max_size соединений заняты, поток ждёт освобождения не дольше
+    wait_timeout секунд. Соединения, простоявшие дольше idle_timeout или
+    прожившие дольше max_lifetime, закрываются; простоявшие дольше check_after
+    проверяются запросом SELECT 1 перед выдачей.
+    """
+
+    def __init__(
+        self,
+        db_config: DBConfig,
+        max_size: int,
+        idle_timeout: float,
+        check_after: float,
+        wait_timeout: float,
+        max_lifetime: float,
+    ):
+        self.db_config = db_config
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.wait_timeout = wait_timeout
+        self.max_lifetime = max_lifetime
+
+        self._idle: deque[_PooledConnection] = deque()
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._pid = os.getpid()
+
+    def _connect(self) -> _PooledConnection:
+        conn = psycopg2.connect(
+            dbname=self.db_config.DB_NAME,
+            user=self.db_config.DB_USER,
+            password=self.db_config.DB_PASSWORD,
+            host=self.db_config.DB_HOST,
+            port=self.db_config.DB_PORT,
+            connect_timeout=max(1, int(self.db_config.DB_CONNECT_TIMEOUT)),
+        )
+        return _PooledConnection(conn)
+
+    @staticmethod
+    def _close(item: _PooledConnection) -> None:
+        try:
+            item.conn.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, item: _PooledConnection, now: float) -> bool:
+        if item.conn.closed or now - item.created_at > self.max_lifetime:
+            return False
+        if now - item.released_at <= self.check_after:
+            return True
+        try:
+            with item.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            item.conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Соединение из пула не прошло проверку: {e}")
+            return False
+
+    def _reset_after_fork(self) -> None:
+        # Соединения родительского процесса нельзя использовать в дочернем
+        if self._pid != os.getpid():
+            self._idle.clear()
+            self._in_use = 0
+            self._pid = os.getpid()
+
+    def _acquire(self) -> _PooledConnection:
+        deadline = time.monotonic() + self.wait_timeout
+        expired = []
+        try:
+            with self._cond:
+                self._reset_after_fork()
+                expired = self._prune_idle(time.monotonic())
+                while True:
+                    if self._idle:
+                        item = self._idle.pop()
+                        self._in_use += 1
+                        break
+                    if self._in_use < self.max_size:
+                        self._in_use += 1
+                        item = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"Нет свободных соединений в пуле за {self.wait_timeout} с (max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+        finally:
+            self._close_all(expired)
+
+        # Проверка и подключение выполняются вне блокировки, чтобы не задерживать другие потоки
+        try:
+            if item is not None and not self._is_usable(item, time.monotonic()):
+                self._close(item)
+                item = None
+            if item is None:
+                item = self._connect()
+            return item
+        except Exception:
+            self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+    def _release(self, item: _PooledConnection, broken: bool) -> None:
+        if not broken and item.conn.closed == 0 and \
+                item.conn.get_transaction_status() == extensions.TRANSACTION_STATUS_IDLE:
+            item.released_at = time.monotonic()
+            with self._cond:
+                self._in_use -= 1
+                self._idle.append(item)
+                expired = self._prune_idle(item.released_at)
+                self._cond.notify()
+            self._close_all(expired)
+            return
+        self._close(item)
+        self._release_slot()
+
+    def _prune_idle(self, now: float) -> list[_PooledConnection]:
+        """
+        Убирает из пула соединения, простоявшие дольше idle_timeout. Вызывается под блокировкой,
+        а закрывает их вызывающий после неё: закрытие сокета не должно задерживать другие потоки.
+        """
+        expired = []
+        # Самые давно освобождённые соединения лежат слева
+        while self._idle and now - self._idle[0].released_at > self.idle_timeout:
+            expired.append(self._idle.popleft())
+        return expired
+
+    def _close_all(self, items: list[_PooledConnection]) -> None:
+        for item in items:
+            self._close(item)
+
+    @contextmanager
+    def connection(self):
+        item = self._acquire()
+        broken = False
+        try:
+            with item.conn:
+                yield item.conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self._release(item, broken)
+
+    def close(self) -> None:
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        self._close_all(idle)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {"max_size": self.max_size, "in_use": self._in_use, "idle": len(self._idle)}
+
+
+sync_pool = SyncConnectionPool(
+    config,
+    max_size=config.DB_SYNC_POOL_MAX_SIZE,
+    idle_timeout=config.DB_SYNC_POOL_IDLE_TIMEOUT,
+    check_after=config.DB_SYNC_POOL_CHECK_AFTER,
+    wait_timeout=config.DB_POOL_TIMEOUT,
+    max_lifetime=config.DB_POOL_RECYCLE,
+)
+
+
+def pooled_connection():
+    """Соединение из пула как контекстный менеджер: `with pooled_connection() as conn: ...`."""
+    return sync_pool.connection()
+
+
 def get_db_connection():
+    """Отдельное соединение psycopg2 без пула; закрывает его вызывающий."""
     return psycopg2.connect(
         dbname=config.DB_NAME,
         user=config.DB_USER,
         password=config.DB_PASSWORD,
         host=config.DB_HOST,
         port=config.DB_PORT,
-    )
\ No newline at end of file
+    )
@@ -1,4 +1,7 @@
 # src/db_clients/config.py
+import os
+import tempfile
+
 from environs import Env
 
 
@@ -10,23 +13,25 @@ class DBConfig:
 
         self.DEV_MODE = env.bool("DEV_MODE", True)
 
-        _DEV = {
-            "DB_NAME": env.str("PG_DB_DEV"),
-            "DB_USER": env.str("PG_USER_DEV"),
-            "DB_PASSWORD": env.str("PG_PASSWORD_DEV"),
-            "DB_HOST": env.str("PG_HOST_DEV"),
-            "DB_PORT": env.int("PG_PORT_DEV"),
-        }
-
-        _PROD = {
-            "DB_NAME": env.str("PG_DB_PROD"),
-            "DB_USER": env.str("PG_USER_PROD"),
-            "DB_PASSWORD": env.str("PG_PASSWORD_PROD"),
-            "DB_HOST": env.str("PG_HOST_PROD"),
-            "DB_PORT": env.int("PG_PORT_PROD"),
-        }
-
-        active = _DEV if self.DEV_MODE else _PROD
+        # APP_MODE=embedded: SQLite-файл процесса вместо Postgres, переменные PG_* не нужны
+        self.APP_MODE = env.str("APP_MODE", "server")  # server | embedded
+        self.EMBEDDED = self.APP_MODE == "embedded"
+        # Пусто — временный файл, который удаляется при остановке приложения;
+        # путь к файлу — база сохраняется между запусками
+        self.DB_EMBEDDED_PATH = env.str("DB_EMBEDDED_PATH", "")
+
+        if self.EMBEDDED:
+            active = {"DB_NAME": "", "DB_USER": "", "DB_PASSWORD": "", "DB_HOST": "", "DB_PORT": 0}
+        else:
+            # Обязательны переменные только активного окружения: PG_*_DEV или PG_*_PROD
+            suffix = "DEV" if self.DEV_MODE else "PROD"
+            active = {
+                "DB_NAME": env.str(f"PG_DB_{suffix}"),
+                "DB_USER": env.str(f"PG_USER_{suffix}"),
+                "DB_PASSWORD": env.str(f"PG_PASSWORD_{suffix}"),
+                "DB_HOST": env.str(f"PG_HOST_{suffix}"),
+                "DB_PORT": env.int(f"PG_PORT_{suffix}"),
+            }
 
         self.DB_NAME = active["DB_NAME"]
         self.DB_USER = active["DB_USER"]
@@ -34,11 +39,129 @@ class DBConfig:
         self.DB_HOST = active["DB_HOST"]
         self.DB_PORT = active["DB_PORT"]
 
+        # Пул соединений считается на процесс: итоговое число соединений к primary —
+        # WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW), оно должно укладываться в max_connections.
+        # Пулы классов нагрузки (DB_WORKLOAD_POOLS) входят в этот бюджет, общему пулу достаётся остаток
+        self.DB_POOL_SIZE = env.int("DB_POOL_SIZE", 5)
+        self.DB_MAX_OVERFLOW = env.int("DB_MAX_OVERFLOW", 10)
+        self.DB_POOL_TIMEOUT = env.float("DB_POOL_TIMEOUT", 30.0)
+        self.DB_POOL_RECYCLE = env.int("DB_POOL_RECYCLE", 1800)
+        self.DB_CONNECT_TIMEOUT = env.float("DB_CONNECT_TIMEOUT", 5.0)
+        self.DB_STATEMENT_CACHE_SIZE = env.int("DB_STATEMENT_CACHE_SIZE", 100)
+        # Кеш prepared statements диалекта asyncpg и кеш компиляции SQLAlchemy
+        self.DB_PREPARED_STATEMENT_CACHE_SIZE = env.int("DB_PREPARED_STATEMENT_CACHE_SIZE", 256)
+        self.DB_QUERY_CACHE_SIZE = env.int("DB_QUERY_CACHE_SIZE", 1000)
+
+        # Пул синхронного клиента psycopg2 (src/db_clients/clients.py) для скриптов и пакетных задач;
+        # ожидание свободного соединения и время жизни — DB_POOL_TIMEOUT и DB_POOL_RECYCLE
+        self.DB_SYNC_POOL_MAX_SIZE = env.int("DB_SYNC_POOL_MAX_SIZE", 4)
+        self.DB_SYNC_POOL_IDLE_TIMEOUT = env.float("DB_SYNC_POOL_IDLE_TIMEOUT", 300.0)
+        # Соединение, простоявшее дольше этого времени, проверяется SELECT 1 перед выдачей
+        self.DB_SYNC_POOL_CHECK_AFTER = env.float("DB_SYNC_POOL_CHECK_AFTER", 30.0)
+
+        # Таймауты: statement_timeout соединения по умолчанию, клиентский таймаут asyncpg на команду
+        # (страховка от зависшей сети) и дедлайн HTTP-запроса. У пулов auth/read/write statement_timeout
+        # не больше дедлайна; ближе к дедлайну он сужается в транзакции (src/session.py)
+        self.DB_STATEMENT_TIMEOUT = env.float("DB_STATEMENT_TIMEOUT", 30.0)
+        self.DB_COMMAND_TIMEOUT = env.float("DB_COMMAND_TIMEOUT", 60.0)
+        self.DB_REQUEST_DEADLINE = env.float("DB_REQUEST_DEADLINE", 10.0)
+
+        # Отдельные пулы primary по классам нагрузки (bulkheads, src/db_clients/workloads.py):
+        # "класс=размер:ожидание_с" через запятую. Пул класса не растёт сверх размера, а исчерпав его,
+        # запрос через "ожидание" секунд получает 503, не занимая соединений других классов.
+        # Сумма размеров вычитается из DB_POOL_SIZE + DB_MAX_OVERFLOW (get_general_pool_limits)
+        self.DB_WORKLOAD_POOLS = env.dict(
+            "DB_WORKLOAD_POOLS", {"auth": "2:2", "read": "4:5", "write": "4:10", "background": "1:30"}
+        )
+
+        # Предохранитель primary (src/db_clients/circuit_breaker.py)
+        self.DB_BREAKER_FAILURE_THRESHOLD = env.int("DB_BREAKER_FAILURE_THRESHOLD", 5)
+        self.DB_BREAKER_RESET_TIMEOUT = env.float("DB_BREAKER_RESET_TIMEOUT", 10.0)
+        self.DB_BREAKER_HALF_OPEN_PROBES = env.int("DB_BREAKER_HALF_OPEN_PROBES", 1)
+
+        # Учёт запросов: порог медленного запроса и снятие его плана через EXPLAIN
+        self.DB_SLOW_QUERY_MS = env.float("DB_SLOW_QUERY_MS", 500.0)
+        self.DB_EXPLAIN_SLOW_QUERIES = env.bool("DB_EXPLAIN_SLOW_QUERIES", True)
+
+        # Строгая загрузка связей ORM (src/db_clients/strict_loading.py), включается в тестах и разработке
+        self.DB_STRICT_LOADING = env.bool("DB_STRICT_LOADING", False)
+
+        # Read-реплики: список "host:port" через запятую, учётные данные и база — как у primary
+        self.DB_REPLICA_HOSTS = env.list("DB_REPLICA_HOSTS", [])
+        self.DB_REPLICA_MAX_LAG = env.float("DB_REPLICA_MAX_LAG", 5.0)
+        self.DB_REPLICA_CHECK_INTERVAL = env.float("DB_REPLICA_CHECK_INTERVAL", 5.0)
+        self.DB_REPLICA_CHECK_TIMEOUT = env.float("DB_REPLICA_CHECK_TIMEOUT", 2.0)
+        # Сколько секунд после записи чтения пользователя идут в primary (read-your-writes)
+        self.DB_READ_STICKY_SECONDS = env.float("DB_READ_STICKY_SECONDS", 5.0)
+        # Где хранятся отметки о записях (src/db_clients/recent_writes.py): shm — общие для воркеров хоста
+        self.DB_READ_STICKY_BACKEND = env.str("DB_READ_STICKY_BACKEND", "memory" if self.EMBEDDED else "shm")  # shm | memory
+        self.DB_READ_STICKY_SLOTS = env.int("DB_READ_STICKY_SLOTS", 65536)
+        self.DB_READ_STICKY_SHM_NAME = env.str(
+            "DB_READ_STICKY_SHM_NAME", f"{env.str('SERVICE_NAME', 'db_template')}_recent_writes"
+        )
+
+        # Шарды с данными пользователей: "имя=host:port" через запятую, учётные данные и база — как у primary.
+        # Основная БД — шард "main"; в какой шард попадает пользователь, хранит таблица user_shards
+        self.DB_SHARDS = env.dict("DB_SHARDS", {})
+        self.DB_SHARD_MAP_CACHE_TTL = env.float("DB_SHARD_MAP_CACHE_TTL", 30.0)
+        # Шаг диапазонов id шардов: последовательности шарда с номером N начинаются с N * DB_SHARD_ID_RANGE
+        self.DB_SHARD_ID_RANGE = env.int("DB_SHARD_ID_RANGE", 100_000_000)
+
+    def embedded_path(self) -> str:
+        return self.DB_EMBEDDED_PATH or os.path.join(tempfile.gettempdir(), f"db_template-embedded-{os.getpid()}.sqlite3")
+
     def url(self):
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
     
-    def get_async_url(self):
-        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+    def get_async_url(self, host: str | None = None, port: int | None = None):
+        if self.EMBEDDED:
+            return f"sqlite+aiosqlite:///{self.embedded_path()}"
+        return (
+            f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}"
+            f"@{host or self.DB_HOST}:{port or self.DB_PORT}/{self.DB_NAME}"
+            f"?prepared_statement_cache_size={self.DB_PREPARED_STATEMENT_CACHE_SIZE}"
+        )
+
+    def _host_port_url(self, item: str) -> str:
+        host, _, port = item.strip().partition(":")
+        return self.get_async_url(host=host, port=int(port) if port else None)
+
+    def get_shard_async_urls(self) -> dict[str, str]:
+        # Во встроенном режиме одна база: без реплик и шардов
+        if self.EMBEDDED:
+            return {}
+        return {name.strip(): self._host_port_url(item) for name, item in self.DB_SHARDS.items()}
+
+    def get_workload_pools(self) -> dict[str, tuple[int, float]]:
+        """{класс: (размер пула, ожидание соединения)}; во встроенном режиме один общий пул."""
+        if self.EMBEDDED:
+            return {}
+        pools = {}
+        for name, item in self.DB_WORKLOAD_POOLS.items():
+            size, _, timeout = item.strip().partition(":")
+            pools[name.strip()] = (int(size), float(timeout) if timeout else self.DB_POOL_TIMEOUT)
+        return pools
+
+    def get_general_pool_limits(self, workload_connections: int) -> tuple[int, int]:
+        """
+        (pool_size, max_overflow) общего пула primary, когда workload_connections соединений
+        воркера уже отданы пулам классов нагрузки.
+        """
+        if not workload_connections:
+            return self.DB_POOL_SIZE, self.DB_MAX_OVERFLOW
+        left = self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW - workload_connections
+        if left < 1:
+            raise ValueError(
+                f"DB_WORKLOAD_POOLS ({workload_connections} соединений) не оставляют общему пулу ни одного "
+                f"соединения из DB_POOL_SIZE + DB_MAX_OVERFLOW ({self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW})"
+            )
+        pool_size = min(self.DB_POOL_SIZE, left)
+        return pool_size, left - pool_size
+
+    def get_replica_async_urls(self) -> list[str]:
+        if self.EMBEDDED:
+            return []
+        return [self._host_port_url(item) for item in self.DB_REPLICA_HOSTS]
 
 
 class TablesConfig:
@@ -53,6 +176,12 @@ class TablesConfig:
         self.PERMISSIONS = "permissions"
         self.ROLE_PERMISSIONS = "role_permissions"
         self.USER_ROLES = "user_roles"
+        self.EMAIL_OUTBOX = "email_outbox"
+        self.VERIFICATION_CODES = "verification_codes"
+        self.CARS_ARCHIVE = "cars_archive"
+        self.CAR_RECORDS_ARCHIVE = "car_records_archive"
+        self.CAR_RECORDS_IMAGES_ARCHIVE = "car_records_images_archive"
+        self.USER_SHARDS = "user_shards"
 
 
 class RolesConfig:
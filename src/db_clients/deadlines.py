@@ -0,0 +1,30 @@
+# src/db_clients/deadlines.py
+import time
+from contextvars import ContextVar
+
+from fastapi import Request
+
+from src.db_clients.config import db_settings
+
+# Момент (time.monotonic), к которому обработка текущего HTTP-запроса должна закончиться
+request_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def remaining() -> float | None:
+    """Сколько секунд осталось до дедлайна запроса; None вне HTTP-запроса."""
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+async def deadline_middleware(request: Request, call_next):
+    """
+    Дедлайн запроса: DB_REQUEST_DEADLINE секунд с момента получения.
+
+    Оставшееся время ограничивает ожидание соединения из пула и переходит
+    в statement_timeout транзакций, открытых при обработке запроса (src/session.py).
+    """
+    token = request_deadline.set(time.monotonic() + db_settings.db.DB_REQUEST_DEADLINE)
+    try:
+        return await call_next(request)
+    finally:
+        request_deadline.reset(token)
@@ -0,0 +1,98 @@
+# src/db_clients/embedded.py
+"""
+Встроенный режим (APP_MODE=embedded): приложение и бенчмарки работают без Postgres,
+S3 и SMTP — база в SQLite-файле процесса (aiosqlite), S3 и SMTP в памяти.
+
+Схема создаётся по моделям (create_all), а не миграциями: миграции используют
+возможности Postgres (секционирование, CONCURRENTLY, UNLOGGED). Для SQLite здесь же
+переопределена генерация DDL, которая без этого не выполнилась бы:
+  - UNLOGGED в CREATE TABLE опускается;
+  - id из последовательности в составном первичном ключе (car_records: id + user_id_owner)
+    становится INTEGER PRIMARY KEY, то есть rowid с автоинкрементом, а составной ключ —
+    уникальным ограничением, на которое ссылается внешний ключ изображений.
+Частичные индексы postgresql_where и секционирование на SQLite игнорируются самой SQLAlchemy.
+"""
+import os
+from logging import getLogger
+
+from sqlalchemy import PrimaryKeyConstraint, Sequence, func, insert, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+from src.db_clients.config import RolesConfig, db_settings
+from src.models.base_model import ORMBase
+
+logger = getLogger(__name__)
+
+
+def _is_sequence_id_in_composite_key(column) -> bool:
+    return isinstance(column.default, Sequence) and len(column.table.primary_key.columns) > 1
+
+
+@compiles(CreateTable, "sqlite")
+def _create_table_sqlite(create, compiler, **kw):
+    return compiler.visit_create_table(create, **kw).replace("CREATE UNLOGGED TABLE", "CREATE TABLE", 1)
+
+
+@compiles(CreateColumn, "sqlite")
+def _create_column_sqlite(create, compiler, **kw):
+    column = create.element
+    if _is_sequence_id_in_composite_key(column):
+        return f"{compiler.preparer.format_column(column)} INTEGER PRIMARY KEY"
+    return compiler.visit_create_column(create, **kw)
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _primary_key_sqlite(constraint, compiler, **kw):
+    if any(_is_sequence_id_in_composite_key(column) for column in constraint.columns):
+        columns = ", ".join(compiler.preparer.format_column(column) for column in constraint.columns)
+        return f"UNIQUE ({columns})"
+    return compiler.visit_primary_key_constraint(constraint, **kw)
+
+
+def _import_models() -> None:
+    # Все таблицы должны быть в metadata до create_all
+    from src.models import (  # noqa: F401
+        archive_models,
+        email_models,
+        organization_models,
+        shard_models,
+        user_models,
+        verification_models,
+    )
+
+
+def default_roles() -> list[dict]:
+    # Новые пользователи получают role_id=2 (src/services/create_org_and_superuser.py)
+    roles = RolesConfig()
+    return [
+        {"id": 1, "name": roles.SUPERUSER},
+        {"id": 2, "name": roles.USER},
+        {"id": 3, "name": roles.ADMIN},
+    ]
+
+
+async def create_schema(engine) -> None:
+    """
+    Создаёт недостающие таблицы встроенной базы и справочник ролей, который на Postgres
+    заполняется вручную; на существующей базе ничего не меняет.
+    """
+    _import_models()
+    from src.models.user_models import Role
+
+    async with engine.begin() as conn:
+        await conn.run_sync(ORMBase.metadata.create_all)
+        if not (await conn.execute(select(func.count()).select_from(Role))).scalar_one():
+            await conn.execute(insert(Role), default_roles())
+    logger.info(f"Встроенная база готова: {db_settings.db.embedded_path()}")
+
+
+def remove_database() -> None:
+    """Удаляет временный файл базы; файл из DB_EMBEDDED_PATH остаётся."""
+    if db_settings.db.DB_EMBEDDED_PATH:
+        return
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        try:
+            os.remove(db_settings.db.embedded_path() + suffix)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,90 @@
+# src/db_clients/pool_metrics.py
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging import getLogger
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = getLogger(__name__)
+
+
+class PoolMetrics:
+    """
+    Статистика пула соединений одного процесса (воркера uvicorn).
+
+    Занятость пула берётся из самого пула, счётчики соединений — из событий пула,
+    время ожидания соединения и ошибки выдачи замеряет DBManager.get_db_session.
+    """
+
+    def __init__(self, engine: AsyncEngine, name: str = "primary", samples: int = 1024):
+        self.engine = engine
+        self.name = name
+        self.connects = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.invalidations = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits: deque[float] = deque(maxlen=samples)
+
+        sync_pool = engine.sync_engine.pool
+        event.listen(sync_pool, "connect", self._on_connect)
+        event.listen(sync_pool, "checkout", self._on_checkout)
+        event.listen(sync_pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    @contextmanager
+    def measure_wait(self):
+        """Замеряет ожидание соединения; исключение внутри блока считается ошибкой выдачи."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.checkout_failures += 1
+            logger.error(f"Не удалось получить соединение из пула {self.name}: {e}")
+            raise
+        waited = time.perf_counter() - started
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self._waits.append(waited)
+
+    def _percentile(self, q: float) -> float:
+        if not self._waits:
+            return 0.0
+        ordered = sorted(self._waits)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        pool = self.engine.sync_engine.pool
+        return {
+            "pool": self.name,
+            "pid": os.getpid(),
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": getattr(pool, "_max_overflow", 0),
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "invalidations": self.invalidations,
+            "wait_seconds": {
+                "total": round(self.wait_total, 6),
+                "max": round(self.wait_max, 6),
+                "p50": round(self._percentile(0.5), 6),
+                "p95": round(self._percentile(0.95), 6),
+                "p99": round(self._percentile(0.99), 6),
+            },
+        }
+
@@ -0,0 +1,135 @@
+# src/db_clients/query_stats.py
+import asyncio
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from logging import getLogger
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.db_clients.config import db_settings
+
+logger = getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize_sql(statement: str) -> str:
+    """SQL без литералов и лишних пробелов — для группировки одинаковых запросов в логах."""
+    return _LITERALS.sub("?", _WHITESPACE.sub(" ", statement)).strip()
+
+
+@dataclass
+class RequestQueryStats:
+    count: int = 0
+    total: float = 0.0
+    slowest: float = 0.0
+    slowest_sql: str | None = None
+
+    def observe(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        if duration > self.slowest:
+            self.slowest = duration
+            self.slowest_sql = statement
+
+
+_request_stats: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+# Когда последний раз снимался план для нормализованного запроса: не чаще раза в EXPLAIN_COOLDOWN
+_explained_at: dict[str, float] = {}
+EXPLAIN_COOLDOWN = 600.0
+
+
+async def _log_explain(engine: AsyncEngine, statement: str, parameters, normalized: str) -> None:
+    try:
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            rows = await raw.driver_connection.fetch(f"EXPLAIN {statement}", *(parameters or ()))
+        plan = "\n".join(row[0] for row in rows)
+        logger.warning(f"План медленного запроса: {normalized}\n{plan}")
+    except Exception as e:
+        logger.warning(f"Не удалось получить план медленного запроса {normalized}: {e}")
+
+
+def _schedule_explain(engine: AsyncEngine, statement: str, parameters, normalized: str) -> None:
+    if engine.dialect.name != "postgresql" or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return
+    now = time.monotonic()
+    if now - _explained_at.get(normalized, -EXPLAIN_COOLDOWN) < EXPLAIN_COOLDOWN:
+        return
+    _explained_at[normalized] = now
+    try:
+        asyncio.get_running_loop().create_task(_log_explain(engine, statement, parameters, normalized))
+    except RuntimeError:
+        pass
+
+
+def attach_query_stats(engine: AsyncEngine) -> None:
+    """Подписывает движок на учёт запросов: статистика запроса HTTP и лог медленных запросов."""
+    config = db_settings.db
+    slow_threshold = config.DB_SLOW_QUERY_MS / 1000
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Начало хранится в контексте выполнения: он у каждого запроса свой и пропадает вместе
+        # с ним, даже если запрос упал. Без контекста (служебные запросы диалекта) время не считается
+        if context is not None:
+            context.query_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "query_started", None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.observe(statement, duration)
+
+        if duration >= slow_threshold:
+            normalized = normalize_sql(statement)
+            logger.warning(f"Медленный запрос {duration * 1000:.1f}ms: {normalized}")
+            if config.DB_EXPLAIN_SLOW_QUERIES and not executemany:
+                _schedule_explain(engine, statement, parameters, normalized)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        # Упавший запрос (например, по statement_timeout) тоже занимал базу — он попадает в статистику
+        started = getattr(exception_context.execution_context, "query_started", None)
+        stats = _request_stats.get()
+        if started is not None and stats is not None:
+            stats.observe(exception_context.statement, time.perf_counter() - started)
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """
+    Считает SQL-запросы, выполненные при обработке HTTP-запроса.
+
+    Итог отдаётся в заголовке Server-Timing (видно во вкладке Network браузера)
+    и пишется в лог одной строкой вида key=value.
+    """
+    stats = RequestQueryStats()
+    token = _request_stats.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _request_stats.reset(token)
+    elapsed = time.perf_counter() - started
+
+    response.headers.append(
+        "Server-Timing",
+        f'db;dur={stats.total * 1000:.1f};desc="{stats.count} queries", app;dur={elapsed * 1000:.1f}',
+    )
+    if stats.count:
+        logger.info(
+            f"db_stats method={request.method} path={request.url.path} status={response.status_code} "
+            f"queries={stats.count} db_ms={stats.total * 1000:.1f} total_ms={elapsed * 1000:.1f} "
+            f"slowest_ms={stats.slowest * 1000:.1f} slowest_sql=\"{normalize_sql(stats.slowest_sql or '')}\""
+        )
+    return response
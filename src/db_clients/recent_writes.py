@@ -0,0 +1,125 @@
+# src/db_clients/recent_writes.py
+"""
+Отметки о недавних записях пользователей для read-your-writes (src/session.py, get_read_session).
+
+Отметка — момент (time.time()), до которого чтения пользователя идут в primary. Запись
+и следующее чтение могут попасть в разные воркеры uvicorn, поэтому на сервере отметки
+лежат в разделяемой памяти хоста, как бакеты rate limit (src/core/rate_limit.py).
+Между хостами отметки не делятся: за балансировщиком без привязки клиента к хосту
+чтение сразу после записи может уйти на реплику.
+"""
+import os
+import struct
+import tempfile
+import time
+from abc import ABC, abstractmethod
+
+
+class RecentWrites(ABC):
+    @abstractmethod
+    def mark(self, user_id: int, until: float) -> None:
+        """Чтения пользователя идут в primary до момента until."""
+
+    @abstractmethod
+    def until(self, user_id: int) -> float:
+        """До какого момента чтения пользователя идут в primary; 0 — отметки нет."""
+
+    def is_sticky(self, user_id: int, now: float | None = None) -> bool:
+        return self.until(user_id) > (time.time() if now is None else now)
+
+
+class InMemoryRecentWrites(RecentWrites):
+    """Отметки в памяти процесса: видны только воркеру, который выполнил запись."""
+
+    _MAX_USERS = 10_000
+
+    def __init__(self):
+        self._until: dict[int, float] = {}
+
+    def mark(self, user_id: int, until: float) -> None:
+        self._until[user_id] = until
+        if len(self._until) > self._MAX_USERS:
+            now = time.time()
+            self._until = {uid: value for uid, value in self._until.items() if value > now}
+
+    def until(self, user_id: int) -> float:
+        return self._until.get(user_id, 0.0)
+
+
+class SharedMemoryRecentWrites(RecentWrites):
+    """
+    Отметки в сегменте разделяемой памяти, общем для всех воркеров на хосте.
+
+    Сегмент — хеш-таблица фиксированного размера с открытой адресацией: слот = (user_id, until).
+    Слоты не освобождаются, а переиспользуются, когда отметка истекла; если в окне
+    пробирования все отметки действующие, вытесняется та, что истекает раньше всех.
+    Доступ сериализуется flock на файле рядом с сегментом.
+    """
+
+    _SLOT = struct.Struct("<Qd")
+    _PROBES = 16
+
+    def __init__(self, name: str, slots: int):
+        from multiprocessing import shared_memory
+
+        self.slots = slots
+        size = slots * self._SLOT.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size, track=False)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        if self._shm.size < size:
+            raise RuntimeError(f"Сегмент {name} меньше ожидаемого ({self._shm.size} < {size})")
+
+        self._lock_fd = os.open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _offsets(self, user_id: int):
+        # Мультипликативный хеш: последовательные id не ложатся в соседние слоты
+        start = (user_id * 0x9E3779B97F4A7C15) % (1 << 64)
+        for probe in range(self._PROBES):
+            yield ((start + probe) % self.slots) * self._SLOT.size
+
+    def mark(self, user_id: int, until: float) -> None:
+        import fcntl
+
+        buf = self._shm.buf
+        now = time.time()
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            free, victim, victim_until = None, None, None
+            for offset in self._offsets(user_id):
+                slot_user, slot_until = self._SLOT.unpack_from(buf, offset)
+                if slot_user == user_id:
+                    free = offset
+                    break
+                if free is None and (slot_user == 0 or slot_until <= now):
+                    free = offset
+                if victim_until is None or slot_until < victim_until:
+                    victim, victim_until = offset, slot_until
+            self._SLOT.pack_into(buf, victim if free is None else free, user_id, until)
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def until(self, user_id: int) -> float:
+        import fcntl
+
+        buf = self._shm.buf
+        fcntl.flock(self._lock_fd, fcntl.LOCK_SH)
+        try:
+            for offset in self._offsets(user_id):
+                slot_user, slot_until = self._SLOT.unpack_from(buf, offset)
+                if slot_user == user_id:
+                    return slot_until
+                if slot_user == 0:
+                    return 0.0
+            return 0.0
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+
+def create_recent_writes(backend: str, name: str, slots: int) -> RecentWrites:
+    if backend == "shm":
+        return SharedMemoryRecentWrites(name=name, slots=slots)
+    if backend == "memory":
+        return InMemoryRecentWrites()
+    raise ValueError(f"Неизвестный DB_READ_STICKY_BACKEND: {backend}")
@@ -0,0 +1,99 @@
+# src/db_clients/replicas.py
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from logging import getLogger
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from src.db_clients.pool_metrics import PoolMetrics
+
+logger = getLogger(__name__)
+
+# Отставание реплики в секундах; 0, если всё полученное WAL уже применено
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: AsyncEngine
+    session_factory: async_sessionmaker
+    pool_metrics: PoolMetrics
+    healthy: bool = True
+    lag: float = 0.0
+    last_error: str | None = field(default=None, repr=False)
+
+    def mark_unhealthy(self, error: Exception) -> None:
+        if self.healthy:
+            logger.warning(f"Реплика {self.name} исключена из чтения: {error}")
+        self.healthy = False
+        self.last_error = f"{type(error).__name__}: {error}"
+
+
+class ReplicaSet:
+    """
+    Набор read-реплик с проверкой состояния.
+
+    Реплика участвует в чтении, пока отвечает на проверку и отстаёт не больше max_lag секунд.
+    Среди здоровых реплик запросы распределяются по кругу.
+    """
+
+    def __init__(self, replicas: list[Replica], max_lag: float, check_timeout: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_timeout = check_timeout
+        self._round_robin = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Replica | None:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with replica.engine.connect() as conn:
+                    lag = float((await conn.execute(REPLICA_LAG_QUERY)).scalar() or 0)
+        except Exception as e:
+            replica.mark_unhealthy(e)
+            return
+
+        replica.lag = lag
+        if lag > self.max_lag:
+            replica.mark_unhealthy(RuntimeError(f"отставание {lag:.1f}s больше {self.max_lag}s"))
+            return
+        if not replica.healthy:
+            logger.info(f"Реплика {replica.name} снова используется для чтения (отставание {lag:.1f}s)")
+        replica.healthy = True
+        replica.last_error = None
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    def snapshot(self) -> list[dict]:
+        return [
+            {
+                "healthy": replica.healthy,
+                "lag_seconds": round(replica.lag, 3),
+                "last_error": replica.last_error,
+                **replica.pool_metrics.snapshot(),
+            }
+            for replica in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        await asyncio.gather(*(replica.engine.dispose() for replica in self.replicas))
@@ -0,0 +1,58 @@
+# src/db_clients/shards.py
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from src.db_clients.circuit_breaker import CircuitBreaker
+from src.db_clients.pool_metrics import PoolMetrics
+from src.models.shard_models import UserShard, UserShardStatus
+
+# Основная БД; обслуживает всех пользователей, которых нет в user_shards
+MAIN_SHARD = "main"
+
+USER_SHARD = select(UserShard.shard, UserShard.status).where(UserShard.user_id == bindparam("user_id"))
+
+
+@dataclass
+class Shard:
+    name: str
+    engine: AsyncEngine
+    session_factory: async_sessionmaker
+    pool_metrics: PoolMetrics
+    breaker: CircuitBreaker
+
+
+class ShardMap:
+    """
+    Кеш строк user_shards в памяти процесса.
+
+    Запись живёт ttl секунд, поэтому перенос пользователя (src/services/shard_mover.py)
+    выжидает ttl после каждой смены статуса, прежде чем считать, что все воркеры её увидели.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._cache: dict[int, tuple[str, str, float]] = {}
+
+    def get(self, user_id: int) -> tuple[str, str] | None:
+        cached = self._cache.get(user_id)
+        if cached is None or cached[2] < time.monotonic():
+            return None
+        return cached[0], cached[1]
+
+    def put(self, user_id: int, shard: str, status: str) -> None:
+        now = time.monotonic()
+        if len(self._cache) > 100_000:
+            self._cache = {uid: item for uid, item in self._cache.items() if item[2] > now}
+        self._cache[user_id] = (shard, status, now + self.ttl)
+
+    async def lookup(self, session, user_id: int) -> tuple[str, str]:
+        cached = self.get(user_id)
+        if cached is not None:
+            return cached
+        row = (await session.execute(USER_SHARD, {"user_id": user_id})).first()
+        shard, status = (row.shard, row.status) if row else (MAIN_SHARD, UserShardStatus.ACTIVE)
+        self.put(user_id, shard, status)
+        return shard, status
@@ -0,0 +1,71 @@
+# src/db_clients/statements.py
+"""
+Реестр заранее построенных запросов для самых частых обращений к БД.
+
+Запросы строятся один раз при импорте, значения передаются через bindparam
+при выполнении:
+    await session.execute(statements.CAR_OWNED_BY, {"car_id": car_id, "user_id_owner": user_id})
+
+Для готового объекта SQLAlchemy не строит конструкцию заново, ключ кеша считается
+один раз, а скомпилированный SQL берётся из кеша компиляции движка (DB_QUERY_CACHE_SIZE).
+Текст SQL при этом всегда одинаковый, поэтому asyncpg переиспользует prepared statement
+соединения (DB_PREPARED_STATEMENT_CACHE_SIZE).
+
+lambda_stmt здесь не используется: на SQLAlchemy 2.0 его выполнение каждый раз заново
+подставляет параметры в дерево запроса и оказывается медленнее обычного select()
+(см. benchmarks/statement_cache.py).
+"""
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import joinedload
+
+from src.models.user_models import Car, CarRecord, Permission, RefreshToken, Role, RolePermissions, User, UserRoles
+
+# id машины, если она принадлежит пользователю и не удалена
+CAR_OWNED_BY = select(Car.id).where(
+    Car.id == bindparam("car_id"),
+    Car.user_id_owner == bindparam("user_id_owner"),
+    Car.is_deleted == False,
+)
+
+# Активные записи машины, новые сверху
+CAR_RECORDS_LIST = (
+    select(
+        CarRecord.id,
+        CarRecord.user_id_owner,
+        CarRecord.car_id,
+        CarRecord.record_type,
+        CarRecord.name,
+        CarRecord.record_date,
+        CarRecord.mileage,
+        CarRecord.service_place,
+        CarRecord.cost,
+    )
+    .where(
+        CarRecord.car_id == bindparam("car_id"),
+        CarRecord.user_id_owner == bindparam("user_id_owner"),
+        CarRecord.is_deleted == False,
+        CarRecord.is_active == True,
+    )
+    .order_by(CarRecord.created_at.desc())
+)
+
+# Пользователь из access-токена вместе с ролью
+PRINCIPAL_BY_ID = select(User).options(joinedload(User.role)).where(User.id == bindparam("user_id"))
+
+# Коды прав пользователя через его роли
+PRINCIPAL_PERMISSIONS = (
+    select(Permission.code)
+    .join(RolePermissions, Permission.id == RolePermissions.c.permission_id)
+    .join(Role, Role.id == RolePermissions.c.role_id)
+    .join(UserRoles, UserRoles.c.role_id == Role.id)
+    .where(UserRoles.c.user_id == bindparam("user_id"))
+)
+
+# Refresh-токен при ротации: ищется по jti и владельцу
+REFRESH_TOKEN_BY_JTI = select(RefreshToken).where(
+    RefreshToken.jti == bindparam("jti"),
+    RefreshToken.user_id == bindparam("user_id"),
+)
+
+# Refresh-токен при logout: ищется по самому значению токена
+REFRESH_TOKEN_BY_VALUE = select(RefreshToken).where(RefreshToken.token == bindparam("token"))
@@ -0,0 +1,50 @@
+# src/db_clients/strict_loading.py
+from logging import getLogger
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, raiseload
+
+logger = getLogger(__name__)
+
+# Стратегии, при которых связь не загружается, пока запрос не попросит её явно
+_EXPLICIT_ONLY = {"raise", "raise_on_sql", "noload", "write_only", "dynamic"}
+
+
+def _raise_on_implicit_loads(orm_execute_state) -> None:
+    if not orm_execute_state.is_select:
+        return
+    if orm_execute_state.is_column_load or orm_execute_state.is_relationship_load:
+        return
+    # Явные selectinload/joinedload запроса важнее wildcard, всё остальное — raiseload
+    orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+
+def enable_strict_loading() -> None:
+    """
+    Строгий режим загрузки связей для тестов и разработки (DB_STRICT_LOADING).
+
+    Ко всем ORM-запросам добавляется raiseload("*"): обращение к связи, которую запрос
+    не загрузил явно, падает с InvalidRequestError, даже если в модели снова появится
+    lazy="select". Так lazy load виден сразу, а не по росту числа запросов.
+
+    lazy="joined"/"selectin" в модели wildcard тоже отменяет, т.е. в строгом режиме лишний
+    JOIN пропадает, а без него — нет. Такие связи находит eager_relationships.
+    """
+    if not event.contains(Session, "do_orm_execute", _raise_on_implicit_loads):
+        event.listen(Session, "do_orm_execute", _raise_on_implicit_loads)
+        logger.info("Включён строгий режим загрузки связей ORM")
+
+
+def disable_strict_loading() -> None:
+    if event.contains(Session, "do_orm_execute", _raise_on_implicit_loads):
+        event.remove(Session, "do_orm_execute", _raise_on_implicit_loads)
+
+
+def eager_relationships(registry) -> list[str]:
+    """Связи моделей registry, которые загружаются без явной опции запроса (lazy не raise/noload)."""
+    return [
+        f"{mapper.class_.__name__}.{relationship.key} (lazy={relationship.lazy})"
+        for mapper in registry.mappers
+        for relationship in mapper.relationships
+        if relationship.lazy not in _EXPLICIT_ONLY
+    ]
@@ -0,0 +1,28 @@
+# src/db_clients/workloads.py
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from src.db_clients.pool_metrics import PoolMetrics
+
+
+class Workload:
+    """
+    Классы нагрузки с отдельными пулами соединений к primary (bulkheads).
+
+    Медленные загрузки изображений или фоновая выгрузка исчерпывают только свой пул
+    и не отнимают соединения у проверки токена, от которой зависят все эндпоинты.
+    Размеры пулов задаются в DB_WORKLOAD_POOLS; класс без пула работает через общий пул.
+    """
+    AUTH = "auth"                # проверка access token, логин, выход, обновление токенов
+    READ = "read"                # чтения из primary: реплик нет или пользователь только что писал
+    WRITE = "write"              # изменения машин, записей и изображений пользователя
+    BACKGROUND = "background"    # outbox, архивация, перешифрование email, чистка кодов
+
+
+@dataclass
+class WorkloadPool:
+    name: str
+    engine: AsyncEngine
+    session_factory: async_sessionmaker
+    pool_metrics: PoolMetrics
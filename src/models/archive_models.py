@@ -0,0 +1,32 @@
+# src/models/archive_models.py
+from sqlalchemy import Column, DateTime, Index, Table, func
+
+from src.db_clients.config import db_settings
+from src.models.base_model import ORMBase
+from src.models.user_models import Car, CarRecord, CarRecordImage
+
+
+def archive_table(source: Table, name: str) -> Table:
+    """
+    Архивная копия таблицы: те же колонки без внешних ключей и значений по умолчанию
+    плюс archived_at. Строки переносятся сюда задачей src/services/archival.py.
+
+    Первичный ключ архива — только id (миграция 0004), даже если у источника он составной:
+    car_records секционирована и её ключ (id, user_id_owner) включает ключ секционирования.
+    """
+    columns = [
+        Column(column.name, column.type, primary_key=column.name == "id", nullable=column.nullable)
+        for column in source.columns
+    ]
+    return Table(
+        name,
+        ORMBase.metadata,
+        *columns,
+        Column("archived_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+        Index(f"ix_{name}_user", "owner_user_id" if "owner_user_id" in source.c else "user_id_owner"),
+    )
+
+
+CarsArchive = archive_table(Car.__table__, db_settings.tables.CARS_ARCHIVE)
+CarRecordsArchive = archive_table(CarRecord.__table__, db_settings.tables.CAR_RECORDS_ARCHIVE)
+CarRecordImagesArchive = archive_table(CarRecordImage.__table__, db_settings.tables.CAR_RECORDS_IMAGES_ARCHIVE)
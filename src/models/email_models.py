@@ -0,0 +1,54 @@
+# src/models/email_models.py
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.db_clients.config import db_settings
+from src.models.base_model import ORMBase
+
+
+class EmailOutboxStatus:
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    SUPERSEDED = "superseded"
+
+
+class EmailOutbox(ORMBase):
+    """
+    Исходящее письмо. Запись создаётся в той же транзакции, что и бизнес-изменение,
+    а доставкой занимаются фоновые воркеры (src/services/email_outbox.py).
+    """
+    __tablename__ = db_settings.tables.EMAIL_OUTBOX
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    recipient: Mapped[str] = mapped_column(String, nullable=False)  # зашифрованный email
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    # JSONB в Postgres, JSON (текст) во встроенном режиме на SQLite
+    payload: Mapped[dict] = mapped_column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    dedupe_key: Mapped[str] = mapped_column(String(512), nullable=False)
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default=EmailOutboxStatus.PENDING)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text)
+
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=func.now())
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Одно ожидающее письмо на адрес и тип: повторная отправка заменяет payload
+        Index(
+            "uq_email_outbox_pending_dedupe", "dedupe_key",
+            unique=True, postgresql_where=text("status = 'pending'"),
+        ),
+        Index(
+            "ix_email_outbox_due", "next_attempt_at",
+            postgresql_where=text("status IN ('pending', 'sending')"),
+        ),
+    )
@@ -22,6 +22,7 @@ class Organization(ORMBase):
         'User',
         foreign_keys='Organization.owner_id',
         uselist=False,
+        lazy="raise",
     )
 
     # Явная связь с пользователями по полю User.organization_id
@@ -0,0 +1,29 @@
+# src/models/shard_models.py
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.db_clients.config import db_settings
+from src.models.base_model import ORMBase
+
+
+class UserShardStatus:
+    ACTIVE = "active"
+    MOVING = "moving"
+
+
+class UserShard(ORMBase):
+    """
+    Карта шардов: в каком шарде лежат машины и записи пользователя.
+
+    Таблица живёт в основной БД. Пользователя без строки здесь обслуживает основной
+    шард (MAIN_SHARD), так что строки появляются только у перенесённых пользователей.
+    """
+    __tablename__ = db_settings.tables.USER_SHARDS
+
+    id = None
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    shard: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default=UserShardStatus.ACTIVE)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
@@ -1,7 +1,10 @@
 # src/models/user_model.py
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Table, Text, func, Numeric
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, ForeignKeyConstraint, Index, Integer, Sequence, String, Table, Text, func,
+    Numeric, text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db_clients.config import db_settings
@@ -9,6 +12,9 @@ from src.models.base_model import ORMBase
 from src.models.organization_models import Organization  # noqa: E402
 from decimal import Decimal
 
+# Все связи по умолчанию lazy="raise": связанные объекты загружаются только явными
+# опциями запроса (selectinload/joinedload), неявная подгрузка падает с ошибкой.
+
 # Таблица связи многие-ко-многим для пользователей и ролей
 UserRoles = Table(
     db_settings.tables.USER_ROLES,
@@ -35,6 +41,13 @@ class RefreshToken(ORMBase):
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     revoked: Mapped[bool] = mapped_column(Boolean, default=False)
 
+    __table_args__ = (
+        # Ротация ищет токен по jti, logout — по самому значению токена
+        Index("ix_refresh_tokens_jti", "jti"),
+        Index("ix_refresh_tokens_token", "token", postgresql_using="hash"),
+        # Отзыв всех активных токенов пользователя при входе
+        Index("ix_refresh_tokens_user_active", "user_id", postgresql_where=text("revoked = false")),
+    )
     # user: Mapped['User'] = relationship('User', back_populates='refresh_tokens')
 
 
@@ -53,7 +66,7 @@ class Permission(ORMBase):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now(), onupdate=func.now(), nullable=False)
 
-    role: Mapped["Role"] = relationship("Role", back_populates="permissions", lazy="joined")
+    role: Mapped["Role"] = relationship("Role", back_populates="permissions", lazy="raise")
 
 
 
@@ -83,8 +96,8 @@ class Role(ORMBase):
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
-    users: Mapped[list["User"]] = relationship("User", back_populates="role")
-    permissions: Mapped[list["Permission"]] = relationship("Permission", back_populates="role")
+    users: Mapped[list["User"]] = relationship("User", back_populates="role", lazy="raise")
+    permissions: Mapped[list["Permission"]] = relationship("Permission", back_populates="role", lazy="raise")
 
 
 
@@ -94,6 +107,9 @@ class User(ORMBase):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
     email: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    # HMAC от email для поиска: не меняется при ротации ключей шифрования email
+    email_index: Mapped[str | None] = mapped_column(String(64), unique=True)
+    email_key_version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
     nickname: Mapped[str | None] = mapped_column(String)
     password: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now())
@@ -104,14 +120,15 @@ class User(ORMBase):
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
 
     role_id: Mapped[int | None] = mapped_column(ForeignKey("roles.id", ondelete="SET NULL"))
-    role: Mapped["Role"] = relationship("Role", back_populates="users", lazy="joined")
+    role: Mapped["Role"] = relationship("Role", back_populates="users", lazy="raise")
 
+    # Устаревшие поля: коды подтверждения хранятся в verification_codes (src/services/verify_code_store.py)
     verify_code: Mapped[str | None] = mapped_column(String)
 
     code_date_expired: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
-    cars: Mapped[list["Car"]] = relationship("Car", back_populates="user_owner")
-    car_records: Mapped[list["CarRecord"]] = relationship("CarRecord", back_populates="user_owner")
-    images: Mapped[list["CarRecordImage"]] = relationship("CarRecordImage", back_populates="owner_user")
+    cars: Mapped[list["Car"]] = relationship("Car", back_populates="user_owner", lazy="raise")
+    car_records: Mapped[list["CarRecord"]] = relationship("CarRecord", back_populates="user_owner", lazy="raise")
+    images: Mapped[list["CarRecordImage"]] = relationship("CarRecordImage", back_populates="owner_user", lazy="raise")
 
 
 
@@ -120,7 +137,7 @@ class Car(ORMBase):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id_owner: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    user_owner: Mapped["User"] = relationship("User", back_populates="cars", lazy="joined")
+    user_owner: Mapped["User"] = relationship("User", back_populates="cars", lazy="raise")
 
     brand: Mapped[str] = mapped_column(String(20), nullable=False)
     model: Mapped[str] = mapped_column(String(20), nullable=False)
@@ -134,19 +151,33 @@ class Car(ORMBase):
 
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
-    records: Mapped[list["CarRecord"]] = relationship("CarRecord", back_populates="car")
-    images: Mapped[list["CarRecordImage"]] = relationship("CarRecordImage", back_populates="car")
+    # Версия строки для оптимистической блокировки: каждое изменение увеличивает её на 1
+    version: Mapped[int] = mapped_column(Integer, server_default="1", nullable=False)
+    records: Mapped[list["CarRecord"]] = relationship("CarRecord", back_populates="car", lazy="raise")
+    images: Mapped[list["CarRecordImage"]] = relationship("CarRecordImage", back_populates="car", lazy="raise")
 
+    __table_args__ = (
+        # Список машин пользователя и проверка владельца
+        Index("ix_cars_owner_live", "user_id_owner", postgresql_where=text("is_deleted = false")),
+        # Поиск удалённых строк для архивации
+        Index("ix_cars_deleted_at", "deleted_at", postgresql_where=text("is_deleted = true")),
+    )
 
 
 class CarRecord(ORMBase):
+    """
+    Таблица секционирована по HASH (user_id_owner), секции car_records_p00..pNN создаются
+    миграцией 0005. Ключ секционирования входит в первичный ключ, а запросы к записям
+    передают владельца, чтобы Postgres читал только одну секцию.
+    """
     __tablename__ = "car_records"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    user_id_owner: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    user_owner: Mapped["User"] = relationship("User", back_populates="car_records", lazy="joined")
+    # У составного ключа нет SERIAL: id берётся из прежней последовательности таблицы
+    id: Mapped[int] = mapped_column(Integer, Sequence("car_records_id_seq"), primary_key=True)
+    user_id_owner: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    user_owner: Mapped["User"] = relationship("User", back_populates="car_records", lazy="raise")
     car_id: Mapped[int] = mapped_column(ForeignKey("cars.id"), nullable=False)
-    car: Mapped["Car"] = relationship("Car", back_populates="records", lazy="joined")
+    car: Mapped["Car"] = relationship("Car", back_populates="records", lazy="raise")
 
     record_type: Mapped[str] = mapped_column(String(100), nullable=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -162,21 +193,38 @@ class CarRecord(ORMBase):
 
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
-    images: Mapped[list["CarRecordImage"]] = relationship("CarRecordImage", back_populates="car_record")
+    version: Mapped[int] = mapped_column(Integer, server_default="1", nullable=False)
+    images: Mapped[list["CarRecordImage"]] = relationship(
+        "CarRecordImage", back_populates="car_record", lazy="raise", overlaps="images,owner_user"
+    )
+
+    __table_args__ = (
+        # Список записей машины: фильтр по машине и владельцу, сортировка по дате создания
+        Index(
+            "ix_car_records_car_owner_live", "car_id", "user_id_owner", text("created_at DESC"),
+            postgresql_where=text("is_deleted = false AND is_active = true"),
+        ),
+        # Внешний ключ: каскадное удаление и проверка FK при архивации машины
+        Index("ix_car_records_car_id", "car_id"),
+        Index("ix_car_records_deleted_at", "deleted_at", postgresql_where=text("is_deleted = true")),
+        {"postgresql_partition_by": "HASH (user_id_owner)"},
+    )
 
 
 class CarRecordImage(ORMBase):
     __tablename__ = "car_records_images"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    car_record_id: Mapped[int] = mapped_column(ForeignKey("car_records.id"), nullable=False)
-    car_record: Mapped["CarRecord"] = relationship("CarRecord", back_populates="images", lazy="joined")
+    car_record_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    car_record: Mapped["CarRecord"] = relationship(
+        "CarRecord", back_populates="images", lazy="raise", overlaps="images,owner_user"
+    )
 
     car_id: Mapped[int] = mapped_column(ForeignKey("cars.id"), nullable=False)
-    car: Mapped["Car"] = relationship("Car", back_populates="images", lazy="joined")
+    car: Mapped["Car"] = relationship("Car", back_populates="images", lazy="raise")
 
     owner_user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    owner_user: Mapped["User"] = relationship("User", back_populates="images", lazy="joined")
+    owner_user: Mapped["User"] = relationship("User", back_populates="images", lazy="raise", overlaps="car_record")
 
     link_to_s3: Mapped[str] = mapped_column(Text, nullable=False)
 
@@ -187,6 +235,20 @@ class CarRecordImage(ORMBase):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
 
+    __table_args__ = (
+        # Изображения записи для карточки записи
+        Index("ix_car_records_images_record_live", "car_record_id", postgresql_where=text("is_deleted = false")),
+        # Внешние ключи: каскадное удаление и проверка FK при архивации записи и машины
+        Index("ix_car_records_images_car_record_id", "car_record_id"),
+        Index("ix_car_records_images_car_id", "car_id"),
+        Index("ix_car_records_images_deleted_at", "deleted_at", postgresql_where=text("is_deleted = true")),
+        # Владелец изображения совпадает с владельцем записи и входит в ключ секционированной car_records
+        ForeignKeyConstraint(
+            ["car_record_id", "owner_user_id"], ["car_records.id", "car_records.user_id_owner"],
+            name="car_records_images_car_record_fkey",
+        ),
+    )
+
 
 class Tables:
     def __init__(self):
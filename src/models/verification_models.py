@@ -0,0 +1,29 @@
+# src/models/verification_models.py
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.db_clients.config import db_settings
+from src.models.base_model import ORMBase
+
+
+class VerificationCode(ORMBase):
+    """
+    Одноразовые коды подтверждения. Таблица UNLOGGED: коды живут минуты,
+    переживать crash recovery им не нужно, а запись не нагружает WAL.
+    """
+    __tablename__ = db_settings.tables.VERIFICATION_CODES
+
+    id = None
+    key: Mapped[str] = mapped_column(String(512), primary_key=True)  # "<назначение>:<blind index email>"
+    code: Mapped[str] = mapped_column(String(16), nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    consumed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now())
+
+    __table_args__ = (
+        Index("ix_verification_codes_expires_at", "expires_at"),
+        {"prefixes": ["UNLOGGED"]},
+    )
@@ -0,0 +1 @@
+# src/repositories/__init__.py
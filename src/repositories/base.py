@@ -0,0 +1,152 @@
+# src/repositories/base.py
+from typing import NamedTuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import CTE, Column, Integer, Text, bindparam, cast, func, literal, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.sql import Select, visitors
+
+from src.core.responses import dumps
+
+
+def param(column: Column, prefix: str = "v_"):
+    """
+    Типизированный bindparam для значения колонки.
+
+    Тип нужен asyncpg для значений в INSERT ... SELECT, префикс — чтобы имя не совпало
+    с именами колонок: параметр выполнения с именем колонки изменяемой таблицы SQLAlchemy
+    добавляет в SET/VALUES, в том числе у INSERT/UPDATE внутри CTE. По той же причине
+    условия запросов репозиториев называются user_id и car, а не user_id_owner и car_id.
+    """
+    return bindparam(f"{prefix}{column.key}", type_=column.type)
+
+
+def values_params(values: dict, prefix: str = "v_") -> dict:
+    return {f"{prefix}{key}": value for key, value in values.items()}
+
+
+def owned_write(target: CTE, written: CTE) -> Select:
+    """
+    Итоговый SELECT для проверки владельца и изменения за один запрос.
+
+    target — CTE с найденной строкой (колонка owner_id), written — CTE с INSERT/UPDATE ... RETURNING id,
+    который применяется только при совпадении владельца. Возвращает одну строку (owner_id, id):
+    owner_id IS NULL — строки нет, id IS NULL — строка чужая.
+    """
+    return select(
+        select(target.c.owner_id).scalar_subquery().label("owner_id"),
+        select(written.c.id).scalar_subquery().label("id"),
+    )
+
+
+def version_matches(column: Column):
+    """
+    Условие оптимистической блокировки для UPDATE: версия строки равна expected_version
+    или клиент версию не передал (NULL) — тогда изменение безусловное, как раньше.
+    """
+    expected = bindparam("expected_version", type_=Integer)
+    return or_(expected.is_(None), column == expected)
+
+
+class OwnedWrite(NamedTuple):
+    owner_id: int | None
+    id: int | None
+    version: int | None = None
+
+
+def is_postgres(session) -> bool:
+    """
+    Изменяющие CTE и json_agg есть только в Postgres; во встроенном режиме (SQLite)
+    репозитории выполняют то же самое несколькими запросами в одной транзакции.
+    """
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def _inline_target(statement, target: CTE, found):
+    """Копия INSERT/UPDATE, в которой колонки target заменены значениями найденной строки."""
+    def replace(element):
+        if getattr(element, "table", None) is target:
+            return literal(getattr(found, element.key), element.type)
+        return None
+
+    return visitors.replacement_traverse(statement, {}, replace)
+
+
+async def execute_owned_write(session, statement: Select, target: CTE, written: CTE, params: dict, cascade=()):
+    """
+    Выполняет запрос owned_write. Без изменяющих CTE — по шагам: строка из target,
+    затем, если её владелец совпал с user_id, изменение из written и каскадные изменения:
+    cascade — функции, которые по списку изменённых id строят UPDATE дочерних строк.
+    Возвращает строку с owner_id и id, как owned_write.
+    """
+    # Для ORM это SELECT (изменения спрятаны в CTE или идут через соединение), поэтому
+    # PrimarySession не узнает о записи сама, а она нужна для read-your-writes (src/session.py)
+    session.info["has_writes"] = True
+    if is_postgres(session):
+        return (await session.execute(statement, params)).one()
+
+    # Через соединение, а не ORM-сессию: INSERT ... FROM SELECT по модели ORM выполнить не умеет
+    connection = await session.connection()
+    found = (await connection.execute(select(target), params)).first()
+    if found is None or found.owner_id != params["user_id"]:
+        return OwnedWrite(found.owner_id if found else None, None)
+    written_row = (await connection.execute(_inline_target(written.element, target, found), params)).first()
+    written_id = written_row.id if written_row else None
+    for build in cascade:
+        await connection.execute(_inline_target(build([written_id]), target, found), params)
+    return OwnedWrite(found.owner_id, written_id, getattr(written_row, "version", None))
+
+
+def raise_for_owner(owner_id: int | None, user_id: int, not_found_detail: str) -> None:
+    """404, если объекта нет (или он удалён), 403, если он принадлежит другому пользователю."""
+    if owner_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+    if owner_id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Нет прав на доступ к этому объекту")
+
+
+def raise_for_version(written_id: int | None, detail: str) -> None:
+    """409, если строка пользователя найдена, но не изменена: версия не совпала с expected_version."""
+    if written_id is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+def json_key(key: str):
+    """Ключ JSON-объекта литералом в тексте запроса, а не параметром."""
+    return literal_column(f"'{key}'")
+
+
+def json_array(fields: dict, *order_by):
+    """
+    Выражение, которое собирает строки в JSON-массив на стороне Postgres:
+    coalesce(json_agg(json_build_object('ключ', колонка, ...) ORDER BY ...), '[]').
+
+    Итоговое значение запроса стоит приводить к text (json_text): asyncpg отдаст готовую строку,
+    которую можно сразу вернуть клиенту без разбора и повторной сериализации.
+
+    Значения те же, что у dump_json по строкам rows_select, но текст JSON отличается
+    (tests/test_json_lists.py сверяет оба пути на Postgres):
+      - пробелы: Postgres пишет {"id" : 1, "name" : "ТО"}, orjson — {"id":1,"name":"ТО"};
+      - numeric пишется с тем масштабом, с которым хранится значение: 4990.50 и 5.00,
+        а dump_json отдаёт 4990.5 и 5.0 (src/core/responses.py, json_default);
+      - у дробной части секунд нет хвостовых нулей: 10:00:00.12+00:00, а не 10:00:00.120000+00:00.
+    Смещение часового пояса одинаковое (+00:00): соединения asyncpg работают с TimeZone=UTC
+    (src/session.py). Клиенты должны разбирать даты и числа, а не сравнивать их как строки.
+    """
+    obj = func.json_build_object(*(arg for key, column in fields.items() for arg in (json_key(key), column)))
+    aggregated = func.json_agg(aggregate_order_by(obj, *order_by) if order_by else obj)
+    return func.coalesce(aggregated, literal_column("'[]'::json"))
+
+
+def json_text(expression):
+    return cast(expression, Text)
+
+
+def rows_select(fields: dict, *order_by) -> Select:
+    """Те же поля, что собирает json_array, обычным SELECT — для баз без json_agg."""
+    return select(*(column.label(key) for key, column in fields.items())).order_by(*order_by)
+
+
+def dump_json(data) -> bytes:
+    """JSON из строк, прочитанных rows_select: те же значения, что отдаёт json_array (отличия текста — там)."""
+    return dumps(data)
@@ -0,0 +1,329 @@
+# src/repositories/car_records.py
+"""
+Запросы к записям автомобилей, совмещающие проверку владельца с самим действием.
+
+Каждая функция делает один запрос к БД: целевая строка находится в CTE, изменение
+выполняется только при совпадении владельца, а в ответ возвращается владелец
+найденной строки — по нему сервис различает 404 и 403.
+
+car_records секционирована по user_id_owner, поэтому каждый запрос к ней ограничивает
+user_id_owner: либо владельцем машины (подзапрос к cars вычисляется до чтения записей,
+и Postgres отбрасывает лишние секции при выполнении), либо самим пользователем там,
+где машины в запросе нет.
+"""
+from sqlalchemy import and_, bindparam, false, func, insert, select, true, update
+
+from src.models.user_models import Car, CarRecord, CarRecordImage
+from src.repositories.base import (
+    dump_json,
+    execute_owned_write,
+    is_postgres,
+    json_array,
+    json_text,
+    owned_write,
+    param,
+    raise_for_owner,
+    raise_for_version,
+    values_params,
+    version_matches,
+)
+
+RECORD_FIELDS = ("record_type", "name", "description", "record_date", "mileage", "service_place", "cost")
+
+_target_car = (
+    select(Car.id, Car.user_id_owner.label("owner_id"))
+    .where(Car.id == bindparam("car"), Car.is_deleted == False)
+    .cte("target_car")
+)
+
+_inserted_record = (
+    insert(CarRecord)
+    .from_select(
+        ["user_id_owner", "car_id", *RECORD_FIELDS, "created_at", "is_active", "is_deleted"],
+        select(
+            _target_car.c.owner_id,
+            _target_car.c.id,
+            *(param(CarRecord.__table__.c[field]) for field in RECORD_FIELDS),
+            func.now(),
+            true(),
+            false(),
+        ).where(_target_car.c.owner_id == bindparam("user_id")),
+    )
+    .returning(CarRecord.id)
+    .cte("inserted_record")
+)
+
+CREATE_RECORD = owned_write(_target_car, _inserted_record)
+
+# Записи машины лежат в секции её владельца
+_car_owner = select(Car.user_id_owner).where(Car.id == bindparam("car")).scalar_subquery()
+
+_target_record = (
+    select(CarRecord.id, CarRecord.user_id_owner.label("owner_id"))
+    .where(
+        CarRecord.id == bindparam("record_id"),
+        CarRecord.car_id == bindparam("car"),
+        CarRecord.user_id_owner == _car_owner,
+        CarRecord.is_deleted == False,
+    )
+    .cte("target_record")
+)
+
+_updated_record = (
+    update(CarRecord)
+    .where(
+        CarRecord.id == _target_record.c.id,
+        CarRecord.user_id_owner == bindparam("user_id"),
+        _target_record.c.owner_id == bindparam("user_id"),
+        version_matches(CarRecord.version),
+    )
+    .values(
+        **{field: param(CarRecord.__table__.c[field]) for field in RECORD_FIELDS},
+        version=CarRecord.version + 1,
+        updated_at=func.now(),
+    )
+    .returning(CarRecord.id, CarRecord.version)
+    .cte("updated_record")
+)
+
+# Запись меняется, только если её версия совпала с expected_version (или он не передан)
+UPDATE_RECORD = owned_write(_target_record, _updated_record).add_columns(
+    select(_updated_record.c.version).scalar_subquery().label("version"),
+)
+
+# Машины в запросе нет, поэтому запись ищется только в секции пользователя:
+# чужая запись для него не существует (404, а не 403)
+_target_record_any_car = (
+    select(CarRecord.id, CarRecord.user_id_owner.label("owner_id"))
+    .where(
+        CarRecord.id == bindparam("record_id"),
+        CarRecord.user_id_owner == bindparam("user_id"),
+        CarRecord.is_deleted == False,
+    )
+    .cte("target_record")
+)
+
+_deleted_record = (
+    update(CarRecord)
+    .where(
+        CarRecord.id == _target_record_any_car.c.id,
+        CarRecord.user_id_owner == bindparam("user_id"),
+    )
+    .values(is_deleted=True, is_active=False, deleted_at=func.now())
+    .returning(CarRecord.id)
+    .cte("deleted_record")
+)
+
+def _delete_record_images(record_ids):
+    return (
+        update(CarRecordImage)
+        .where(
+            CarRecordImage.car_record_id.in_(record_ids),
+            CarRecordImage.owner_user_id == bindparam("user_id"),
+            CarRecordImage.is_deleted == False,
+        )
+        .values(is_deleted=True, is_active=False, deleted_at=func.now())
+        .returning(CarRecordImage.id)
+    )
+
+
+_deleted_record_images = _delete_record_images(select(_deleted_record.c.id)).cte("deleted_record_images")
+
+# Изображения записи удаляются тем же запросом
+DELETE_RECORD = owned_write(_target_record_any_car, _deleted_record).add_columns(
+    select(func.count()).select_from(_deleted_record_images).scalar_subquery().label("images_deleted"),
+)
+
+_target_image = (
+    select(CarRecordImage.id, CarRecordImage.owner_user_id.label("owner_id"))
+    .where(
+        CarRecordImage.id == bindparam("image_id"),
+        CarRecordImage.car_record_id == bindparam("record_id"),
+        CarRecordImage.is_deleted == False,
+    )
+    .cte("target_image")
+)
+
+_deleted_image = (
+    update(CarRecordImage)
+    .where(CarRecordImage.id == _target_image.c.id, _target_image.c.owner_id == bindparam("user_id"))
+    .values(is_deleted=True, deleted_at=func.now())
+    .returning(CarRecordImage.id)
+    .cte("deleted_image")
+)
+
+DELETE_IMAGE = owned_write(_target_image, _deleted_image)
+
+# Машина и её записи одним запросом: строка машины есть всегда, записи присоединяются LEFT JOIN
+LIST_RECORDS = (
+    select(
+        Car.user_id_owner.label("owner_id"),
+        CarRecord.id,
+        CarRecord.user_id_owner,
+        CarRecord.car_id,
+        CarRecord.record_type,
+        CarRecord.name,
+        CarRecord.record_date,
+        CarRecord.mileage,
+        CarRecord.service_place,
+        CarRecord.cost,
+        CarRecord.version,
+    )
+    .select_from(Car)
+    .outerjoin(
+        CarRecord,
+        and_(
+            CarRecord.car_id == Car.id,
+            CarRecord.user_id_owner == bindparam("user_id"),
+            CarRecord.is_deleted == False,
+            CarRecord.is_active == True,
+        ),
+    )
+    .where(Car.id == bindparam("car"), Car.is_deleted == False)
+    .order_by(CarRecord.created_at.desc())
+)
+
+RECORD_JSON_FIELDS = {
+    "record_id": CarRecord.id,
+    "user_id_owner": CarRecord.user_id_owner,
+    "car_id": CarRecord.car_id,
+    "record_type": CarRecord.record_type,
+    "name": CarRecord.name,
+    "record_date": CarRecord.record_date,
+    "mileage": CarRecord.mileage,
+    "service_place": CarRecord.service_place,
+    "cost": CarRecord.cost,
+    "version": CarRecord.version,
+}
+
+# То же, что LIST_RECORDS, но массив записей собирается в JSON на стороне Postgres
+_records_json = (
+    select(json_text(json_array(RECORD_JSON_FIELDS, CarRecord.created_at.desc())))
+    .where(
+        CarRecord.car_id == bindparam("car"),
+        CarRecord.user_id_owner == bindparam("user_id"),
+        CarRecord.is_deleted == False,
+        CarRecord.is_active == True,
+    )
+    .scalar_subquery()
+)
+
+LIST_RECORDS_JSON = select(Car.user_id_owner.label("owner_id"), _records_json.label("body")).where(
+    Car.id == bindparam("car"), Car.is_deleted == False
+)
+
+# Запись и её изображения одним запросом
+RECORD_DETAIL = (
+    select(
+        CarRecord.user_id_owner.label("owner_id"),
+        CarRecord.id,
+        CarRecord.name,
+        CarRecord.description,
+        CarRecord.record_date,
+        CarRecord.mileage,
+        CarRecord.service_place,
+        CarRecord.cost,
+        CarRecord.version,
+        CarRecordImage.id.label("image_id"),
+        CarRecordImage.link_to_s3,
+    )
+    .outerjoin(
+        CarRecordImage,
+        and_(CarRecordImage.car_record_id == CarRecord.id, CarRecordImage.is_deleted == False),
+    )
+    .where(
+        CarRecord.id == bindparam("record_id"),
+        CarRecord.car_id == bindparam("car"),
+        CarRecord.user_id_owner == _car_owner,
+        CarRecord.is_deleted == False,
+    )
+    .order_by(CarRecordImage.id)
+)
+
+
+async def create_record(session, user_id_owner: int, car_id: int, values: dict) -> int:
+    row = await execute_owned_write(
+        session,
+        CREATE_RECORD,
+        _target_car,
+        _inserted_record,
+        {"car": car_id, "user_id": user_id_owner, **values_params(values)},
+    )
+    raise_for_owner(row.owner_id, user_id_owner, f"У пользователя нет машины с id={car_id}")
+    return row.id
+
+
+async def update_record(
+        session,
+        user_id_owner: int,
+        car_id: int,
+        record_id: int,
+        values: dict,
+        expected_version: int | None = None,
+) -> int:
+    """Возвращает новую версию записи; 409, если версия уже не expected_version."""
+    row = await execute_owned_write(
+        session,
+        UPDATE_RECORD,
+        _target_record,
+        _updated_record,
+        {
+            "record_id": record_id,
+            "car": car_id,
+            "user_id": user_id_owner,
+            "expected_version": expected_version,
+            **values_params(values),
+        },
+    )
+    raise_for_owner(row.owner_id, user_id_owner, f"Запись с id={record_id} не найдена")
+    raise_for_version(row.id, f"Запись изменена другим запросом, текущая версия не {expected_version}")
+    return row.version
+
+
+async def delete_record(session, user_id_owner: int, record_id: int) -> int:
+    row = await execute_owned_write(
+        session,
+        DELETE_RECORD,
+        _target_record_any_car,
+        _deleted_record,
+        {"record_id": record_id, "user_id": user_id_owner},
+        cascade=(_delete_record_images,),
+    )
+    raise_for_owner(row.owner_id, user_id_owner, f"У пользователя нет записи автомобиля с id={record_id}")
+    return row.id
+
+
+async def delete_image(session, user_id: int, record_id: int, image_id: int) -> int:
+    row = await execute_owned_write(
+        session,
+        DELETE_IMAGE,
+        _target_image,
+        _deleted_image,
+        {"image_id": image_id, "record_id": record_id, "user_id": user_id},
+    )
+    raise_for_owner(row.owner_id, user_id, "Изображение не найдено")
+    return row.id
+
+
+async def list_records(session, user_id_owner: int, car_id: int) -> list:
+    rows = (await session.execute(LIST_RECORDS, {"car": car_id, "user_id": user_id_owner})).all()
+    raise_for_owner(rows[0].owner_id if rows else None, user_id_owner, f"У пользователя нет машины с id={car_id}")
+    return [row for row in rows if row.id is not None]
+
+
+async def list_records_json(session, user_id_owner: int, car_id: int) -> bytes:
+    """Записи машины готовым JSON-массивом (UTF-8)."""
+    if not is_postgres(session):
+        rows = await list_records(session, user_id_owner=user_id_owner, car_id=car_id)
+        return dump_json([{key: getattr(row, column.key) for key, column in RECORD_JSON_FIELDS.items()} for row in rows])
+    row = (await session.execute(LIST_RECORDS_JSON, {"car": car_id, "user_id": user_id_owner})).first()
+    raise_for_owner(row.owner_id if row else None, user_id_owner, f"У пользователя нет машины с id={car_id}")
+    return row.body.encode()
+
+
+async def get_record_detail(session, user_id_owner: int, car_id: int, record_id: int) -> tuple:
+    """Возвращает (строка записи, [(image_id, link_to_s3), ...])."""
+    rows = (await session.execute(RECORD_DETAIL, {"record_id": record_id, "car": car_id})).all()
+    raise_for_owner(rows[0].owner_id if rows else None, user_id_owner, f"Запись с id={record_id} не найдена")
+    images = [(row.image_id, row.link_to_s3) for row in rows if row.image_id is not None]
+    return rows[0], images
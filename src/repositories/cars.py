@@ -0,0 +1,155 @@
+# src/repositories/cars.py
+from sqlalchemy import bindparam, func, select, update
+
+from src.models.user_models import Car, CarRecord, CarRecordImage
+from src.repositories.base import (
+    dump_json,
+    execute_owned_write,
+    is_postgres,
+    json_array,
+    json_key,
+    json_text,
+    owned_write,
+    param,
+    raise_for_owner,
+    raise_for_version,
+    rows_select,
+    values_params,
+    version_matches,
+)
+
+_target_car = (
+    select(Car.id, Car.user_id_owner.label("owner_id"))
+    .where(Car.id == bindparam("car"), Car.is_deleted == False)
+    .cte("target_car")
+)
+
+_deleted_car = (
+    update(Car)
+    .where(Car.id == _target_car.c.id, _target_car.c.owner_id == bindparam("user_id"))
+    .values(is_deleted=True, is_active=False, deleted_at=func.now())
+    .returning(Car.id)
+    .cte("deleted_car")
+)
+
+
+# Записи и изображения удаляются тем же запросом и с тем же deleted_at, что и машина,
+# поэтому архивируются вместе с ней (src/services/archival.py)
+def _delete_car_records(car_ids):
+    return (
+        update(CarRecord)
+        .where(
+            CarRecord.car_id.in_(car_ids),
+            CarRecord.user_id_owner == bindparam("user_id"),
+            CarRecord.is_deleted == False,
+        )
+        .values(is_deleted=True, is_active=False, deleted_at=func.now())
+        .returning(CarRecord.id)
+    )
+
+
+def _delete_car_images(car_ids):
+    return (
+        update(CarRecordImage)
+        .where(CarRecordImage.car_id.in_(car_ids), CarRecordImage.is_deleted == False)
+        .values(is_deleted=True, is_active=False, deleted_at=func.now())
+        .returning(CarRecordImage.id)
+    )
+
+
+_deleted_car_records = _delete_car_records(select(_deleted_car.c.id)).cte("deleted_car_records")
+_deleted_car_images = _delete_car_images(select(_deleted_car.c.id)).cte("deleted_car_images")
+
+DELETE_CAR = owned_write(_target_car, _deleted_car).add_columns(
+    select(func.count()).select_from(_deleted_car_records).scalar_subquery().label("records_deleted"),
+    select(func.count()).select_from(_deleted_car_images).scalar_subquery().label("images_deleted"),
+)
+
+CAR_JSON_FIELDS = {
+    "id": Car.id,
+    "user_id_owner": Car.user_id_owner,
+    "brand": Car.brand,
+    "model": Car.model,
+    "year": Car.year,
+    "mileage": Car.mileage,
+    "color": Car.color,
+    "created_at": Car.created_at,
+    "updated_at": Car.updated_at,
+    "deleted_at": Car.deleted_at,
+    "is_active": Car.is_active,
+    "is_deleted": Car.is_deleted,
+    "version": Car.version,
+}
+
+_live_cars = (Car.user_id_owner == bindparam("user_id"), Car.is_active == True, Car.is_deleted == False)
+
+# Ответ /cars/list целиком, собранный в Postgres: {"cars": [...]}
+CARS_JSON = select(
+    json_text(func.json_build_object(json_key("cars"), json_array(CAR_JSON_FIELDS, Car.id)))
+).where(*_live_cars)
+
+_CARS_ROWS = rows_select(CAR_JSON_FIELDS, Car.id).where(*_live_cars)
+
+
+async def update_car(
+        session, user_id_owner: int, car_id: int, values: dict, expected_version: int | None = None
+) -> int:
+    """
+    Набор полей меняется от запроса к запросу, поэтому UPDATE собирается на каждый вызов.
+    С expected_version машина меняется, только если её версия не изменилась (иначе 409).
+    Возвращает новую версию.
+    """
+    updated = (
+        update(Car)
+        .where(
+            Car.id == _target_car.c.id,
+            _target_car.c.owner_id == bindparam("user_id"),
+            version_matches(Car.version),
+        )
+        .values(
+            **{field: param(Car.__table__.c[field]) for field in values},
+            version=Car.version + 1,
+            updated_at=func.now(),
+        )
+        .returning(Car.id, Car.version)
+        .cte("updated_car")
+    )
+    statement = owned_write(_target_car, updated).add_columns(
+        select(updated.c.version).scalar_subquery().label("version")
+    )
+    row = await execute_owned_write(
+        session,
+        statement,
+        _target_car,
+        updated,
+        {
+            "car": car_id,
+            "user_id": user_id_owner,
+            "expected_version": expected_version,
+            **values_params(values),
+        },
+    )
+    raise_for_owner(row.owner_id, user_id_owner, "Машина не найдена")
+    raise_for_version(row.id, f"Машина изменена другим запросом, текущая версия не {expected_version}")
+    return row.version
+
+
+async def delete_car(session, user_id_owner: int, car_id: int) -> int:
+    row = await execute_owned_write(
+        session,
+        DELETE_CAR,
+        _target_car,
+        _deleted_car,
+        {"car": car_id, "user_id": user_id_owner},
+        cascade=(_delete_car_records, _delete_car_images),
+    )
+    raise_for_owner(row.owner_id, user_id_owner, "Машина не найдена")
+    return row.id
+
+
+async def list_cars_json(session, user_id_owner: int) -> bytes:
+    params = {"user_id": user_id_owner}
+    if is_postgres(session):
+        return (await session.execute(CARS_JSON, params)).scalar_one().encode()
+    rows = (await session.execute(_CARS_ROWS, params)).mappings().all()
+    return dump_json({"cars": [dict(row) for row in rows]})
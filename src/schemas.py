@@ -141,9 +141,19 @@ class CarCreateRequest(BaseModel):
     mileage: Optional[int]
     color: Optional[str]
 
+class CarUpdateRequest(CarCreateRequest):
+    # Версия машины, которую видел клиент; заголовок If-Match имеет приоритет
+    version: Optional[int] = None
+
 class CarCreateResponse(BaseModel):
     message: str
     car_id: int
+    version: Optional[int] = None
+
+
+class CarDeleteResponse(BaseModel):
+    message: str
+    car_id: int
 
 
 class CarResponse(BaseModel):
@@ -159,6 +169,7 @@ class CarResponse(BaseModel):
     deleted_at: Optional[datetime]
     is_active: bool
     is_deleted: bool
+    version: int
 
 class CarListResponse(BaseModel):
     cars: List[CarResponse]
@@ -174,6 +185,35 @@ class CarRecordCreateResponse(BaseModel):
     images: Optional[List[CarRecordImageResponse]] = []
 
 
+class CarRecordListItem(BaseModel):
+    record_id: int
+    user_id_owner: int
+    car_id: int
+    record_type: str
+    name: str
+    record_date: Optional[datetime]
+    mileage: Optional[int]
+    service_place: Optional[str]
+    cost: Optional[float]
+    version: int
+
+
+class CarRecordUpdateResponse(BaseModel):
+    message: str
+    record_id: int
+    version: int
+
+
+class CarRecordDeleteResponse(BaseModel):
+    message: str
+    record_id: int
+
+
+class CarRecordImageDeleteResponse(BaseModel):
+    status: str
+    message: str
+
+
 class CarRecordImageResponse(BaseModel):
     id: int
     url: str
@@ -186,4 +226,5 @@ class CarRecordDetailResponse(BaseModel):
     mileage: int | None
     service_place: str | None
     cost: float | None
+    version: int
     images: list[CarRecordImageResponse]
\ No newline at end of file
@@ -1,18 +1,34 @@
 # src/server.py
+import asyncio
 import multiprocessing
+from contextlib import asynccontextmanager
+
 import uvicorn
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, status
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.security import HTTPBearer 
 
+from src.core.compression import CompressionMiddleware
 from src.core.configuration.config import settings
 from src.core.logger import logger
+from src.core.responses import ORJSONResponse
 from src.api.api_routers import api_router
 
 from src.core.exceptions import register_exception_handlers
+from src.services.archival import run_archival
+from src.services.email_outbox import run_outbox_worker
+from src.services.email_reencryption import run_email_reencryption
+from src.services.verify_code_store import run_verify_code_janitor
+from src.utils.code_sendler import smtp_pool
+from src.utils.smtp_sink import SMTPSink
+from src.db_clients import embedded
+from src.session import db_manager
+from src.db_clients.deadlines import deadline_middleware
+from src.db_clients.query_stats import query_stats_middleware
 
 API_PREFIX = "/" + settings.SERVICE_NAME
 
@@ -26,11 +42,49 @@ logger.info(f"[WORKERS] Count workers = {workers}")
 
 security = HTTPBearer() 
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    smtp_sink = None
+    if settings.EMBEDDED:
+        await embedded.create_schema(db_manager.engine)
+        smtp_sink = await SMTPSink(host=settings.SMTP_HOST, port=settings.SMTP_PORT).start()
+        smtp_pool.port = smtp_sink.port
+        # Отправленные письма (например, коды подтверждения) доступны в app.state.smtp_sink.messages
+        app.state.smtp_sink = smtp_sink
+    background_tasks = [
+        asyncio.create_task(run_outbox_worker(worker_id))
+        for worker_id in range(settings.EMAIL_OUTBOX_WORKERS)
+    ]
+    background_tasks.append(asyncio.create_task(run_verify_code_janitor()))
+    if db_manager.replicas:
+        background_tasks.append(asyncio.create_task(db_manager.run_replica_health_checker()))
+    if settings.EMAIL_REENCRYPT_ON_STARTUP:
+        background_tasks.append(asyncio.create_task(run_email_reencryption()))
+    if settings.ARCHIVE_ENABLED:
+        background_tasks.append(asyncio.create_task(run_archival()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await smtp_pool.close()
+    await db_manager.replicas.dispose()
+    await db_manager.dispose_shards()
+    await db_manager.dispose_workloads()
+    if settings.EMBEDDED:
+        await smtp_sink.stop()
+        await db_manager.engine.dispose()
+        embedded.remove_database()
+
+
 docs_url = "/docs"
 app = FastAPI(
     docs_url=docs_url,
     openapi_url="/openapi.json",
-    root_path=API_PREFIX
+    root_path=API_PREFIX,
+    lifespan=lifespan,
+    # Default(...) оставляет эндпоинтам с response_model сериализацию pydantic-core (src/core/responses.py)
+    default_response_class=Default(ORJSONResponse),
 )
 
 @app.exception_handler(RequestValidationError)
@@ -46,6 +100,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+app.middleware("http")(query_stats_middleware)
+app.middleware("http")(deadline_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -54,6 +111,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    # Добавлено последним, поэтому внешнее: сжимает уже готовый ответ остальных middleware
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        content_types=settings.COMPRESSION_TYPES,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
 register_exception_handlers(app)
 
 app.include_router(api_router, prefix="/api/v1")
@@ -61,7 +128,7 @@ app.include_router(api_router, prefix="/api/v1")
 @app.get("/")
 def read_root():
     logger.info("Root endpoint accessed.")
-    return {"message": "Welcome to the Horizon System API"}
+    return ORJSONResponse({"message": "Welcome to the Horizon System API"})
 
 if __name__ == "__main__":
     try:
@@ -71,7 +138,7 @@ if __name__ == "__main__":
             "src.server:app",
             host=settings.HOST,
             port=settings.PORT,
-            workers=4,
+            workers=settings.WORKERS,
             # log_level="debug",
         )
     except Exception as e:
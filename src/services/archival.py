@@ -0,0 +1,117 @@
+# src/services/archival.py
+import asyncio
+import time
+from datetime import timedelta
+from logging import getLogger
+
+from sqlalchemy import Table, bindparam, delete, exists, func, insert, select
+
+from src.core.configuration.config import settings
+from src.db_clients.workloads import Workload
+from src.models.archive_models import CarRecordImagesArchive, CarRecordsArchive, CarsArchive
+from src.models.user_models import Car, CarRecord, CarRecordImage
+from src.session import db_manager
+
+logger = getLogger(__name__)
+
+
+def _move_statement(source: Table, archive: Table, *keep_if_referenced):
+    """
+    Переносит пачку удалённых строк source в archive одним запросом:
+    WITH moved AS (DELETE ... RETURNING *) INSERT INTO archive SELECT ... FROM moved.
+
+    Строки выбираются по частичному индексу (deleted_at) WHERE is_deleted и блокируются
+    FOR UPDATE SKIP LOCKED, поэтому задача не ждёт рабочие запросы и может работать
+    в нескольких процессах. Строки, на которые ещё ссылаются дочерние таблицы
+    (keep_if_referenced — колонки внешних ключей), пропускаются до следующего прохода.
+    """
+    batch = (
+        select(source.c.id)
+        .where(source.c.is_deleted == True, source.c.deleted_at < bindparam("cutoff"))
+        .order_by(source.c.deleted_at)
+        .limit(bindparam("batch_size"))
+        .with_for_update(skip_locked=True)
+    )
+    for fk_column in keep_if_referenced:
+        batch = batch.where(~exists().where(fk_column == source.c.id))
+
+    columns = [column.name for column in source.columns]
+    moved = (
+        delete(source)
+        .where(source.c.id.in_(batch.scalar_subquery()))
+        .returning(*source.columns)
+        .cte("moved")
+    )
+    return (
+        insert(archive)
+        .from_select(columns, select(*(moved.c[name] for name in columns)))
+        .add_cte(moved)
+        .returning(archive.c.id)
+    )
+
+
+# Дочерние таблицы идут первыми: к моменту переноса машины её записи и изображения
+# (удалённые каскадно с тем же deleted_at) уже лежат в архиве
+ARCHIVE_STEPS = [
+    ("car_records_images", _move_statement(CarRecordImage.__table__, CarRecordImagesArchive)),
+    (
+        "car_records",
+        _move_statement(CarRecord.__table__, CarRecordsArchive, CarRecordImage.car_record_id),
+    ),
+    (
+        "cars",
+        _move_statement(Car.__table__, CarsArchive, CarRecord.car_id, CarRecordImage.car_id),
+    ),
+]
+
+
+async def archive_deleted_rows(
+        after_days: int | None = None, batch_size: int | None = None, pause: float | None = None
+) -> dict[str, int]:
+    """
+    Переносит строки, удалённые больше after_days дней назад, из рабочих таблиц в архивные.
+
+    Каждая пачка — отдельная короткая транзакция, между пачками пауза.
+    Возвращает число перенесённых строк по таблицам.
+    """
+    after_days = settings.ARCHIVE_AFTER_DAYS if after_days is None else after_days
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    pause = settings.ARCHIVE_PAUSE if pause is None else pause
+
+    started = time.monotonic()
+    moved_total: dict[str, int] = {}
+    async with db_manager.get_db_session(Workload.BACKGROUND) as session:
+        cutoff = (await session.execute(select(func.now()))).scalar_one() - timedelta(days=after_days)
+
+    for table_name, statement in ARCHIVE_STEPS:
+        moved_total[table_name] = 0
+        while True:
+            async with db_manager.get_db_session(Workload.BACKGROUND) as session:
+                moved = len(
+                    (await session.execute(statement, {"cutoff": cutoff, "batch_size": batch_size})).all()
+                )
+                await session.commit()
+            moved_total[table_name] += moved
+            if moved < batch_size:
+                break
+            await asyncio.sleep(pause)
+
+    logger.info(f"Архивация удалённых строк старше {after_days} дн.: {moved_total}, "
+                f"{time.monotonic() - started:.1f}s")
+    return moved_total
+
+
+async def run_archival() -> None:
+    """Периодическая архивация; запускается из lifespan приложения при ARCHIVE_ENABLED."""
+    while True:
+        try:
+            await archive_deleted_rows()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка архивации удалённых строк: {e}", exc_info=True)
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL)
+
+
+if __name__ == "__main__":
+    asyncio.run(archive_deleted_rows())
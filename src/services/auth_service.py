@@ -9,22 +9,25 @@ from sqlalchemy.orm import selectinload
 
 from src.models.user_models import RefreshToken, User, Role, Permission 
 from src.schemas import AuthResponse, UserAuthResponse, LogoutResponse
+from src.db_clients.workloads import Workload
 from src.session import db_manager
 from src.utils import jwt_utils 
 from src.utils.jwt_utils import revoke_existing_tokens
+from src.utils.token_service import revoke_one_token
 from src.core.configuration.config import settings
 from src.core.security.password import hash_password
+from src.services.user_lookup import user_email_clause
 
 logger = getLogger(__name__)
 
 async def auth(email: str, password: str,) -> AuthResponse:
-    async with db_manager.get_db_session() as session:
+    async with db_manager.get_db_session(Workload.AUTH) as session:
         query = (
             select(User)
             .options(
                 selectinload(User.role).selectinload(Role.permissions)
             )
-            .where(User.email == email)
+            .where(user_email_clause(email))
         )
 
         result = await session.execute(query)
@@ -76,8 +79,8 @@ async def auth(email: str, password: str,) -> AuthResponse:
 
 
 async def logout(refresh_token: str) -> LogoutResponse:
-    async with db_manager.get_db_session() as session:
-        await jwt_utils.revoke_one_token(session, refresh_token) 
+    async with db_manager.get_db_session(Workload.AUTH) as session:
+        await revoke_one_token(session, refresh_token) 
         await session.commit()
         return LogoutResponse( 
             detail='Выход выполнен успешно'
@@ -2,11 +2,12 @@ from logging import getLogger
 from fastapi import HTTPException, status
 from sqlalchemy import insert
 from datetime import datetime, timezone
-from sqlalchemy import select, insert, update
+from sqlalchemy import select, insert
 
 
 from src.session import db_manager
 from src.models.user_models import Car
+from src.repositories import cars as cars_repository
 
 logger = getLogger(__name__)
 
@@ -30,7 +31,7 @@ async def create_car(payload: dict, user_id_owner: int) -> dict:
 
 
     try:
-        async with db_manager.get_db_session() as session:
+        async with db_manager.get_user_session(user_id_owner) as session:
             stmt = insert(Car).values(
                 user_id_owner=user_id_owner,
                 brand=brand[:20],
@@ -42,10 +43,9 @@ async def create_car(payload: dict, user_id_owner: int) -> dict:
                 is_active=True,
                 is_deleted=False
             )
-            result = await session.execute(stmt)
+            row = (await session.execute(stmt.returning(Car.id, Car.version))).one()
             await session.commit()
-            car_id = result.inserted_primary_key[0]
-            return {"message": "Car created", "car_id": car_id}
+            return {"message": "Car created", "car_id": row.id, "version": row.version}
 
     except HTTPException:
         raise
@@ -57,11 +57,12 @@ async def create_car(payload: dict, user_id_owner: int) -> dict:
         )
 
 
-async def update_car(car_id: int, user_id_owner: int, payload: dict) -> dict:
+async def update_car(car_id: int, user_id_owner: int, payload: dict, expected_version: int | None = None) -> dict:
     """
     Обновляет запись о машине в таблице cars.
     Можно обновлять: brand, model, year, mileage, color
     car_id и user_id_owner используются для проверки прав владельца.
+    expected_version — версия, которую видел клиент: при расхождении 409 и машина не меняется.
     """
     fields_to_update = {}
     if "brand" in payload and payload["brand"]:
@@ -81,23 +82,17 @@ async def update_car(car_id: int, user_id_owner: int, payload: dict) -> dict:
             detail="Нет полей для обновления"
         )
 
-    fields_to_update["updated_at"] = datetime.now(timezone.utc)
-
     try:
-        async with db_manager.get_db_session() as session:
-            stmt = (
-                update(Car)
-                .where(Car.id == car_id, Car.user_id_owner == user_id_owner, Car.is_deleted == False)
-                .values(**fields_to_update)
+        async with db_manager.get_user_session(user_id_owner) as session:
+            version = await cars_repository.update_car(
+                session,
+                user_id_owner=user_id_owner,
+                car_id=car_id,
+                values=fields_to_update,
+                expected_version=expected_version,
             )
-            result = await session.execute(stmt)
-            if result.rowcount == 0:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Машина не найдена или нет прав на изменение"
-                )
             await session.commit()
-            return {"message": "Car updated", "car_id": car_id}
+            return {"message": "Car updated", "car_id": car_id, "version": version}
 
     except HTTPException:
         raise
@@ -115,18 +110,8 @@ async def delete_car(car_id: int, user_id_owner: int) -> dict:
     Проверяет права владельца.
     """
     try:
-        async with db_manager.get_db_session() as session:
-            stmt = (
-                update(Car)
-                .where(Car.id == car_id, Car.user_id_owner == user_id_owner, Car.is_deleted == False)
-                .values(is_deleted=True, deleted_at=datetime.now(timezone.utc), is_active=False)
-            )
-            result = await session.execute(stmt)
-            if result.rowcount == 0:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Машина не найдена или нет прав на удаление"
-                )
+        async with db_manager.get_user_session(user_id_owner) as session:
+            await cars_repository.delete_car(session, user_id_owner=user_id_owner, car_id=car_id)
             await session.commit()
             return {"message": "Car deleted", "car_id": car_id}
 
@@ -144,7 +129,7 @@ async def get_user_cars(user_id_owner: int) -> list[dict]:
     Возвращает список всех активных и не удалённых машин пользователя.
     """
     try:
-        async with db_manager.get_db_session() as session:
+        async with db_manager.get_read_session(user_id=user_id_owner) as session:
             stmt = select(Car).where(
                 Car.user_id_owner == user_id_owner,
                 Car.is_active == True,
@@ -165,10 +150,31 @@ async def get_user_cars(user_id_owner: int) -> list[dict]:
                     "updated_at": car.updated_at,
                     "deleted_at": car.deleted_at,
                     "is_active": car.is_active,
-                    "is_deleted": car.is_deleted
+                    "is_deleted": car.is_deleted,
+                    "version": car.version
                 }
                 for car in cars
             ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при получении списка машин: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Не удалось получить список машин"
+        )
+
+
+async def get_user_cars_json(user_id_owner: int) -> bytes:
+    """
+    То же, что get_user_cars, но ответ {"cars": [...]} целиком собирается в Postgres
+    и возвращается готовыми байтами, без ORM-объектов и сериализации в Python.
+    """
+    try:
+        async with db_manager.get_read_session(user_id=user_id_owner) as session:
+            return await cars_repository.list_cars_json(session, user_id_owner=user_id_owner)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Ошибка при получении списка машин: {e}")
         raise HTTPException(
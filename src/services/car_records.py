@@ -1,15 +1,15 @@
 from logging import getLogger
 from fastapi import HTTPException, status
 from src.utils.s3_loader import upload_image_to_s3, load_image_from_s3
-from src.models.user_models import Car, CarRecord, CarRecordImage
 from io import BytesIO
 from typing import List, Tuple
 
 from typing import List
 from fastapi import UploadFile, HTTPException
-from sqlalchemy import insert, select, update
+from sqlalchemy import insert
 from datetime import datetime, timezone
 from src.session import db_manager
+from src.repositories import car_records as car_records_repository
 from src.models.user_models import CarRecordImage
 import os
 import asyncio
@@ -73,38 +73,22 @@ async def create_car_record(payload: dict, user_id_owner: int, car_id: int, file
         record_date_obj = await parse_date_any_format(date_str=record_date_str)
 
     try:
-        async with db_manager.get_db_session() as session:
-            car_exists = await session.execute(
-                select(Car.id).where(
-                    Car.id == car_id,
-                    Car.user_id_owner == user_id_owner,
-                    Car.is_deleted == False
-                )
-            )
-            if not car_exists.scalar():
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"У пользователя нет машины с id={car_id}"
-                )
-
-            stmt = insert(CarRecord).values(
+        async with db_manager.get_user_session(user_id_owner) as session:
+            record_id = await car_records_repository.create_record(
+                session,
                 user_id_owner=user_id_owner,
                 car_id=car_id,
-                record_type=record_type[:100],
-                name=name[:255],
-                description=description,
-                record_date=record_date_obj,
-                mileage=mileage,
-                service_place=service_place,
-                cost=cost,
-                created_at=datetime.now(timezone.utc),
-                is_active=True,
-                is_deleted=False
+                values={
+                    "record_type": record_type[:100],
+                    "name": name[:255],
+                    "description": description,
+                    "record_date": record_date_obj,
+                    "mileage": mileage,
+                    "service_place": service_place,
+                    "cost": cost,
+                },
             )
-
-            result = await session.execute(stmt)
             await session.commit()
-            record_id = result.inserted_primary_key[0]
 
             if files:
                 files_content = [(file.filename, await file.read()) for file in files]
@@ -142,7 +126,7 @@ async def upload_car_record_images(
     uploaded_keys = []
 
     try:
-        async with db_manager.get_db_session() as session:
+        async with db_manager.get_user_session(owner_user_id) as session:
             for file_name, content in files_content:
                 s3_key = await upload_image_to_s3(file_name, content, folder)
 
@@ -168,34 +152,8 @@ async def upload_car_record_images(
 
 async def delete_car_record(record_id: int, user_id_owner: int) -> dict:
     try:
-        async with db_manager.get_db_session() as session:
-            exists = await session.execute(
-                select(CarRecord.id).where(
-                    CarRecord.id == record_id,
-                    CarRecord.user_id_owner == user_id_owner,
-                    CarRecord.is_deleted == False
-                )
-            )
-            if not exists.scalar():
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"У пользователя нет записи автомобиля с id={record_id}"
-                )
-
-            stmt = (
-                update(CarRecord)
-                .where(
-                    CarRecord.id == record_id,
-                    CarRecord.user_id_owner == user_id_owner
-                )
-                .values(
-                    is_deleted=True,
-                    is_active=False,
-                    deleted_at=datetime.now(timezone.utc)
-                )
-            )
-
-            await session.execute(stmt)
+        async with db_manager.get_user_session(user_id_owner) as session:
+            await car_records_repository.delete_record(session, user_id_owner=user_id_owner, record_id=record_id)
             await session.commit()
             return {"message": "Car record deleted", "record_id": record_id}
 
@@ -213,40 +171,8 @@ async def get_car_records(
         car_id: int
 ) -> list[dict]:
     try:
-        async with db_manager.get_db_session() as session:
-            car_exists = await session.execute(
-                select(Car.id).where(
-                    Car.id == car_id,
-                    Car.user_id_owner == user_id_owner,
-                    Car.is_deleted == False
-                )
-            )
-            if not car_exists.scalar():
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"У пользователя нет машины с id={car_id}"
-                )
-
-            result = await session.execute(
-                select(
-                    CarRecord.id,
-                    CarRecord.user_id_owner,
-                    CarRecord.car_id,
-                    CarRecord.record_type,
-                    CarRecord.name,
-                    CarRecord.record_date,
-                    CarRecord.mileage,
-                    CarRecord.service_place,
-                    CarRecord.cost
-                ).where(
-                    CarRecord.car_id == car_id,
-                    CarRecord.user_id_owner == user_id_owner,
-                    CarRecord.is_deleted == False,
-                    CarRecord.is_active == True
-                ).order_by(CarRecord.created_at.desc())
-            )
-
-            rows = result.all()
+        async with db_manager.get_read_session(user_id=user_id_owner) as session:
+            rows = await car_records_repository.list_records(session, user_id_owner=user_id_owner, car_id=car_id)
 
             return [
                 {
@@ -258,7 +184,8 @@ async def get_car_records(
                     "record_date": r.record_date,
                     "mileage": r.mileage,
                     "service_place": r.service_place,
-                    "cost": r.cost
+                    "cost": r.cost,
+                    "version": r.version
                 }
                 for r in rows
             ]
@@ -274,28 +201,35 @@ async def get_car_records(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Не удалось получить записи автомобиля"
         )
-async def get_car_record_detail(user_id_owner: int, car_id: int, car_record_id: int) -> dict:
+
+
+async def get_car_records_json(user_id_owner: int, car_id: int) -> bytes:
+    """Записи машины JSON-массивом, собранным в Postgres (быстрый путь get_car_records)."""
     try:
-        async with db_manager.get_db_session() as session:
-            record_result = await session.execute(
-                select(CarRecord).where(
-                    CarRecord.id == car_record_id,
-                    CarRecord.car_id == car_id,
-                    CarRecord.user_id_owner == user_id_owner,
-                    CarRecord.is_deleted == False
-                )
+        async with db_manager.get_read_session(user_id=user_id_owner) as session:
+            return await car_records_repository.list_records_json(
+                session, user_id_owner=user_id_owner, car_id=car_id
             )
-            record = record_result.scalar_one_or_none()
-            if not record:
-                raise HTTPException(status_code=404, detail=f"Запись с id={car_record_id} не найдена")
-
-            images_result = await session.execute(
-                select(CarRecordImage.id, CarRecordImage.link_to_s3).where(
-                    CarRecordImage.car_record_id == car_record_id,
-                    CarRecordImage.is_deleted == False
-                )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Ошибка при получении записей автомобиля car_id={car_id} пользователя {user_id_owner}: {e}",
+            exc_info=True
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Не удалось получить записи автомобиля"
+        )
+
+
+async def get_car_record_detail(user_id_owner: int, car_id: int, car_record_id: int) -> dict:
+    try:
+        async with db_manager.get_read_session(user_id=user_id_owner) as session:
+            record, file_keys = await car_records_repository.get_record_detail(
+                session, user_id_owner=user_id_owner, car_id=car_id, record_id=car_record_id
             )
-            file_keys = images_result.all()
 
         images = [
             {"id": img_id, "url": await load_image_from_s3(link)}
@@ -310,6 +244,7 @@ async def get_car_record_detail(user_id_owner: int, car_id: int, car_record_id:
             "mileage": record.mileage,
             "service_place": record.service_place,
             "cost": record.cost,
+            "version": record.version,
             "images": images
         }
 
@@ -325,7 +260,8 @@ async def update_car_record(
         user_id_owner: int,
         car_id: int,
         car_record_id: int,
-        files: list[UploadFile] | None = None
+        files: list[UploadFile] | None = None,
+        expected_version: int | None = None
 ) -> dict:
     record_type = payload.get("record_type")
     name = payload.get("name")
@@ -346,38 +282,23 @@ async def update_car_record(
         record_date_obj = await parse_date_any_format(date_str=record_date_str)
 
     try:
-        async with db_manager.get_db_session() as session:
-            car_record_result = await session.execute(
-                select(CarRecord).where(
-                    CarRecord.id == car_record_id,
-                    CarRecord.car_id == car_id,
-                    CarRecord.user_id_owner == user_id_owner,
-                    CarRecord.is_deleted == False
-                )
-            )
-            car_record = car_record_result.scalar_one_or_none()
-            if not car_record:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Запись с id={car_record_id} не найдена"
-                )
-
-            update_stmt = (
-                update(CarRecord)
-                .where(CarRecord.id == car_record_id)
-                .values(
-                    record_type=record_type[:100],
-                    name=name[:255],
-                    description=description,
-                    record_date=record_date_obj,
-                    mileage=mileage,
-                    service_place=service_place,
-                    cost=cost,
-                    updated_at=datetime.now(timezone.utc)
-                )
+        async with db_manager.get_user_session(user_id_owner) as session:
+            version = await car_records_repository.update_record(
+                session,
+                user_id_owner=user_id_owner,
+                car_id=car_id,
+                record_id=car_record_id,
+                values={
+                    "record_type": record_type[:100],
+                    "name": name[:255],
+                    "description": description,
+                    "record_date": record_date_obj,
+                    "mileage": mileage,
+                    "service_place": service_place,
+                    "cost": cost,
+                },
+                expected_version=expected_version,
             )
-
-            await session.execute(update_stmt)
             await session.commit()
 
             if files:
@@ -391,7 +312,7 @@ async def update_car_record(
                     )
                 )
 
-            return {"message": "Car record updated", "record_id": car_record_id}
+            return {"message": "Car record updated", "record_id": car_record_id, "version": version}
 
     except HTTPException:
         raise
@@ -409,23 +330,9 @@ async def delete_car_record_image(
         image_id: int
 ) -> dict:
     try:
-        async with db_manager.get_db_session() as session:
-            result = await session.execute(
-                select(CarRecordImage).where(
-                    CarRecordImage.id == image_id,
-                    CarRecordImage.car_record_id == car_record_id,
-                    CarRecordImage.owner_user_id == user_id,
-                    CarRecordImage.is_deleted == False
-                )
-            )
-            image = result.scalar_one_or_none()
-            if not image:
-                raise HTTPException(status_code=404, detail="Изображение не найдено или доступ запрещён")
-
-            await session.execute(
-                update(CarRecordImage)
-                .where(CarRecordImage.id == image_id)
-                .values(is_deleted=True, deleted_at=datetime.utcnow())
+        async with db_manager.get_user_session(user_id) as session:
+            await car_records_repository.delete_image(
+                session, user_id=user_id, record_id=car_record_id, image_id=image_id
             )
             await session.commit()
 
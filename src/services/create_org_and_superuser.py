@@ -11,11 +11,16 @@ from src.models.user_models import Organization, User, Role, UserRoles
 from src.schemas import RegistrationRequest, SendCodeRequest
 from src.db_clients.config import RolesConfig
 from src.core.security.password import  hash_password
-from src.utils.code_sendler import send_email
+from src.core.rate_limit import rate_limiter
+from src.services.verify_code_store import code_key, verify_code_store
+from src.services.email_outbox import (
+    enqueue_email, notify_outbox_workers, EMAIL_KIND_CHANGE_CODE, EMAIL_KIND_VERIFY_CODE
+)
 import random
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from services.auth_service import auth, logout
-from src.core.security.email import encrypt_email, decrypt_email
+from src.core.security.email import email_blind_index
+from src.services.user_lookup import user_email_clause, user_email_fields
 
 logger = getLogger(__name__)
 roles = RolesConfig()
@@ -47,9 +52,9 @@ async def check_login_exists(session, login: str):
 
 async def check_email_exists(session, email: str):
     result = await session.execute(
-        select(User).where(User.email == email, User.is_deleted == False)
+        select(User.id, User.is_active).where(user_email_clause(email), User.is_deleted == False)
     )
-    user = result.scalars().first()
+    user = result.first()
 
     if user:
         email_exist = True
@@ -69,7 +74,7 @@ async def check_org_exists(session, email: str):
         )
 
 async def check_user_email_exists(session, email: str):
-    result = await session.execute(select(User).where(User.email == email))
+    result = await session.execute(select(User.id).where(user_email_clause(email)))
     if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -83,22 +88,19 @@ async def create_organization(session, name: str, email: str) -> Organization:
     return org
 
 
-async def create_user_record(session, name: str, email: str, code: int, expires_at, plain_password: str):
+async def create_user_record(session, name: str, email: str, plain_password: str):
     hashed_pwd = hash_password(plain_password)
 
     user = User(
         name=name,
-        email=email,
+        **user_email_fields(email),
         is_active=False,
-        verify_code=code,
-        code_date_expired=expires_at,
         password=hashed_pwd,
         role_id=2,
     )
 
     session.add(user)
     await session.flush()
-    await session.commit()
     return user.id
 
 async def change_password_by_email(email: str, plain_password: str):
@@ -109,7 +111,7 @@ async def change_password_by_email(email: str, plain_password: str):
         result = await session.execute(
             select(User.id)
             .where(
-                User.email == email,
+                user_email_clause(email),
                 User.is_active == True,
                 User.is_deleted == False
             )
@@ -134,30 +136,23 @@ async def change_password_by_email(email: str, plain_password: str):
         return True, "Пароль успешно изменён"
 
 
-async def update_user_verify_code(session, email: str, new_code: int, new_expires_at, is_active: bool = False):
+async def get_user_id_by_email(session, email: str, is_active: bool = False) -> int:
     result = await session.execute(
-        select(User).where(
-            User.email == email,
+        select(User.id).where(
+            user_email_clause(email),
             User.is_active == is_active,
             User.is_deleted == False
         )
     )
-    user = result.scalars().first()
+    user_id = result.scalar()
 
-    if not user:
+    if not user_id:
         raise HTTPException(
             status_code=404,
             detail=f"Пользователь с email {email} не найден или уже активен"
         )
 
-    user.verify_code = new_code
-    user.code_date_expired = new_expires_at
-
-    session.add(user)
-    await session.flush()
-    await session.commit()
-
-    return user.id
+    return user_id
 
 
 
@@ -186,25 +181,21 @@ async def assign_superuser_role(session, superuser_id: int):
     )
 
 
-async def generate_code(digits: int, expire_minutes: int):
-    code = str(random.randint(10 ** (digits - 1), 10 ** digits - 1)).zfill(digits)
-    expires_at = datetime.now(timezone.utc) + timedelta(minutes=expire_minutes)
-    return code, expires_at
+async def generate_code(digits: int) -> str:
+    return str(random.randint(10 ** (digits - 1), 10 ** digits - 1)).zfill(digits)
 
 
 async def send_change_code(payload: SendCodeRequest) -> dict:
     expire_minutes = 15
-    code, expires_at = await generate_code(digits=4, expire_minutes=expire_minutes)
+    code = await generate_code(digits=4)
 
     email = payload.email
-    email_encrypt = encrypt_email(email=email)
 
     try:
         async with db_manager.get_db_session() as session:
-            email_exist, is_active = await check_email_exists(session=session, email=email_encrypt)
+            email_exist, is_active = await check_email_exists(session=session, email=email)
             if email_exist and is_active:
-                user_id =  await update_user_verify_code(
-                    session=session, email=email_encrypt, new_code=code, new_expires_at=expires_at, is_active=True)
+                user_id = await get_user_id_by_email(session=session, email=email, is_active=True)
             elif email_exist and not is_active:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -215,49 +206,64 @@ async def send_change_code(payload: SendCodeRequest) -> dict:
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Пользователь с почтой {email} не существует"
                 )
-            message = await send_email(recipient_emails=email, code=code, expire_minutes=expire_minutes)
-            return {"message": message, "user_id": user_id}
+            await verify_code_store.put(
+                key=code_key(EMAIL_KIND_CHANGE_CODE, email_blind_index(email)), code=code,
+                ttl_seconds=expire_minutes * 60, session=session,
+            )
+            await enqueue_email(
+                session=session, email=email, kind=EMAIL_KIND_CHANGE_CODE,
+                payload={"code": code, "expire_minutes": expire_minutes},
+            )
+            await session.commit()
+            notify_outbox_workers()
+            return {"message": f"Код отправлен, проверьте почту {email}", "user_id": user_id}
 
     except HTTPException:
         raise
 
 async def send_verify_code(payload: SendCodeRequest) -> dict:
     expire_minutes = 15
-    code, expires_at = await generate_code(digits=4, expire_minutes=expire_minutes)
+    code = await generate_code(digits=4)
 
     email = payload.email
-    email_encrypt = encrypt_email(email=email)
 
     try:
         async with db_manager.get_db_session() as session:
-            email_exist, is_active = await check_email_exists(session=session, email=email_encrypt)
+            email_exist, is_active = await check_email_exists(session=session, email=email)
             if email_exist and is_active:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Пользователь с почтой {email} уже существует"
                 )
             elif email_exist and not is_active:
-                user_id =  await update_user_verify_code(
-                    session=session, email=email_encrypt, new_code=code, new_expires_at=expires_at)
+                user_id = await get_user_id_by_email(session=session, email=email)
 
             elif not email_exist and not is_active:
                 user_id =  await create_user_record(
-                    session=session, name=payload.name, email=email_encrypt,
-                    code=code, expires_at=expires_at, plain_password=payload.password
+                    session=session, name=payload.name, email=email, plain_password=payload.password
                 )
-            message = await send_email(recipient_emails=email, code=code, expire_minutes=expire_minutes)
-            return {"message": message, "user_id": user_id}
+            await verify_code_store.put(
+                key=code_key(EMAIL_KIND_VERIFY_CODE, email_blind_index(email)), code=code,
+                ttl_seconds=expire_minutes * 60, session=session,
+            )
+            await enqueue_email(
+                session=session, email=email, kind=EMAIL_KIND_VERIFY_CODE,
+                payload={"code": code, "expire_minutes": expire_minutes},
+            )
+            await session.commit()
+            notify_outbox_workers()
+            return {"message": f"Код отправлен, проверьте почту {email}", "user_id": user_id}
 
     except HTTPException:
         raise
 
 
-async def func_verify_code(code: str, email: str):
-    current_date = datetime.now(timezone.utc)
+async def func_verify_code(code: str, email: str, purpose: str):
+    rate_limiter.hit("verify_code_email", email.lower())
     async with db_manager.get_db_session() as session:
         result = await session.execute(
-            select(User.verify_code, User.code_date_expired, User.is_active)
-            .where(User.email == email, User.is_deleted == False)
+            select(User.is_active)
+            .where(user_email_clause(email), User.is_deleted == False)
         )
         user_row = result.first()
 
@@ -267,28 +273,11 @@ async def func_verify_code(code: str, email: str):
                 detail=f"Пользователь с email {email} не найден"
             )
 
-
-        verify_code, code_date_expired, is_active = user_row
-        is_verified = str(verify_code) == str(code)
-        if not is_active:
-            was_active = False
-            if not is_verified:
-                return is_verified, was_active, "Неверный код"
-
-            if code_date_expired is None:
-                return False, was_active,  "Срок действия кода истек"
-
-            # Приводим к UTC, если нет информации о таймзоне
-            if code_date_expired.tzinfo is None:
-                code_date_expired = code_date_expired.replace(tzinfo=timezone.utc)
-
-            if current_date < code_date_expired:
-                return True, was_active,  "Код подтвержден"
-            else:
-                return False, was_active,  "Срок действия кода истек"
-        else:
-            was_active = True
-            return is_verified, was_active, "Пользовтель уже активен"
+    was_active = user_row[0]
+    check = await verify_code_store.check(key=code_key(purpose, email_blind_index(email)), code=code)
+    if was_active and check.is_verified:
+        return True, was_active, "Пользовтель уже активен"
+    return check.is_verified, was_active, check.message
 
 
 
@@ -297,7 +286,7 @@ async def activate_user_by_email(email: str):
     async with db_manager.get_db_session() as session:
         result = await session.execute(
             select(User.id, User.is_active)
-            .where(User.email == email, User.is_deleted == False)
+            .where(user_email_clause(email), User.is_deleted == False)
         )
         user_row = result.first()
 
@@ -324,13 +313,14 @@ async def activate_user_by_email(email: str):
 async def change_password(payload: RegistrationRequest) -> dict:
     verify_code = payload.verify_code
     email = payload.email
-    email_encrypt = encrypt_email(email=email)
     password = payload.password
 
-    is_verified, was_active, message = await func_verify_code(code=verify_code, email=email_encrypt)
+    is_verified, was_active, message = await func_verify_code(
+        code=verify_code, email=email, purpose=EMAIL_KIND_CHANGE_CODE
+    )
     try:
         if is_verified and was_active:
-            is_active, message = await change_password_by_email(email=email_encrypt, plain_password=password)
+            is_active, message = await change_password_by_email(email=email, plain_password=password)
             return {"message": message}
         elif not is_verified and was_active:
             raise HTTPException(
@@ -349,15 +339,16 @@ async def change_password(payload: RegistrationRequest) -> dict:
 async def create_user(payload: RegistrationRequest) -> dict:
     verify_code = payload.verify_code
     email = payload.email
-    email_encrypt = encrypt_email(email=email)
     password = payload.password
 
-    is_verified, was_active, message = await func_verify_code(code=verify_code, email=email_encrypt)
+    is_verified, was_active, message = await func_verify_code(
+        code=verify_code, email=email, purpose=EMAIL_KIND_VERIFY_CODE
+    )
     try:
         if is_verified and not was_active:
-            is_active, message = await activate_user_by_email(email=email_encrypt)
+            is_active, message = await activate_user_by_email(email=email)
             if is_active:
-                res = await auth(email=email_encrypt, password=password)
+                res = await auth(email=email, password=password)
                 return res
             else:
                 raise HTTPException(
@@ -370,7 +361,7 @@ async def create_user(payload: RegistrationRequest) -> dict:
                 detail=message
             )
         else:
-            res = await auth(email=email_encrypt, password=password)
+            res = await auth(email=email, password=password)
             return res
     except HTTPException:
         raise
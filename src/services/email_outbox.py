@@ -0,0 +1,192 @@
+# src/services/email_outbox.py
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+
+from sqlalchemy import and_, exists, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from src.core.configuration.config import settings
+from src.core.security.email import decrypt_email, email_blind_index, encrypt_email
+from src.db_clients.workloads import Workload
+from src.models.email_models import EmailOutbox, EmailOutboxStatus
+from src.session import db_manager
+from src.utils.code_sendler import deliver_email
+
+logger = getLogger(__name__)
+
+EMAIL_KIND_VERIFY_CODE = "verify_code"
+EMAIL_KIND_CHANGE_CODE = "change_code"
+
+# Будит воркеры текущего процесса сразу после постановки письма в очередь
+_outbox_wakeup = asyncio.Event()
+
+
+async def enqueue_email(session, email: str, kind: str, payload: dict) -> None:
+    """
+    Ставит письмо в outbox в рамках транзакции вызывающего кода (commit делает вызывающий).
+
+    Если для этого адреса и типа письма уже есть неотправленное письмо,
+    оно заменяется новым payload, а не дублируется.
+    """
+    dedupe_key = f"{kind}:{email_blind_index(email)}"
+    stmt = pg_insert(EmailOutbox).values(
+        recipient=encrypt_email(email),
+        kind=kind,
+        payload=payload,
+        dedupe_key=dedupe_key,
+        status=EmailOutboxStatus.PENDING,
+        attempts=0,
+        next_attempt_at=func.now(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EmailOutbox.dedupe_key],
+        index_where=text("status = 'pending'"),
+        set_={
+            "payload": stmt.excluded.payload,
+            "attempts": 0,
+            "last_error": None,
+            "next_attempt_at": func.now(),
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
+
+
+def notify_outbox_workers() -> None:
+    """Вызывается после commit, чтобы воркеры текущего процесса не ждали очередного опроса."""
+    _outbox_wakeup.set()
+
+
+def _backoff(attempts: int) -> timedelta:
+    delay = min(settings.EMAIL_OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1), settings.EMAIL_OUTBOX_BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+async def _claim_batch(batch_size: int) -> list[EmailOutbox]:
+    """
+    Забирает пачку писем в работу: SKIP LOCKED позволяет нескольким воркерам
+    (в том числе из разных процессов) не мешать друг другу. Письма со статусом
+    sending, у которых истекла аренда, считаются брошенными и забираются снова.
+    """
+    now = datetime.now(timezone.utc)
+    due = (
+        select(EmailOutbox.id)
+        .where(
+            or_(
+                and_(EmailOutbox.status == EmailOutboxStatus.PENDING, EmailOutbox.next_attempt_at <= now),
+                and_(EmailOutbox.status == EmailOutboxStatus.SENDING, EmailOutbox.locked_until < now),
+            )
+        )
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due.scalar_subquery()))
+        .values(
+            status=EmailOutboxStatus.SENDING,
+            attempts=EmailOutbox.attempts + 1,
+            locked_until=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS),
+        )
+        .returning(EmailOutbox)
+    )
+    async with db_manager.get_db_session(Workload.BACKGROUND) as session:
+        result = await session.execute(stmt)
+        messages = list(result.scalars().all())
+        await session.commit()
+        return messages
+
+
+async def _mark_sent(message: EmailOutbox) -> None:
+    async with db_manager.get_db_session(Workload.BACKGROUND) as session:
+        await session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == message.id)
+            .values(status=EmailOutboxStatus.SENT, sent_at=func.now(), locked_until=None, last_error=None)
+        )
+        await session.commit()
+
+
+async def _mark_failed(message: EmailOutbox, error: Exception) -> None:
+    error_text = f"{type(error).__name__}: {error}"[:2000]
+    if message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        values = {"status": EmailOutboxStatus.FAILED, "locked_until": None, "last_error": error_text}
+        logger.error(f"Письмо outbox id={message.id} не доставлено после {message.attempts} попыток: {error_text}")
+    else:
+        values = {
+            "status": EmailOutboxStatus.PENDING,
+            "locked_until": None,
+            "last_error": error_text,
+            "next_attempt_at": datetime.now(timezone.utc) + _backoff(message.attempts),
+        }
+        logger.warning(f"Письмо outbox id={message.id}, попытка {message.attempts}: {error_text}")
+
+    newer = aliased(EmailOutbox)
+    has_newer_pending = exists().where(
+        newer.dedupe_key == message.dedupe_key,
+        newer.status == EmailOutboxStatus.PENDING,
+    )
+    stmt = update(EmailOutbox).where(EmailOutbox.id == message.id)
+    try:
+        async with db_manager.get_db_session(Workload.BACKGROUND) as session:
+            if values["status"] == EmailOutboxStatus.PENDING:
+                # Пока письмо отправлялось, мог прийти более свежий код на тот же адрес
+                await session.execute(stmt.where(has_newer_pending).values(status=EmailOutboxStatus.SUPERSEDED))
+                stmt = stmt.where(~has_newer_pending)
+            await session.execute(stmt.values(**values))
+            await session.commit()
+    except IntegrityError:
+        async with db_manager.get_db_session(Workload.BACKGROUND) as session:
+            await session.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id == message.id)
+                .values(status=EmailOutboxStatus.SUPERSEDED, locked_until=None, last_error=error_text)
+            )
+            await session.commit()
+
+
+async def _deliver(message: EmailOutbox) -> None:
+    try:
+        await deliver_email(
+            recipient_emails=decrypt_email(message.recipient),
+            code=message.payload["code"],
+            expire_minutes=message.payload["expire_minutes"],
+        )
+    except Exception as e:
+        await _mark_failed(message, e)
+    else:
+        await _mark_sent(message)
+
+
+async def deliver_pending(batch_size: int | None = None) -> int:
+    """Доставляет одну пачку готовых к отправке писем. Возвращает размер пачки."""
+    messages = await _claim_batch(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if messages:
+        await asyncio.gather(*(_deliver(message) for message in messages))
+    return len(messages)
+
+
+async def run_outbox_worker(worker_id: int = 0) -> None:
+    """Бесконечный цикл доставки; запускается из lifespan приложения."""
+    logger.info(f"Запущен воркер outbox #{worker_id}")
+    while True:
+        try:
+            delivered = await deliver_pending()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка воркера outbox #{worker_id}: {e}", exc_info=True)
+            delivered = 0
+
+        if delivered:
+            continue
+        _outbox_wakeup.clear()
+        try:
+            await asyncio.wait_for(_outbox_wakeup.wait(), timeout=settings.EMAIL_OUTBOX_POLL_INTERVAL)
+        except TimeoutError:
+            pass
@@ -0,0 +1,91 @@
+# src/services/email_reencryption.py
+import asyncio
+import time
+from logging import getLogger
+
+from sqlalchemy import or_, select, update
+
+from src.core.configuration.config import settings
+from src.core.security.email import ACTIVE_KEY_VERSION, decrypt_email
+from src.db_clients.workloads import Workload
+from src.models.user_models import User
+from src.services.user_lookup import user_email_fields
+from src.session import db_manager
+
+logger = getLogger(__name__)
+
+
+async def _reencrypt_batch(after_id: int, batch_size: int) -> tuple[int, int | None]:
+    """
+    Перешифровывает одну пачку пользователей с id > after_id.
+
+    Строки блокируются FOR UPDATE SKIP LOCKED только на время короткой транзакции пачки:
+    строки, занятые запросами приложения, пропускаются и будут обработаны следующим проходом.
+    Возвращает (число обновлённых строк, последний просмотренный id или None, если строк больше нет).
+    """
+    stmt = (
+        select(User.id, User.email)
+        .where(
+            User.id > after_id,
+            or_(User.email_key_version != ACTIVE_KEY_VERSION, User.email_index.is_(None)),
+        )
+        .order_by(User.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    async with db_manager.get_db_session(Workload.BACKGROUND) as session:
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return 0, None
+
+        values = []
+        for row in rows:
+            try:
+                values.append({"id": row.id, **user_email_fields(decrypt_email(row.email))})
+            except Exception as e:
+                logger.error(f"Не удалось расшифровать email пользователя id={row.id}: {e}")
+
+        if values:
+            await session.execute(update(User), values)
+        await session.commit()
+        return len(values), rows[-1].id
+
+
+async def reencrypt_emails(batch_size: int | None = None, pause: float | None = None) -> int:
+    """
+    Переводит email всех пользователей на активный ключ и заполняет blind index.
+
+    Идёт по users keyset-пагинацией по id, каждая пачка — отдельная транзакция,
+    между пачками делается пауза, чтобы не забирать ресурсы у рабочих запросов.
+    Безопасно запускать повторно и параллельно с работающим приложением.
+    """
+    batch_size = batch_size or settings.EMAIL_REENCRYPT_BATCH_SIZE
+    pause = settings.EMAIL_REENCRYPT_PAUSE if pause is None else pause
+
+    started = time.monotonic()
+    total, last_id = 0, 0
+    logger.info(f"Запущено перешифрование email на ключ версии {ACTIVE_KEY_VERSION}")
+    while True:
+        updated, last_id = await _reencrypt_batch(after_id=last_id, batch_size=batch_size)
+        if last_id is None:
+            break
+        total += updated
+        logger.info(f"Перешифровано email: {total} (последний id={last_id})")
+        await asyncio.sleep(pause)
+
+    logger.info(f"Перешифрование email завершено: {total} строк за {time.monotonic() - started:.1f}s")
+    return total
+
+
+async def run_email_reencryption() -> None:
+    """Фоновый запуск из lifespan приложения при EMAIL_REENCRYPT_ON_STARTUP."""
+    try:
+        await reencrypt_emails()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка перешифрования email: {e}", exc_info=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(reencrypt_emails())
@@ -0,0 +1,59 @@
+# src/services/partition_maintenance.py
+import argparse
+import asyncio
+import time
+from logging import getLogger
+
+from sqlalchemy import text
+
+from src.session import db_manager
+
+logger = getLogger(__name__)
+
+PARTITIONED_TABLES = ["car_records"]
+
+_PARTITIONS = text(
+    """
+    SELECT c.oid::regclass::text
+    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = CAST(:parent AS regclass)
+    ORDER BY 1
+    """
+)
+
+
+async def maintain_partitions(
+        table: str = "car_records", reindex: bool = False, only: list[str] | None = None
+) -> None:
+    """
+    Обслуживание секционированной таблицы по одной секции за раз.
+
+    Для каждой секции выполняется VACUUM (ANALYZE), при reindex — ещё REINDEX TABLE CONCURRENTLY,
+    так что блокируется и нагружает диск только одна небольшая секция. В конце анализируется
+    родительская таблица: autovacuum её не анализирует, а статистика по ней нужна планировщику.
+    """
+    async with db_manager.engine.connect() as conn:
+        # VACUUM и REINDEX CONCURRENTLY не выполняются внутри транзакции
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        partitions = (await conn.execute(_PARTITIONS, {"parent": table})).scalars().all()
+        if only:
+            partitions = [name for name in partitions if name in only]
+
+        for partition in partitions:
+            started = time.monotonic()
+            await conn.execute(text(f"VACUUM (ANALYZE) {partition}"))
+            if reindex:
+                await conn.execute(text(f"REINDEX TABLE CONCURRENTLY {partition}"))
+            logger.info(f"Секция {partition} обслужена за {time.monotonic() - started:.1f}s")
+
+        await conn.execute(text(f"ANALYZE {table}"))
+    logger.info(f"Обслуживание {table} завершено: {len(partitions)} секций")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="VACUUM/REINDEX секционированных таблиц по секциям")
+    parser.add_argument("--table", choices=PARTITIONED_TABLES, default="car_records")
+    parser.add_argument("--reindex", action="store_true", help="дополнительно REINDEX TABLE CONCURRENTLY")
+    parser.add_argument("--only", nargs="*", help="имена секций, например car_records_p03")
+    args = parser.parse_args()
+    asyncio.run(maintain_partitions(args.table, reindex=args.reindex, only=args.only))
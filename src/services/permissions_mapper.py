@@ -10,12 +10,15 @@ logger = getLogger(__name__)
 
 async def fetch_permissions_mapping():
     try:
-        async with db_manager.get_db_session() as session:
+        async with db_manager.get_read_session() as session:
             query = select(Permission.code)
             result = await session.execute(query)
             rows = result.scalars().all()
             return {"permissions": rows}
 
+    except HTTPException:
+        raise
+
     except DatabaseError:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
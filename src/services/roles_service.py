@@ -11,11 +11,14 @@ logger = logging.getLogger(__name__)
 
 async def get_all_roles():
     try:
-        async with db_manager.get_db_session() as session:
+        async with db_manager.get_read_session() as session:
             query = select(Role.name)
             result = await session.execute(query)
             return {'roles': result.scalars().all()}
         
+    except HTTPException:
+        raise
+
     except DatabaseError:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -0,0 +1,182 @@
+# src/services/shard_mover.py
+"""
+Перенос данных пользователя между шардами без остановки приложения.
+
+    python -m src.services.shard_mover prepare shard1 1     # диапазон id шарда, один раз при добавлении
+    python -m src.services.shard_mover move 42 shard1        # перенести пользователя 42 в shard1
+
+Порядок переноса:
+  1. user_shards.status = moving: запись данных пользователя отвечает 503, чтение идёт из старого шарда;
+  2. пауза DB_SHARD_MAP_CACHE_TTL + DB_REQUEST_DEADLINE — все воркеры увидели статус,
+     начатые до этого запросы закончились;
+  3. копирование строк в новый шард одной транзакцией (id сохраняются) из одного снимка
+     старого шарда (REPEATABLE READ) и сверка количества;
+  4. user_shards указывает на новый шард, status = active; снова пауза, чтобы воркеры
+     со старой записью в кеше перестали читать из старого шарда;
+  5. удаление строк из старого шарда.
+При ошибке на шагах 2–3 новый шард не меняется, а статус возвращается в active.
+"""
+import argparse
+import asyncio
+from logging import getLogger
+
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.db_clients.config import db_settings
+from src.db_clients.shards import MAIN_SHARD, USER_SHARD
+from src.models.archive_models import CarRecordImagesArchive, CarRecordsArchive, CarsArchive
+from src.models.shard_models import UserShard, UserShardStatus
+from src.models.user_models import Car, CarRecord, CarRecordImage, User
+from src.session import db_manager
+
+logger = getLogger(__name__)
+
+# Таблицы с данными пользователя в порядке вставки (родители раньше детей) и колонка владельца.
+# Строка users копируется только чтобы выполнялись внешние ключи; учётная запись остаётся в основной БД
+USER_TABLES = [
+    (User.__table__, User.__table__.c.id),
+    (Car.__table__, Car.__table__.c.user_id_owner),
+    (CarRecord.__table__, CarRecord.__table__.c.user_id_owner),
+    (CarRecordImage.__table__, CarRecordImage.__table__.c.owner_user_id),
+    (CarsArchive, CarsArchive.c.user_id_owner),
+    (CarRecordsArchive, CarRecordsArchive.c.user_id_owner),
+    (CarRecordImagesArchive, CarRecordImagesArchive.c.owner_user_id),
+]
+
+SHARD_SEQUENCES = ["cars_id_seq", "car_records_id_seq", "car_records_images_id_seq"]
+
+COPY_BATCH_SIZE = 1000
+
+
+def _engine(shard: str):
+    if shard == MAIN_SHARD:
+        return db_manager.engine
+    if shard not in db_manager.shards:
+        raise ValueError(f"Шард {shard} не настроен в DB_SHARDS")
+    return db_manager.shards[shard].engine
+
+
+async def _set_status(user_id: int, shard: str, status: str) -> None:
+    stmt = pg_insert(UserShard).values(user_id=user_id, shard=shard, status=status, updated_at=func.now())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserShard.user_id], set_={"shard": shard, "status": status, "updated_at": func.now()}
+    )
+    async with db_manager.engine.begin() as conn:
+        await conn.execute(stmt)
+
+
+async def _copy_user(user_id: int, source: str, target: str) -> dict[str, int]:
+    copied = {}
+    async with _engine(source).connect() as src, _engine(target).begin() as dst:
+        # Все таблицы читаются из одного снимка: архивация (src/services/archival.py) продолжает
+        # работать в старом шарде, и при READ COMMITTED строка, перенесённая ею между чтениями
+        # cars и cars_archive, попала бы в новый шард дважды или не попала бы вовсе
+        await src.execution_options(isolation_level="REPEATABLE READ")
+        for table, owner_column in USER_TABLES:
+            rows = (await src.execute(select(table).where(owner_column == user_id))).mappings().all()
+            rows = [dict(row) for row in rows]
+            if table is User.__table__:
+                if rows:
+                    await dst.execute(pg_insert(table).on_conflict_do_nothing(index_elements=["id"]), rows)
+                continue
+            for start in range(0, len(rows), COPY_BATCH_SIZE):
+                await dst.execute(insert(table), rows[start:start + COPY_BATCH_SIZE])
+
+            in_target = (
+                await dst.execute(select(func.count()).select_from(table).where(owner_column == user_id))
+            ).scalar_one()
+            if in_target != len(rows):
+                raise RuntimeError(
+                    f"{table.name}: в шарде {target} {in_target} строк пользователя {user_id}, ожидалось {len(rows)}"
+                )
+            copied[table.name] = len(rows)
+    return copied
+
+
+async def _delete_user(user_id: int, shard: str) -> None:
+    async with _engine(shard).begin() as conn:
+        for table, owner_column in reversed(USER_TABLES):
+            if table is User.__table__:
+                continue
+            await conn.execute(delete(table).where(owner_column == user_id))
+
+
+async def move_user(user_id: int, target: str) -> None:
+    _engine(target)
+    async with db_manager.engine.connect() as conn:
+        row = (await conn.execute(USER_SHARD, {"user_id": user_id})).first()
+    source = row.shard if row else MAIN_SHARD
+    if row and row.status == UserShardStatus.MOVING:
+        raise RuntimeError(f"Пользователь {user_id} уже переносится (или прошлый перенос прерван)")
+    if source == target:
+        logger.info(f"Пользователь {user_id} уже в шарде {target}")
+        return
+
+    grace = db_manager.shard_map.ttl + db_settings.db.DB_REQUEST_DEADLINE
+    logger.info(f"Перенос пользователя {user_id}: {source} -> {target}")
+
+    await _set_status(user_id, source, UserShardStatus.MOVING)
+    try:
+        await asyncio.sleep(grace)
+        copied = await _copy_user(user_id, source, target)
+    except BaseException:
+        await _set_status(user_id, source, UserShardStatus.ACTIVE)
+        raise
+    logger.info(f"Скопировано в {target}: {copied}")
+
+    if target == MAIN_SHARD:
+        async with db_manager.engine.begin() as conn:
+            await conn.execute(delete(UserShard).where(UserShard.user_id == user_id))
+    else:
+        async with db_manager.engine.begin() as conn:
+            await conn.execute(
+                update(UserShard)
+                .where(UserShard.user_id == user_id)
+                .values(shard=target, status=UserShardStatus.ACTIVE, updated_at=func.now())
+            )
+
+    await asyncio.sleep(grace)
+    await _delete_user(user_id, source)
+    logger.info(f"Пользователь {user_id} перенесён в шард {target}")
+
+
+async def prepare_shard(shard: str, index: int) -> None:
+    """
+    Сдвигает последовательности id шарда в его диапазон [index * DB_SHARD_ID_RANGE, ...),
+    чтобы id, созданные в разных шардах, не пересекались и строки переносились без смены id.
+    Основная БД — индекс 0.
+    """
+    start = index * db_settings.db.DB_SHARD_ID_RANGE
+    async with _engine(shard).begin() as conn:
+        for sequence in SHARD_SEQUENCES:
+            await conn.execute(
+                text(f"SELECT setval('{sequence}', GREATEST(:start, (SELECT last_value FROM {sequence})))"),
+                {"start": start},
+            )
+    logger.info(f"Последовательности шарда {shard} начинаются не раньше {start}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Перенос пользователей между шардами")
+    commands = parser.add_subparsers(dest="command", required=True)
+    move = commands.add_parser("move", help="перенести данные пользователя в другой шард")
+    move.add_argument("user_id", type=int)
+    move.add_argument("target")
+    prepare = commands.add_parser("prepare", help="выставить диапазон id нового шарда")
+    prepare.add_argument("shard")
+    prepare.add_argument("index", type=int)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "move":
+            await move_user(args.user_id, args.target)
+        else:
+            await prepare_shard(args.shard, args.index)
+    finally:
+        await db_manager.engine.dispose()
+        await db_manager.dispose_shards()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,8 +4,8 @@ from typing import Tuple
 
 from src.utils import jwt_utils, token_service
 from src.core.configuration.config import settings
-from datetime import datetime
 
+from src.db_clients.workloads import Workload
 from src.session import db_manager
 from src.models.user_models import User, Role
 from sqlalchemy import select
@@ -85,13 +85,13 @@ async def rotate_access_token_only_logic(refresh_token_str: str) -> Tuple[str, i
             logger.warning(f"Refresh token with jti={jti} is revoked for access-only rotation")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked")
 
-        if db_token.expires_at < datetime.utcnow(): 
+        if token_service.is_expired(db_token.expires_at):
             logger.warning(f"Refresh token with jti={jti} is expired for access-only rotation")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token expired")
 
 
         # 3. Получаем информацию о пользователе для создания access токена
-        async with db_manager.get_db_session() as session:
+        async with db_manager.get_db_session(Workload.AUTH) as session:
             user_result = await session.execute(select(User).where(User.id == user_id))
             user_obj = user_result.scalar_one_or_none()
             if not user_obj:
@@ -0,0 +1,28 @@
+# src/services/user_lookup.py
+from sqlalchemy import and_, or_
+
+from src.core.security.email import ACTIVE_KEY_VERSION, email_blind_index, encrypt_email, legacy_encrypt_email
+from src.models.user_models import User
+
+
+def user_email_clause(email: str):
+    """
+    Условие поиска пользователя по email.
+
+    Основной путь — blind index. Строки, которые фоновая переиндексация
+    (src/services/email_reencryption.py) ещё не обработала, ищутся по старому
+    детерминированному шифротексту.
+    """
+    return or_(
+        User.email_index == email_blind_index(email),
+        and_(User.email_index.is_(None), User.email == legacy_encrypt_email(email)),
+    )
+
+
+def user_email_fields(email: str) -> dict:
+    """Значения колонок email для новой или перешифрованной строки users."""
+    return {
+        "email": encrypt_email(email),
+        "email_index": email_blind_index(email),
+        "email_key_version": ACTIVE_KEY_VERSION,
+    }
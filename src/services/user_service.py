@@ -10,6 +10,7 @@ from src.schemas import (
     UserStatusChangeResponse, UserResponse, GetUsersByOrgResponse
 )
 from src.session import db_manager
+from src.services.user_lookup import user_email_clause, user_email_fields
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +37,7 @@ async def create_user_in_organization(
             if result_login.scalars().first():
                 raise HTTPException(status_code=409, detail=f"Пользователь с логином '{payload.login}' уже существует")
 
-            result_email = await session.execute(select(User).where(User.email == payload.email))
+            result_email = await session.execute(select(User.id).where(user_email_clause(payload.email)))
             if result_email.scalars().first():
                 raise HTTPException(status_code=409, detail=f"Пользователь с email '{payload.email}' уже существует")
 
@@ -51,7 +52,7 @@ async def create_user_in_organization(
                 login=payload.login,
                 first_name=payload.first_name,
                 last_name=payload.last_name,
-                email=payload.email,
+                **user_email_fields(payload.email),
                 password=hashed_password,
             )
             session.add(new_user)
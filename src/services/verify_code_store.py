@@ -0,0 +1,216 @@
+# src/services/verify_code_store.py
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from logging import getLogger
+
+from sqlalchemy import and_, case, delete, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.core.configuration.config import settings
+from src.db_clients.workloads import Workload
+from src.models.verification_models import VerificationCode
+from src.session import db_manager
+
+logger = getLogger(__name__)
+
+
+class CodeCheckStatus(str, Enum):
+    OK = "ok"
+    INVALID = "invalid"
+    EXPIRED = "expired"
+    MISSING = "missing"
+    LOCKED = "locked"
+
+
+CODE_CHECK_MESSAGES = {
+    CodeCheckStatus.OK: "Код подтвержден",
+    CodeCheckStatus.INVALID: "Неверный код",
+    CodeCheckStatus.EXPIRED: "Срок действия кода истек",
+    CodeCheckStatus.MISSING: "Код не найден или уже использован, запросите новый",
+    CodeCheckStatus.LOCKED: "Превышено число попыток ввода кода, запросите новый",
+}
+
+
+@dataclass
+class CodeCheckResult:
+    status: CodeCheckStatus
+    attempts: int = 0
+
+    @property
+    def is_verified(self) -> bool:
+        return self.status is CodeCheckStatus.OK
+
+    @property
+    def message(self) -> str:
+        return CODE_CHECK_MESSAGES[self.status]
+
+
+def code_key(purpose: str, email: str) -> str:
+    return f"{purpose}:{email}"
+
+
+class VerifyCodeStore(ABC):
+    """
+    Хранилище одноразовых кодов с истечением срока.
+
+    check() — единственный ключевой запрос: он же увеличивает счётчик попыток
+    и помечает код использованным при успешной проверке.
+    """
+
+    def __init__(self, max_attempts: int):
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    async def put(self, key: str, code: str, ttl_seconds: int, session=None) -> None:
+        """Сохраняет новый код (старый код по ключу заменяется, счётчик попыток сбрасывается)."""
+
+    @abstractmethod
+    async def check(self, key: str, code: str) -> CodeCheckResult:
+        ...
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        ...
+
+    def _classify(self, stored_code, attempts, expires_at, consumed) -> CodeCheckResult:
+        if stored_code is None:
+            return CodeCheckResult(CodeCheckStatus.MISSING)
+        if consumed:
+            return CodeCheckResult(CodeCheckStatus.OK, attempts)
+        if expires_at <= datetime.now(timezone.utc):
+            return CodeCheckResult(CodeCheckStatus.EXPIRED, attempts)
+        if attempts > self.max_attempts:
+            return CodeCheckResult(CodeCheckStatus.LOCKED, attempts)
+        return CodeCheckResult(CodeCheckStatus.INVALID, attempts)
+
+
+class PostgresVerifyCodeStore(VerifyCodeStore):
+    """Коды в UNLOGGED-таблице verification_codes; истёкшие удаляются фоновой чисткой."""
+
+    async def put(self, key: str, code: str, ttl_seconds: int, session=None) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+        stmt = pg_insert(VerificationCode).values(key=key, code=str(code), attempts=0, expires_at=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VerificationCode.key],
+            set_={
+                "code": stmt.excluded.code,
+                "attempts": 0,
+                "expires_at": stmt.excluded.expires_at,
+                "consumed_at": None,
+                "created_at": func.now(),
+            },
+        )
+        if session is not None:
+            await session.execute(stmt)
+            return
+        async with db_manager.get_db_session(Workload.AUTH) as own_session:
+            await own_session.execute(stmt)
+            await own_session.commit()
+
+    async def check(self, key: str, code: str) -> CodeCheckResult:
+        matches = and_(
+            VerificationCode.code == str(code),
+            VerificationCode.attempts < self.max_attempts,
+            VerificationCode.expires_at > func.now(),
+        )
+        stmt = (
+            update(VerificationCode)
+            .where(VerificationCode.key == key, VerificationCode.consumed_at.is_(None))
+            .values(
+                attempts=VerificationCode.attempts + 1,
+                consumed_at=case((matches, func.now()), else_=None),
+            )
+            .returning(
+                VerificationCode.code,
+                VerificationCode.attempts,
+                VerificationCode.expires_at,
+                VerificationCode.consumed_at,
+            )
+        )
+        async with db_manager.get_db_session(Workload.AUTH) as session:
+            row = (await session.execute(stmt)).first()
+            await session.commit()
+
+        if row is None:
+            return self._classify(None, 0, None, False)
+        return self._classify(row.code, row.attempts, row.expires_at, row.consumed_at is not None)
+
+    async def purge_expired(self) -> int:
+        async with db_manager.get_db_session(Workload.BACKGROUND) as session:
+            result = await session.execute(
+                delete(VerificationCode).where(VerificationCode.expires_at < func.now())
+            )
+            await session.commit()
+            return result.rowcount
+
+
+@dataclass
+class _MemoryEntry:
+    code: str
+    expires_at: datetime
+    attempts: int = 0
+
+
+class InMemoryVerifyCodeStore(VerifyCodeStore):
+    """
+    Локальная замена для тестов и одиночного процесса.
+    Коды не разделяются между воркерами uvicorn — в проде используйте postgres.
+    """
+
+    def __init__(self, max_attempts: int):
+        super().__init__(max_attempts)
+        self._entries: dict[str, _MemoryEntry] = {}
+
+    async def put(self, key: str, code: str, ttl_seconds: int, session=None) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+        self._entries[key] = _MemoryEntry(code=str(code), expires_at=expires_at)
+
+    async def check(self, key: str, code: str) -> CodeCheckResult:
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._classify(None, 0, None, False)
+
+        entry.attempts += 1
+        matches = (
+            entry.code == str(code)
+            and entry.attempts <= self.max_attempts
+            and entry.expires_at > datetime.now(timezone.utc)
+        )
+        if matches:
+            del self._entries[key]
+        return self._classify(entry.code, entry.attempts, entry.expires_at, matches)
+
+    async def purge_expired(self) -> int:
+        now = datetime.now(timezone.utc)
+        expired = [key for key, entry in self._entries.items() if entry.expires_at < now]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+
+
+def create_verify_code_store(backend: str) -> VerifyCodeStore:
+    if backend == "postgres":
+        return PostgresVerifyCodeStore(max_attempts=settings.VERIFY_CODE_MAX_ATTEMPTS)
+    if backend == "memory":
+        return InMemoryVerifyCodeStore(max_attempts=settings.VERIFY_CODE_MAX_ATTEMPTS)
+    raise ValueError(f"Неизвестный VERIFY_CODE_STORE: {backend}")
+
+
+verify_code_store = create_verify_code_store(settings.VERIFY_CODE_STORE)
+
+
+async def run_verify_code_janitor() -> None:
+    """Периодически удаляет истёкшие коды; запускается из lifespan приложения."""
+    while True:
+        await asyncio.sleep(settings.VERIFY_CODE_PURGE_INTERVAL)
+        try:
+            started = time.monotonic()
+            purged = await verify_code_store.purge_expired()
+            if purged:
+                logger.info(f"Удалено истёкших кодов подтверждения: {purged} за {time.monotonic() - started:.3f}s")
+        except Exception as e:
+            logger.error(f"Ошибка при очистке кодов подтверждения: {e}", exc_info=True)
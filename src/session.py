@@ -1,35 +1,380 @@
+import asyncio
+import time
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from logging import getLogger
 
+from sqlalchemy import event, make_url, text
 from sqlalchemy.exc import DatabaseError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
 
+from src.db_clients import deadlines
+from src.db_clients.circuit_breaker import DB_UNAVAILABLE_ERRORS, CircuitBreaker, DatabaseUnavailable
 from src.db_clients.config import db_settings
+from src.db_clients.pool_metrics import PoolMetrics
+from src.db_clients.query_stats import attach_query_stats
+from src.db_clients.recent_writes import create_recent_writes
+from src.db_clients.replicas import Replica, ReplicaSet
+from src.db_clients.shards import MAIN_SHARD, Shard, ShardMap
+from src.db_clients.strict_loading import enable_strict_loading
+from src.db_clients.workloads import Workload, WorkloadPool
+from src.models.shard_models import UserShardStatus
 
 logger = getLogger(__name__)
 
+# id пользователя текущего запроса; выставляется JWTTokenValidator
+request_user_id: ContextVar[int | None] = ContextVar("request_user_id", default=None)
 
-class DBManager:
-    def __init__(self, db_url: str):
-        self.engine = create_async_engine(
+
+class PrimarySession(Session):
+    """Сессия primary: запоминает, были ли в ней изменения, для read-your-writes."""
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _track_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _track_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _mark_user_write(session):
+    if session.info.pop("has_writes", False):
+        user_id = request_user_id.get()
+        if user_id is not None:
+            db_manager.mark_write(user_id)
+
+
+_SET_STATEMENT_TIMEOUT = text("SELECT set_config('statement_timeout', :timeout, true)")
+
+# statement_timeout сужается, только если до дедлайна осталось меньше этой доли таймаута соединения:
+# иначе лишний запрос на каждую транзакцию, а выигрыш — доли таймаута
+_NARROW_BELOW = 0.5
+
+# Классы нагрузки, пулы которых обслуживают только HTTP-запросы: statement_timeout их соединений
+# не больше DB_REQUEST_DEADLINE, и в начале запроса сужать его не нужно
+_REQUEST_WORKLOADS = (Workload.AUTH, Workload.READ, Workload.WRITE)
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_request_deadline(session, transaction, connection):
+    """
+    В транзакции, открытой при обработке HTTP-запроса, statement_timeout не намного больше
+    оставшегося до дедлайна времени. Стоит одного запроса на транзакцию и выполняется,
+    только если до дедлайна осталось меньше половины statement_timeout соединения;
+    запрос может выйти за дедлайн не больше чем на эту половину.
+    """
+    left = deadlines.remaining()
+    if left is None or connection.dialect.name != "postgresql":
+        return
+    if left <= 0:
+        raise DatabaseUnavailable("Истекло время обработки запроса")
+    timeout = connection.info.get("statement_timeout", db_settings.db.DB_STATEMENT_TIMEOUT)
+    if left < timeout * _NARROW_BELOW:
+        connection.execute(_SET_STATEMENT_TIMEOUT, {"timeout": f"{max(1, int(left * 1000))}ms"})
+
+
+def create_db_engine(db_url: str, pool_size: int | None = None, max_overflow: int | None = None,
+                     pool_timeout: float | None = None, statement_timeout: float | None = None):
+    config = db_settings.db
+    if statement_timeout is None:
+        statement_timeout = config.DB_STATEMENT_TIMEOUT
+    if make_url(db_url).get_backend_name() == "sqlite":
+        # Встроенный режим: параметры asyncpg не применимы, timeout — ожидание блокировки файла базы
+        engine = create_async_engine(
             db_url,
-            pool_pre_ping=True,             # проверяет соединение перед использованием
-            pool_recycle=1800,              # обновляет соединение каждые 30 мин
-            connect_args={"timeout": 160},
+            query_cache_size=config.DB_QUERY_CACHE_SIZE,
+            connect_args={"timeout": config.DB_STATEMENT_TIMEOUT},
+        )
+        attach_query_stats(engine)
+        return engine
+
+    engine = create_async_engine(
+        db_url,
+        pool_pre_ping=True,             # проверяет соединение перед использованием
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_size=config.DB_POOL_SIZE if pool_size is None else pool_size,
+        max_overflow=config.DB_MAX_OVERFLOW if max_overflow is None else max_overflow,
+        pool_timeout=config.DB_POOL_TIMEOUT if pool_timeout is None else pool_timeout,
+        query_cache_size=config.DB_QUERY_CACHE_SIZE,
+        connect_args={
+            "timeout": config.DB_CONNECT_TIMEOUT,
+            "command_timeout": config.DB_COMMAND_TIMEOUT,
+            "statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {
+                "statement_timeout": f"{int(statement_timeout * 1000)}ms",
+                # Даты в JSON, собранном в Postgres (src/repositories/base.py, json_array), — в UTC,
+                # как и datetime, которые asyncpg отдаёт приложению
+                "TimeZone": "UTC",
+            },
+        },
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _remember_statement_timeout(dbapi_connection, connection_record):
+        # Таймаут соединения по умолчанию для _apply_request_deadline
+        connection_record.info["statement_timeout"] = statement_timeout
+
+    attach_query_stats(engine)
+    return engine
+
+
+def create_breaker(name: str) -> CircuitBreaker:
+    config = db_settings.db
+    return CircuitBreaker(
+        name,
+        failure_threshold=config.DB_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=config.DB_BREAKER_RESET_TIMEOUT,
+        half_open_probes=config.DB_BREAKER_HALF_OPEN_PROBES,
+    )
+
+
+class DBManager:
+    def __init__(
+            self,
+            db_url: str,
+            replica_urls: list[str] | None = None,
+            shard_urls: dict[str, str] | None = None,
+            workload_pools: dict[str, tuple[int, float]] | None = None,
+    ):
+        config = db_settings.db
+        workload_pools = workload_pools or {}
+        pool_size, max_overflow = config.get_general_pool_limits(sum(size for size, _ in workload_pools.values()))
+        self.engine = create_db_engine(db_url, pool_size=pool_size, max_overflow=max_overflow)
+        self.session_factory = async_sessionmaker(
+            self.engine, expire_on_commit=False, sync_session_class=PrimarySession
+        )
+        self.pool_metrics = PoolMetrics(self.engine)
+        self.breaker = create_breaker("primary")
+
+        # Пулы классов нагрузки к той же БД; предохранитель у них общий с primary
+        self.workloads: dict[str, WorkloadPool] = {}
+        for name, (size, timeout) in workload_pools.items():
+            statement_timeout = config.DB_STATEMENT_TIMEOUT
+            if name in _REQUEST_WORKLOADS:
+                statement_timeout = min(statement_timeout, config.DB_REQUEST_DEADLINE)
+            engine = create_db_engine(
+                db_url, pool_size=size, max_overflow=0, pool_timeout=timeout, statement_timeout=statement_timeout
+            )
+            self.workloads[name] = WorkloadPool(
+                name=name,
+                engine=engine,
+                session_factory=async_sessionmaker(engine, expire_on_commit=False, sync_session_class=PrimarySession),
+                pool_metrics=PoolMetrics(engine, name=f"workload-{name}"),
+            )
+
+        replicas = []
+        for index, url in enumerate(replica_urls or []):
+            engine = create_db_engine(url)
+            replicas.append(
+                Replica(
+                    name=f"replica-{index}",
+                    engine=engine,
+                    session_factory=async_sessionmaker(engine, expire_on_commit=False),
+                    pool_metrics=PoolMetrics(engine, name=f"replica-{index}"),
+                )
+            )
+        self.replicas = ReplicaSet(
+            replicas, max_lag=config.DB_REPLICA_MAX_LAG, check_timeout=config.DB_REPLICA_CHECK_TIMEOUT
         )
-        self.session_factory = async_sessionmaker(self.engine, expire_on_commit=False)
-        
+        self.sticky_seconds = config.DB_READ_STICKY_SECONDS
+        self.recent_writes = create_recent_writes(
+            config.DB_READ_STICKY_BACKEND, config.DB_READ_STICKY_SHM_NAME, config.DB_READ_STICKY_SLOTS
+        )
+
+        self.shard_map = ShardMap(ttl=config.DB_SHARD_MAP_CACHE_TTL)
+        self.shards: dict[str, Shard] = {}
+        for name, url in (shard_urls or {}).items():
+            engine = create_db_engine(url)
+            self.shards[name] = Shard(
+                name=name,
+                engine=engine,
+                session_factory=async_sessionmaker(engine, expire_on_commit=False),
+                pool_metrics=PoolMetrics(engine, name=f"shard-{name}"),
+                breaker=create_breaker(f"shard-{name}"),
+            )
+
+    @staticmethod
+    async def _checkout(session) -> None:
+        """Берёт соединение для сессии; в HTTP-запросе ожидание пула ограничено дедлайном запроса."""
+        left = deadlines.remaining()
+        if left is None:
+            await session.connection()
+            return
+        if left <= 0:
+            raise DatabaseUnavailable("Истекло время обработки запроса")
+        try:
+            await asyncio.wait_for(session.connection(), timeout=left)
+        except asyncio.TimeoutError:
+            if deadlines.remaining() > 0:
+                raise   # таймаут подключения asyncpg: БД недоступна
+            # Дедлайн истёк в ожидании пула: ответ — 503, а не 500
+            raise DatabaseUnavailable("Истекло время обработки запроса", 1) from None
+
+    def get_db_session(self, workload: str | None = None):
+        """Сессия primary; с workload — из пула этого класса нагрузки (src/db_clients/workloads.py), если он настроен."""
+        pool = self.workloads.get(workload)
+        if pool is None:
+            return self._guarded_session(self.session_factory, self.pool_metrics, self.breaker)
+        return self._guarded_session(pool.session_factory, pool.pool_metrics, self.breaker, bulkhead=True)
+
     @asynccontextmanager
-    async def get_db_session(self):
-        async with self.session_factory() as session:
+    async def _guarded_session(
+            self, session_factory, pool_metrics: PoolMetrics, breaker: CircuitBreaker, bulkhead: bool = False
+    ):
+        # При разомкнутом предохранителе сразу 503, без ожидания пула и таймаутов
+        breaker.before_call()
+        async with session_factory() as session:
+            failed = False
             try:
+                # Соединение берётся сразу, чтобы время ожидания пула попадало в метрики
+                with pool_metrics.measure_wait():
+                    try:
+                        await self._checkout(session)
+                    except PoolTimeoutError:
+                        if not bulkhead:
+                            raise
+                        raise DatabaseUnavailable(f"Пул {pool_metrics.name} занят, повторите запрос позже", 1)
                 yield session
+            except DatabaseUnavailable:
+                # Пул класса нагрузки занят его же запросами или истёк дедлайн запроса:
+                # о доступности БД это ничего не говорит, предохранитель не трогаем
+                failed = True
+                breaker.release_probe()
+                raise
+            except DB_UNAVAILABLE_ERRORS as e:
+                failed = True
+                breaker.record_failure(e)
+                logger.error(f'Ошибка подключения к базе данных: {e!r}')
+                if isinstance(e, DatabaseError):
+                    await session.rollback()
+                raise
             except DatabaseError as e:
                 await session.rollback()
                 logger.error(f'Ошибка подключения к базе данных: {e}')
                 raise
             finally:
+                if not failed:
+                    breaker.record_success()
                 await session.close()
-        
 
-db_manager = DBManager(db_settings.db.get_async_url())
\ No newline at end of file
+    async def shard_for_user(self, user_id: int) -> tuple[str, str]:
+        """(шард, статус) пользователя; без настроенных DB_SHARDS — основной шард без обращения к БД."""
+        if not self.shards:
+            return MAIN_SHARD, UserShardStatus.ACTIVE
+        cached = self.shard_map.get(user_id)
+        if cached is not None:
+            return cached
+        async with self.get_db_session() as session:
+            return await self.shard_map.lookup(session, user_id)
+
+    def _shard_session(self, name: str, workload: str | None = None):
+        if name == MAIN_SHARD:
+            return self.get_db_session(workload)
+        shard = self.shards.get(name)
+        if shard is None:
+            raise RuntimeError(f"Шард {name} не настроен в DB_SHARDS")
+        return self._guarded_session(shard.session_factory, shard.pool_metrics, shard.breaker)
+
+    @asynccontextmanager
+    async def get_user_session(self, user_id: int):
+        """
+        Сессия для чтения и записи данных пользователя (машины, записи, изображения) в его шарде.
+
+        Пока данные пользователя переносятся в другой шард, запись запрещена: сразу 503 с Retry-After.
+        """
+        shard, status = await self.shard_for_user(user_id)
+        if status == UserShardStatus.MOVING:
+            raise DatabaseUnavailable("Данные пользователя переносятся, повторите запрос позже", self.shard_map.ttl)
+        async with self._shard_session(shard, Workload.WRITE) as session:
+            yield session
+
+    def mark_write(self, user_id: int) -> None:
+        """Следующие DB_READ_STICKY_SECONDS секунд чтения пользователя идут в primary."""
+        self.recent_writes.mark(user_id, time.time() + self.sticky_seconds)
+
+    def _is_sticky(self, user_id: int | None) -> bool:
+        return user_id is not None and self.recent_writes.is_sticky(user_id)
+
+    @asynccontextmanager
+    async def get_read_session(self, user_id: int | None = None):
+        """
+        Сессия только для чтения: с реплики, если она есть и здорова, иначе с primary.
+
+        Пользователь, который только что что-то записал, читает с primary
+        (user_id берётся из аргумента или из request_user_id). Если реплика не отдала
+        соединение, она исключается до следующей проверки, а чтение уходит в primary.
+        Отметки о записях общие для воркеров хоста (src/db_clients/recent_writes.py).
+        """
+        if user_id is None:
+            user_id = request_user_id.get()
+        if self.shards and user_id is not None:
+            # Read-реплики есть только у основного шарда; во время переноса чтение идёт из старого шарда
+            shard, _ = await self.shard_for_user(user_id)
+            if shard != MAIN_SHARD:
+                async with self._shard_session(shard) as session:
+                    yield session
+                return
+
+        replica = None if self._is_sticky(user_id) else self.replicas.choose()
+        if replica is None:
+            async with self.get_db_session(Workload.READ) as session:
+                yield session
+            return
+
+        session = replica.session_factory()
+        try:
+            with replica.pool_metrics.measure_wait():
+                await self._checkout(session)
+        except DatabaseUnavailable:
+            await session.close()
+            raise
+        except Exception as e:
+            await session.close()
+            replica.mark_unhealthy(e)
+            async with self.get_db_session(Workload.READ) as primary_session:
+                yield primary_session
+            return
+
+        try:
+            yield session
+        except DatabaseError as e:
+            logger.error(f'Ошибка чтения с реплики {replica.name}: {e}')
+            raise
+        finally:
+            await session.close()
+
+    async def dispose_workloads(self) -> None:
+        for pool in self.workloads.values():
+            await pool.engine.dispose()
+
+    async def dispose_shards(self) -> None:
+        for shard in self.shards.values():
+            await shard.engine.dispose()
+
+    async def run_replica_health_checker(self) -> None:
+        """Периодически проверяет реплики; запускается из lifespan приложения."""
+        interval = db_settings.db.DB_REPLICA_CHECK_INTERVAL
+        while True:
+            try:
+                await self.replicas.check_all()
+            except Exception as e:
+                logger.error(f"Ошибка проверки реплик: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+
+if db_settings.db.DB_STRICT_LOADING:
+    enable_strict_loading()
+
+db_manager = DBManager(
+    db_settings.db.get_async_url(),
+    db_settings.db.get_replica_async_urls(),
+    db_settings.db.get_shard_async_urls(),
+    db_settings.db.get_workload_pools(),
+)
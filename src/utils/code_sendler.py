@@ -1,17 +1,23 @@
 import os
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import asyncio
 from dotenv import load_dotenv
 import logging
 
+from aiosmtplib import SMTPAuthenticationError, SMTPException, SMTPRecipientRefused, SMTPRecipientsRefused
+
+from src.core.configuration.config import settings
+from src.utils.smtp_pool import SMTPConnectionPool
+
 load_dotenv()
 
 SENDER_EMAIL = os.getenv("sender_email")
 SENDER_PASSWORD = os.getenv("password")  # пароль приложения
 
-if not SENDER_EMAIL or not SENDER_PASSWORD:
+if settings.EMBEDDED:
+    # Письма принимает SMTP sink без проверки учётных данных
+    SENDER_EMAIL = SENDER_EMAIL or "noreply@localhost"
+elif not SENDER_EMAIL or not SENDER_PASSWORD:
     raise ValueError("Не заданы переменные sender_email или password")
 
 # Настройка логирования
@@ -21,7 +27,26 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
-async def send_email(recipient_emails, code, expire_minutes):
+smtp_pool = SMTPConnectionPool(
+    hostname=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=SENDER_EMAIL,
+    password=SENDER_PASSWORD,
+    size=settings.SMTP_POOL_SIZE,
+    timeout=settings.SMTP_TIMEOUT,
+    start_tls=settings.SMTP_START_TLS,
+    idle_timeout=settings.SMTP_IDLE_TIMEOUT,
+)
+
+
+async def deliver_email(recipient_emails, code, expire_minutes) -> None:
+    """
+    Отправляет письмо с кодом и пробрасывает ошибки SMTP наружу.
+    Используется воркерами outbox, которым нужен результат доставки.
+    """
+    if isinstance(recipient_emails, str):
+        recipient_emails = [recipient_emails]
+
     message = MIMEMultipart()
     message["From"] = SENDER_EMAIL
     message["To"] = ", ".join(recipient_emails)
@@ -30,21 +55,31 @@ async def send_email(recipient_emails, code, expire_minutes):
     email_body = await generate_verification_email_html( code=code, expire_minutes=expire_minutes)
     message.attach(MIMEText(email_body, "html"))
 
+    logging.info(f"Начинаем отправку письма на: {recipient_emails}")
+    result = await smtp_pool.send_message(message)
+    if result:
+        raise SMTPRecipientsRefused([
+            SMTPRecipientRefused(response.code, response.message, recipient)
+            for recipient, response in result.items()
+        ])
+    logging.info("Письмо успешно отправлено!")
+
+
+async def send_email(recipient_emails, code, expire_minutes):
+    if isinstance(recipient_emails, str):
+        recipient_emails = [recipient_emails]
+
     try:
-        logging.info(f"Начинаем отправку письма на: {recipient_emails}")
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(SENDER_EMAIL, SENDER_PASSWORD)
-            result = server.sendmail(SENDER_EMAIL, recipient_emails, message.as_string())
-            if result:
-                logging.warning(f"Проблемы с доставкой на адреса: {result}")
-            else:
-                logging.info("Письмо успешно отправлено!")
-        return f"Письмо успешно отправлено, проверьте почту {recipient_emails}"
-    except smtplib.SMTPAuthenticationError:
+        await deliver_email(recipient_emails, code, expire_minutes)
+        return f"Письмо успешно отправлено, проверьте почту {', '.join(recipient_emails)}"
+    except SMTPAuthenticationError:
         logging.error("Ошибка аутентификации: проверь пароль приложения")
-    except smtplib.SMTPException as e:
+    except SMTPRecipientsRefused as e:
+        logging.warning(f"Проблемы с доставкой на адреса: {e.recipients}")
+    except SMTPException as e:
         logging.error(f"SMTP ошибка: {e}")
+    except TimeoutError:
+        logging.error(f"Превышено время отправки письма ({settings.SMTP_TIMEOUT} с)")
     except Exception as e:
         logging.error(f"Ошибка при отправке: {e}")
 
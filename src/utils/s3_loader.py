@@ -1,24 +1,32 @@
 import os
 import uuid
-import boto3
-from botocore.client import Config
 from fastapi import UploadFile, HTTPException
+from src.core.configuration.config import settings
 from src.core.logger import logger
 
 # logger = logger("s3_upload")
 
 S3_ENDPOINT = os.getenv("S3_ENDPOINT")
-S3_BUCKET = os.getenv("S3_BUCKET")
+S3_BUCKET = os.getenv("S3_BUCKET") or ("embedded" if settings.EMBEDDED else None)
 S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
 S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
 
-s3 = boto3.client(
-    "s3",
-    endpoint_url=S3_ENDPOINT,
-    aws_access_key_id=S3_ACCESS_KEY,
-    aws_secret_access_key=S3_SECRET_KEY,
-    config=Config(signature_version="s3v4"),
-)
+if settings.EMBEDDED:
+    from src.utils.s3_memory import InMemoryS3
+
+    s3 = InMemoryS3()
+else:
+    # boto3 импортируется только здесь: во встроенном режиме он не нужен, а импорт заметно удлиняет старт
+    import boto3
+    from botocore.client import Config
+
+    s3 = boto3.client(
+        "s3",
+        endpoint_url=S3_ENDPOINT,
+        aws_access_key_id=S3_ACCESS_KEY,
+        aws_secret_access_key=S3_SECRET_KEY,
+        config=Config(signature_version="s3v4"),
+    )
 
 ALLOWED_EXTENSIONS = {".png", ".jpeg", ".jpg"}
 
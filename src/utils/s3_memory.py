@@ -0,0 +1,35 @@
+# src/utils/s3_memory.py
+import threading
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+
+class InMemoryS3:
+    """
+    Замена клиента boto3 S3 для встроенного режима: объекты хранятся в памяти процесса.
+
+    Реализует только методы, которыми пользуется src/utils/s3_loader.py, с теми же
+    именованными аргументами. Presigned URL имеет вид memory://<bucket>/<key> и нужен
+    лишь для того, чтобы ответы API выглядели так же, как с настоящим S3.
+    """
+
+    def __init__(self):
+        self._objects: dict[tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **kwargs) -> dict:
+        with self._lock:
+            self._objects[(Bucket, Key)] = bytes(Body)
+        logger.debug(f"S3 в памяти: сохранён {Bucket}/{Key} ({len(Body)} байт)")
+        return {}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        with self._lock:
+            body = self._objects.get((Bucket, Key))
+        if body is None:
+            raise KeyError(f"Объект {Bucket}/{Key} не найден")
+        return {"Body": body, "ContentLength": len(body)}
+
+    def generate_presigned_url(self, ClientMethod: str, Params: dict, ExpiresIn: int = 3600, **kwargs) -> str:
+        return f"memory://{Params['Bucket']}/{Params['Key']}"
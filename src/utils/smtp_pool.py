@@ -0,0 +1,110 @@
+# src/utils/smtp_pool.py
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.message import Message
+from logging import getLogger
+
+from aiosmtplib import SMTP, SMTPException, SMTPServerDisconnected
+
+logger = getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """
+    Небольшой пул авторизованных SMTP-соединений.
+
+    Соединение открывается (TCP + STARTTLS + LOGIN) один раз и переиспользуется
+    для следующих писем. Перед выдачей соединения, простоявшего дольше
+    idle_timeout, выполняется NOOP: сервер мог закрыть его по таймауту.
+    """
+
+    def __init__(
+            self,
+            hostname: str,
+            port: int,
+            username: str | None = None,
+            password: str | None = None,
+            size: int = 3,
+            timeout: float = 15.0,
+            start_tls: bool = True,
+            idle_timeout: float = 60.0,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username or None
+        self.password = password or None
+        self.size = size
+        self.timeout = timeout
+        self.start_tls = start_tls
+        self.idle_timeout = idle_timeout
+
+        self._idle: list[tuple[SMTP, float]] = []
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def _connect(self) -> SMTP:
+        client = SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            timeout=self.timeout,
+            start_tls=self.start_tls,
+        )
+        await client.connect()
+        logger.debug(f"Открыто SMTP-соединение с {self.hostname}:{self.port}")
+        return client
+
+    async def _acquire(self) -> SMTP:
+        while self._idle:
+            client, released_at = self._idle.pop()
+            if not client.is_connected:
+                continue
+            if time.monotonic() - released_at < self.idle_timeout:
+                return client
+            try:
+                await client.noop()
+                return client
+            except SMTPException:
+                await self._discard(client)
+        return await self._connect()
+
+    async def _discard(self, client: SMTP) -> None:
+        try:
+            if client.is_connected:
+                await client.quit()
+        except SMTPException:
+            client.close()
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self._semaphore:
+            client = await self._acquire()
+            try:
+                yield client
+            except BaseException:
+                client.close()
+                raise
+            else:
+                self._idle.append((client, time.monotonic()))
+
+    async def send_message(self, message: Message) -> dict:
+        """
+        Отправляет письмо через соединение из пула.
+        Если сервер успел закрыть соединение, письмо повторяется один раз на новом соединении.
+        Возвращает словарь адресов, которые сервер отклонил.
+        """
+        async with asyncio.timeout(self.timeout):
+            try:
+                async with self.connection() as client:
+                    errors, _ = await client.send_message(message)
+            except SMTPServerDisconnected:
+                logger.info("SMTP-соединение закрыто сервером, повторяем отправку на новом соединении")
+                async with self.connection() as client:
+                    errors, _ = await client.send_message(message)
+        return errors
+
+    async def close(self) -> None:
+        while self._idle:
+            client, _ = self._idle.pop()
+            await self._discard(client)
@@ -0,0 +1,101 @@
+# src/utils/smtp_sink.py
+import asyncio
+from dataclasses import dataclass, field
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class SinkMessage:
+    mail_from: str
+    rcpt_to: list[str]
+    data: bytes
+
+
+@dataclass
+class SMTPSink:
+    """
+    Локальный SMTP-сервер, который принимает письма и складывает их в память.
+
+    Нужен для тестов и бенчмарков: поддерживает EHLO, AUTH PLAIN (любые учётные
+    данные), MAIL/RCPT/DATA, NOOP, RSET и QUIT. STARTTLS не поддерживается,
+    поэтому клиент должен работать с SMTP_START_TLS=false.
+    """
+
+    host: str = "127.0.0.1"
+    port: int = 1025
+    messages: list[SinkMessage] = field(default_factory=list)
+    _server: asyncio.Server | None = field(default=None, init=False, repr=False)
+
+    async def start(self) -> "SMTPSink":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"SMTP sink слушает {self.host}:{self.port}")
+        return self
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "SMTPSink":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+
+        mail_from, rcpt_to = "", []
+        reply("220 smtp-sink ready")
+        try:
+            while line := await reader.readline():
+                command = line.decode(errors="replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+
+                if verb in ("EHLO", "HELO"):
+                    reply("250-smtp-sink")
+                    reply("250-AUTH PLAIN")
+                    reply("250 8BITMIME")
+                elif verb == "AUTH":
+                    reply("235 Authentication successful")
+                elif verb == "MAIL":
+                    mail_from, rcpt_to = command[10:].strip("<> "), []
+                    reply("250 OK")
+                elif verb == "RCPT":
+                    rcpt_to.append(command[8:].strip("<> "))
+                    reply("250 OK")
+                elif verb == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    chunks = []
+                    while (chunk := await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        chunks.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                    self.messages.append(SinkMessage(mail_from, rcpt_to, b"".join(chunks)))
+                    reply("250 OK: queued")
+                elif verb in ("NOOP", "RSET"):
+                    reply("250 OK")
+                elif verb == "QUIT":
+                    reply("221 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    reply("502 Command not implemented")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def main(host: str = "127.0.0.1", port: int = 1025) -> None:
+    async with SMTPSink(host=host, port=port):
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,8 +1,8 @@
 # src/utils/token_service.py
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status
-from sqlalchemy import select, update
+from sqlalchemy import update
 
 # Импортируем нужные функции из jwt_utils
 from src.utils.jwt_utils import (
@@ -11,8 +11,10 @@ from src.utils.jwt_utils import (
     decode_jwt_token,
     # revoke_existing_tokens, # Если revoke_existing_tokens перенесена в jwt_utils, импортируем оттуда
 )
-from src.models.user_models import RefreshToken, User
+from src.models.user_models import RefreshToken
+from src.db_clients.workloads import Workload
 from src.session import db_manager
+from src.db_clients import statements
 from src.core.configuration.config import settings
 
 logger = logging.getLogger(__name__)
@@ -20,15 +22,21 @@ logger = logging.getLogger(__name__)
 
 # --- Работа с refresh токенами в БД ---
 
+def is_expired(expires_at: datetime) -> bool:
+    """
+    expires_at из timestamptz приходит из Postgres с часовым поясом, а из SQLite — без него (UTC);
+    сравнение с naive datetime.utcnow() для Postgres падало с TypeError.
+    """
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at < datetime.now(timezone.utc)
+
+
 async def get_refresh_token_from_db(jti: str, user_id: int):
     """Получает refresh токен из БД по jti и user_id."""
     try:
-        async with db_manager.get_db_session() as session:
-            result = await session.execute(
-                select(RefreshToken).where(
-                    RefreshToken.jti == jti, RefreshToken.user_id == user_id
-                )
-            )
+        async with db_manager.get_db_session(Workload.AUTH) as session:
+            result = await session.execute(statements.REFRESH_TOKEN_BY_JTI, {"jti": jti, "user_id": user_id})
             return result.scalar_one_or_none()
     except Exception as e:
         logger.error(f"Database error fetching refresh token: {e}")
@@ -41,7 +49,7 @@ async def get_refresh_token_from_db(jti: str, user_id: int):
 async def revoke_refresh_token_in_db(jti: str):
     """Помечает refresh токен как отозванный в БД."""
     try:
-        async with db_manager.get_db_session() as session:
+        async with db_manager.get_db_session(Workload.AUTH) as session:
             await session.execute(
                 update(RefreshToken).where(RefreshToken.jti == jti).values(revoked=True)
             )
@@ -68,7 +76,7 @@ async def save_refresh_token_to_db(user_id: int, token: str, jti: str):
             expires_at=expires_at,
             revoked=False,
         )
-        async with db_manager.get_db_session() as session:
+        async with db_manager.get_db_session(Workload.AUTH) as session:
             session.add(new_db_token)
             await session.commit()
             logger.debug(f"Saved new refresh token for user_id={user_id}, jti={jti}")
@@ -123,7 +131,7 @@ async def rotate_refresh_token(old_refresh_token: str) -> tuple[str, str]:
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked"
         )
 
-    if db_token.expires_at < datetime.utcnow():
+    if is_expired(db_token.expires_at):
         logger.warning(f"Refresh token with jti={jti} is expired")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token expired"
@@ -134,8 +142,8 @@ async def rotate_refresh_token(old_refresh_token: str) -> tuple[str, str]:
     await save_refresh_token_to_db(user_id=user_id, token=new_refresh_token_str, jti=new_jti)
 
     try:
-        async with db_manager.get_db_session() as session:
-            user_result = await session.execute(select(User).where(User.id == user_id))
+        async with db_manager.get_db_session(Workload.AUTH) as session:
+            user_result = await session.execute(statements.PRINCIPAL_BY_ID, {"user_id": user_id})
             user_obj = user_result.scalar_one_or_none()
             if not user_obj:
                 logger.error(f"User with id={user_id} not found during token rotation")
@@ -144,7 +152,6 @@ async def rotate_refresh_token(old_refresh_token: str) -> tuple[str, str]:
                     detail="User data error",
                 )
 
-            await session.refresh(user_obj, ["role"])
             new_access_token_str = await create_access_token(user_id=user_id)
 
             return new_access_token_str, new_refresh_token_str
@@ -175,8 +182,7 @@ async def revoke_one_token(session, refresh_token: str):
 
 async def validate_token(session, refresh_token: str):
     """Проверяет токен на валидность"""
-    stmt = select(RefreshToken).where(RefreshToken.token == refresh_token)
-    result = await session.execute(stmt)
+    result = await session.execute(statements.REFRESH_TOKEN_BY_VALUE, {"token": refresh_token})
     token = result.scalar_one_or_none()
 
     if not token:
@@ -191,7 +197,7 @@ async def validate_token(session, refresh_token: str):
             detail='Токен уже инвалидирован'
         )
     
-    if token.expires_at < datetime.utcnow():
+    if is_expired(token.expires_at):
         raise HTTPException(
             status_code=status.HTTP_200_OK,
             detail='У токена закончился срок действия'
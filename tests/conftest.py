@@ -0,0 +1,118 @@
+# tests/conftest.py
+"""
+Тесты работают во встроенном режиме (APP_MODE=embedded): база в SQLite-файле процесса,
+S3 и SMTP в памяти (src/db_clients/embedded.py). Настройки читаются при импорте src,
+поэтому режим задаётся до первого импорта приложения.
+
+С APP_MODE=server тесты идут против Postgres из .env (схема — миграции); тесты,
+которым нужны S3 и SMTP в памяти, тогда пропускаются, а отмеченные slow — наоборот,
+выполняются только на Postgres.
+
+Приложение поднимается один раз на сессию через TestClient вместе с lifespan.
+Корутины, которые работают с db_manager напрямую, выполняются фикстурой run в цикле
+событий приложения — там же, где живут соединения пулов.
+"""
+import os
+import uuid
+
+os.environ.setdefault("APP_MODE", "embedded")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+API = "/api/v1"
+
+
+@pytest.fixture(scope="session")
+def app():
+    from src.server import app
+
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def run(client):
+    """run(async_function, *args) — результат корутины, выполненной в цикле событий приложения."""
+    return client.portal.call
+
+
+async def _create_user(email: str) -> int:
+    from src.models.user_models import User
+    from src.services.user_lookup import user_email_fields
+    from src.session import db_manager
+
+    async with db_manager.get_db_session() as session:
+        user = User(name="Тест", **user_email_fields(email), password="-", is_active=True, role_id=2)
+        session.add(user)
+        await session.commit()
+        return user.id
+
+
+@pytest.fixture
+def make_user(run):
+    """Создаёт активного пользователя в базе; возвращает (user_id, заголовки с access-токеном)."""
+    from src.utils.jwt_utils import create_access_token
+
+    def make() -> tuple[int, dict]:
+        user_id = run(_create_user, f"user-{uuid.uuid4().hex}@example.com")
+        return user_id, {"Authorization": f"Bearer {run(create_access_token, user_id)}"}
+
+    return make
+
+
+@pytest.fixture
+def strict_loading():
+    """Строгая загрузка связей (DB_STRICT_LOADING) на время теста."""
+    from src.db_clients.strict_loading import disable_strict_loading, enable_strict_loading
+
+    enable_strict_loading()
+    yield
+    disable_strict_loading()
+
+
+@pytest.fixture
+def captured_sql():
+    """Текст SQL, который приложение отправляет в primary (общий пул и пулы классов нагрузки) во время теста."""
+    from sqlalchemy import event
+
+    from src.session import db_manager
+
+    statements = []
+    engines = [db_manager.engine.sync_engine, *(pool.engine.sync_engine for pool in db_manager.workloads.values())]
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+@pytest.fixture
+def create_car(client):
+    def create(headers: dict, **fields) -> int:
+        payload = {"brand": "Lada", "model": "Vesta", "year": 2020, "mileage": 1000, "color": "белый", **fields}
+        response = client.post(f"{API}/cars/create", json=payload, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()["car_id"]
+
+    return create
+
+
+@pytest.fixture
+def create_record(client):
+    def create(headers: dict, car_id: int, files: list | None = None, **fields) -> int:
+        data = {"car_id": car_id, "record_type": "service", "name": "ТО", "description": "Замена масла", **fields}
+        response = client.post(f"{API}/cars_records/create", data=data, files=files or None, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()["record_id"]
+
+    return create
@@ -0,0 +1,11 @@
+# tests/test_archive_models.py
+import pytest
+
+from src.models.archive_models import CarRecordImagesArchive, CarRecordsArchive, CarsArchive
+
+
+@pytest.mark.parametrize("table", [CarsArchive, CarRecordsArchive, CarRecordImagesArchive], ids=lambda t: t.name)
+def test_archive_primary_key_is_id(table):
+    # Как в миграции 0004: у секционированной car_records ключ составной, у архива — нет
+    assert [column.name for column in table.primary_key] == ["id"]
+    assert all(not column.nullable for column in table.primary_key)
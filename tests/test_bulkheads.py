@@ -0,0 +1,92 @@
+# tests/test_bulkheads.py
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db_clients import deadlines
+from src.db_clients.circuit_breaker import DatabaseUnavailable
+from src.db_clients.config import db_settings
+from src.db_clients.pool_metrics import PoolMetrics
+from src.session import create_breaker, db_manager
+
+
+class FakeSession:
+    """Сессия, которая не может получить соединение: пул исчерпан или ожидание зависает."""
+
+    def __init__(self, error: Exception | None):
+        self.error = error
+
+    async def connection(self):
+        if self.error is not None:
+            raise self.error
+        await asyncio.sleep(10)
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def _open(error: Exception | None, breaker, bulkhead: bool, deadline: float | None = None):
+    metrics = PoolMetrics(create_async_engine("sqlite+aiosqlite://"), name="workload-test")
+    token = deadlines.request_deadline.set(None if deadline is None else time.monotonic() + deadline)
+    try:
+        async with db_manager._guarded_session(lambda: FakeSession(error), metrics, breaker, bulkhead=bulkhead):
+            pass
+    finally:
+        deadlines.request_deadline.reset(token)
+
+
+@pytest.mark.parametrize("error, deadline", [
+    (PoolTimeoutError("QueuePool limit reached"), None),   # пул класса исчерпан
+    (None, 0.05),                                            # дедлайн истёк раньше таймаута пула
+])
+def test_busy_bulkhead_is_503_without_breaker_failure(error, deadline):
+    breaker = create_breaker("test")
+    for _ in range(breaker.failure_threshold + 1):
+        with pytest.raises(DatabaseUnavailable) as raised:
+            asyncio.run(_open(error, breaker, bulkhead=True, deadline=deadline))
+        assert raised.value.status_code == 503
+    assert breaker.snapshot() == {"state": "closed", "failures": 0}
+
+
+def test_general_pool_timeout_counts_as_failure():
+    breaker = create_breaker("test")
+    with pytest.raises(PoolTimeoutError):
+        asyncio.run(_open(PoolTimeoutError("QueuePool limit reached"), breaker, bulkhead=False))
+    assert breaker.failures == 1
+
+
+def test_deadline_does_not_use_up_half_open_probe():
+    breaker = create_breaker("test")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(OSError("connection refused"))
+    breaker.opened_at -= breaker.reset_timeout
+
+    with pytest.raises(DatabaseUnavailable):
+        asyncio.run(_open(None, breaker, bulkhead=True, deadline=0.05))
+    # Проба не израсходована: следующий запрос снова пропускается к БД
+    breaker.before_call()
+    assert breaker.state == "half_open"
+
+
+def test_workload_pools_fit_in_pool_budget(monkeypatch):
+    config = db_settings.db
+    monkeypatch.setattr(config, "DB_POOL_SIZE", 5)
+    monkeypatch.setattr(config, "DB_MAX_OVERFLOW", 10)
+    assert config.get_general_pool_limits(0) == (5, 10)
+    # Пулы auth/read/write/background по умолчанию: 2 + 4 + 4 + 1
+    assert config.get_general_pool_limits(11) == (4, 0)
+    assert config.get_general_pool_limits(8) == (5, 2)
+    with pytest.raises(ValueError):
+        config.get_general_pool_limits(15)
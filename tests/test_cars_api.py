@@ -0,0 +1,133 @@
+# tests/test_cars_api.py
+import time
+
+import pytest
+from sqlalchemy import select
+
+from src.db_clients.config import db_settings
+from src.models.user_models import CarRecord, CarRecordImage
+from src.session import db_manager
+from tests.conftest import API
+
+# Изображения записей уходят в S3, который в памяти есть только во встроенном режиме
+pytestmark = pytest.mark.skipif(not db_settings.db.EMBEDDED, reason="нужен встроенный режим (APP_MODE=embedded)")
+
+CAR = {"brand": "Lada", "model": "Vesta", "year": 2020, "mileage": 1000, "color": "белый"}
+
+
+async def _record_rows(car_id: int):
+    async with db_manager.get_db_session() as session:
+        records = (await session.execute(
+            select(CarRecord.id, CarRecord.is_deleted, CarRecord.deleted_at).where(CarRecord.car_id == car_id)
+        )).all()
+        images = (await session.execute(
+            select(CarRecordImage.id, CarRecordImage.is_deleted, CarRecordImage.deleted_at)
+            .where(CarRecordImage.car_id == car_id)
+        )).all()
+        return records, images
+
+
+def _wait_for_images(run, car_id: int, count: int):
+    # Изображения загружаются фоновой задачей после ответа на создание записи
+    for _ in range(100):
+        _, images = run(_record_rows, car_id)
+        if len(images) >= count:
+            return images
+        time.sleep(0.05)
+    raise AssertionError(f"Изображения машины {car_id} не появились")
+
+
+def test_update_missing_car_is_404(client, make_user):
+    _, headers = make_user()
+    response = client.put(f"{API}/cars/update/999999", json={**CAR, "mileage": 1}, headers=headers)
+    assert response.status_code == 404
+
+
+def test_foreign_car_is_403(client, make_user, create_car):
+    _, owner = make_user()
+    _, stranger = make_user()
+    car_id = create_car(owner)
+
+    assert client.put(f"{API}/cars/update/{car_id}", json={**CAR, "mileage": 1}, headers=stranger).status_code == 403
+    assert client.delete(f"{API}/cars/delete/{car_id}", headers=stranger).status_code == 403
+    # Машина не изменилась и не удалена
+    cars = client.get(f"{API}/cars/list", headers=owner).json()["cars"]
+    assert [(car["id"], car["mileage"], car["version"]) for car in cars] == [(car_id, 1000, 1)]
+
+
+def test_foreign_record(client, make_user, create_car, create_record):
+    _, owner = make_user()
+    _, stranger = make_user()
+    car_id = create_car(owner)
+    record_id = create_record(owner, car_id)
+    data = {"car_id": car_id, "car_record_id": record_id, "record_type": "service", "name": "ТО", "description": "-"}
+
+    # С машиной в запросе владелец известен — 403
+    assert client.put(f"{API}/cars_records/update", data=data, headers=stranger).status_code == 403
+    # Удаление по id ищет запись только среди записей пользователя: чужой для него нет — 404
+    assert client.delete(f"{API}/cars_records/delete/{record_id}", headers=stranger).status_code == 404
+    assert client.delete(f"{API}/cars_records/delete/{record_id}", headers=owner).status_code == 200
+    assert client.delete(f"{API}/cars_records/delete/{record_id}", headers=owner).status_code == 404
+
+
+def test_car_version_conflict(client, make_user, create_car):
+    _, headers = make_user()
+    car_id = create_car(headers)
+
+    response = client.put(f"{API}/cars/update/{car_id}", json={**CAR, "mileage": 2000}, headers={**headers, "If-Match": '"1"'})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["etag"] == '"2"'
+
+    # Второе устройство всё ещё видит версию 1
+    response = client.put(f"{API}/cars/update/{car_id}", json={**CAR, "mileage": 3000}, headers={**headers, "If-Match": '"1"'})
+    assert response.status_code == 409
+    response = client.put(f"{API}/cars/update/{car_id}", json={**CAR, "mileage": 3000, "version": 1}, headers=headers)
+    assert response.status_code == 409
+    # If-Match сравнивается строго: слабый ETag версию не подтверждает
+    response = client.put(f"{API}/cars/update/{car_id}", json={**CAR, "mileage": 3000}, headers={**headers, "If-Match": 'W/"2"'})
+    assert response.status_code == 412
+
+    # Без версии изменение безусловное
+    response = client.put(f"{API}/cars/update/{car_id}", json={**CAR, "mileage": 3000}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["version"] == 3
+
+
+def test_record_version_conflict(client, make_user, create_car, create_record):
+    _, headers = make_user()
+    car_id = create_car(headers)
+    record_id = create_record(headers, car_id)
+    data = {"car_id": car_id, "car_record_id": record_id, "record_type": "service", "name": "ТО-2", "description": "-"}
+
+    response = client.put(f"{API}/cars_records/update", data=data, headers={**headers, "If-Match": '"1"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"2"'
+    response = client.put(f"{API}/cars_records/update", data={**data, "version": 1}, headers=headers)
+    assert response.status_code == 409
+
+
+def test_car_delete_cascades_to_records_and_images(client, run, make_user, create_car, create_record):
+    _, headers = make_user()
+    car_id = create_car(headers)
+    other_car_id = create_car(headers)
+    create_record(headers, car_id, files=[("files", ("a.png", b"png", "image/png"))])
+    create_record(headers, car_id)
+    create_record(headers, other_car_id)
+    _wait_for_images(run, car_id, 1)
+
+    response = client.delete(f"{API}/cars/delete/{car_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"message": "Car deleted", "car_id": car_id}
+
+    records, images = run(_record_rows, car_id)
+    assert len(records) == 2 and len(images) == 1
+    assert all(row.is_deleted for row in records + images)
+    # Машина, её записи и изображения удалены одним изменением с одним deleted_at
+    assert len({row.deleted_at for row in records + images}) == 1
+    assert client.get(f"{API}/cars_records/list", params={"car_id": car_id}, headers=headers).status_code == 404
+    assert client.delete(f"{API}/cars/delete/{car_id}", headers=headers).status_code == 404
+
+    other_records, _ = run(_record_rows, other_car_id)
+    assert not any(row.is_deleted for row in other_records)
+
@@ -0,0 +1,149 @@
+# tests/test_compression.py
+import asyncio
+import zlib
+
+import brotli
+import pytest
+from fastapi import HTTPException
+from starlette.responses import StreamingResponse
+
+from src.core.compression import CompressionMiddleware, choose_encoding
+from src.core.etag import expected_version
+from src.db_clients.config import db_settings
+from tests.conftest import API
+
+# Изображения записей уходят в S3, который в памяти есть только во встроенном режиме
+embedded_only = pytest.mark.skipif(not db_settings.db.EMBEDDED, reason="нужен встроенный режим (APP_MODE=embedded)")
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, br", "br"),
+        ("BR", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("gzip;q=0.2, br;q=0.2", "br"),
+        ("*", "br"),
+        ("*, br;q=0", "gzip"),
+        ("*;q=0", None),
+        ("gzip;q=abc, br;q=0", None),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize(
+    "if_match, version, expected",
+    [
+        (None, 5, 5),
+        ("*", 5, 5),
+        ('"3"', None, 3),
+        ('"3-br"', None, 3),
+        ('"3-gzip"', 5, 3),
+    ],
+)
+def test_expected_version(if_match, version, expected):
+    assert expected_version(if_match, version) == expected
+
+
+@pytest.mark.parametrize("if_match, status_code", [('W/"3"', 412), ('W/"3-br"', 412), ('"3-zstd"', 400), ('"abc"', 400)])
+def test_expected_version_rejects(if_match, status_code):
+    with pytest.raises(HTTPException) as error:
+        expected_version(if_match)
+    assert error.value.status_code == status_code
+
+
+async def _stream(encoding: str, chunks: list[bytes]) -> list[dict]:
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    app = CompressionMiddleware(StreamingResponse(body(), media_type="application/json"), minimum_size=1024)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", encoding.encode())],
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+    }
+    await app(scope, receive, send)
+    return messages
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_streaming_response_is_compressed_per_chunk(encoding):
+    chunks = [bytes([ord("a") + i]) * 600 for i in range(4)]
+    start, *bodies = asyncio.run(_stream(encoding, chunks))
+
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == encoding.encode()
+    assert b"content-length" not in headers
+    # Первые две части копятся до порога, дальше каждая часть уходит отдельным сжатым сообщением
+    decompressor = brotli.Decompressor() if encoding == "br" else zlib.decompressobj(16 + zlib.MAX_WBITS)
+    decompress = decompressor.process if encoding == "br" else decompressor.decompress
+    parts = [decompress(message["body"]) for message in bodies]
+    assert parts == [chunks[0] + chunks[1], chunks[2], chunks[3], b""]
+    assert [message["more_body"] for message in bodies] == [True, True, True, False]
+
+
+@embedded_only
+def test_large_responses_are_compressed(client, make_user, create_car):
+    _, headers = make_user()
+    for year in range(2000, 2012):
+        create_car(headers, year=year)
+    plain = client.get(f"{API}/cars/list", headers={**headers, "Accept-Encoding": "identity"})
+    assert len(plain.content) > 1024 and "content-encoding" not in plain.headers
+
+    response = client.get(f"{API}/cars/list", headers={**headers, "Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    # httpx сам распаковывает br, если установлен brotli
+    assert response.content == plain.content or brotli.decompress(response.content) == plain.content
+
+    response = client.get(f"{API}/cars/list", headers={**headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == plain.content
+
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get("/", headers={"Accept-Encoding": "gzip, br"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+
+@embedded_only
+def test_compressed_response_has_encoding_etag(client, make_user, create_car, create_record):
+    _, headers = make_user()
+    car_id = create_car(headers)
+    record_id = create_record(headers, car_id, description="Замена масла и фильтров. " * 100)
+    url = f"{API}/cars_records/info/{car_id}/{record_id}"
+    params = {"car_id": car_id, "car_record_id": record_id}
+
+    response = client.get(url, params=params, headers={**headers, "Accept-Encoding": "identity"})
+    assert len(response.content) > 1024
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"1"'
+
+    response = client.get(url, params=params, headers={**headers, "Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"] == '"1-br"'
+
+    # ETag сжатого ответа подтверждает ту же версию записи
+    data = {"car_id": car_id, "car_record_id": record_id, "record_type": "service", "name": "ТО-2", "description": "-"}
+    response = client.put(f"{API}/cars_records/update", data=data, headers={**headers, "If-Match": '"1-br"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"2"'
+    response = client.put(f"{API}/cars_records/update", data=data, headers={**headers, "If-Match": '"1-br"'})
+    assert response.status_code == 409
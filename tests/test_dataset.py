@@ -0,0 +1,25 @@
+# tests/test_dataset.py
+"""Генератор синтетического набора (benchmarks/dataset.py) без базы: строки строятся в памяти."""
+from dataclasses import replace
+
+from benchmarks import dataset
+from src.models.user_models import User
+
+# Шифротекст email берёт случайный nonce AES-GCM, поэтому от seed не зависит
+EMAIL = dataset.COLUMNS[User.__tablename__].index("email")
+
+
+def rows(spec: dataset.DatasetSpec) -> list[tuple[str, tuple]]:
+    return [
+        (table, row[:EMAIL] + row[EMAIL + 1:] if table == User.__tablename__ else row)
+        for table, row in dataset.generate(spec, "hash")
+    ]
+
+
+def test_generate_is_deterministic_for_seed():
+    spec = dataset.DatasetSpec(users=50, max_records=50)
+    first = rows(spec)
+    assert first == rows(spec)
+    assert {table for table, _ in first} == set(dataset.COLUMNS)
+    assert all(len(row) == len(dataset.COLUMNS[table]) - (table == User.__tablename__) for table, row in first)
+    assert first != rows(replace(spec, seed=spec.seed + 1))
@@ -0,0 +1,66 @@
+# tests/test_deadlines.py
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.db_clients import deadlines
+from src.db_clients.circuit_breaker import DatabaseUnavailable
+from src.session import DBManager, _apply_request_deadline
+
+
+class RecordingConnection:
+    def __init__(self, statement_timeout: float):
+        self.dialect = SimpleNamespace(name="postgresql")
+        self.info = {"statement_timeout": statement_timeout}
+        self.executed = []
+
+    def execute(self, statement, params):
+        self.executed.append(params["timeout"])
+
+
+def _begin_with(left: float, statement_timeout: float) -> list[str]:
+    connection = RecordingConnection(statement_timeout)
+    token = deadlines.request_deadline.set(time.monotonic() + left)
+    try:
+        _apply_request_deadline(None, None, connection)
+    finally:
+        deadlines.request_deadline.reset(token)
+    return connection.executed
+
+
+def test_deadline_far_from_statement_timeout_costs_nothing():
+    # Начало запроса в пуле auth/read/write: таймаут соединения уже равен дедлайну
+    assert _begin_with(left=9.9, statement_timeout=10) == []
+    assert _begin_with(left=6, statement_timeout=10) == []
+
+
+def test_close_deadline_narrows_statement_timeout():
+    [timeout] = _begin_with(left=4, statement_timeout=10)
+    assert 3900 <= int(timeout.removesuffix("ms")) <= 4000
+    assert len(_begin_with(left=9.9, statement_timeout=30)) == 1
+
+
+def test_expired_deadline_is_503():
+    with pytest.raises(DatabaseUnavailable):
+        _begin_with(left=-1, statement_timeout=10)
+
+
+class StuckSession:
+    async def connection(self):
+        await asyncio.sleep(10)
+
+
+async def _checkout_with_deadline(left: float):
+    token = deadlines.request_deadline.set(time.monotonic() + left)
+    try:
+        await DBManager._checkout(StuckSession())
+    finally:
+        deadlines.request_deadline.reset(token)
+
+
+def test_deadline_while_waiting_for_pool_is_503():
+    with pytest.raises(DatabaseUnavailable) as error:
+        asyncio.run(_checkout_with_deadline(0.05))
+    assert error.value.status_code == 503
@@ -0,0 +1,90 @@
+# tests/test_json_lists.py
+"""
+Списки машин и записей, собранные в Postgres (json_array), против запасного пути
+rows_select + dump_json, которым те же списки отдаёт встроенный режим.
+
+Нужен Postgres: APP_MODE=server и переменные PG_* (как для приложения), схема — миграции.
+Данные создаются в транзакции, которая откатывается.
+
+    APP_MODE=server python -m pytest -m slow tests/test_json_lists.py
+"""
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+
+from benchmarks.json_list import json_values
+from src.db_clients.config import db_settings
+from src.models.user_models import Car, CarRecord, User
+from src.repositories import car_records, cars
+from src.session import db_manager
+
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.skipif(db_settings.db.EMBEDDED, reason="нужен Postgres: APP_MODE=server и PG_* из .env"),
+]
+
+RECORD_DATE = datetime(2026, 1, 1, 10, 0, 0, 120000, tzinfo=timezone.utc)
+COSTS = [Decimal("4990.50"), Decimal("5.00"), Decimal("1200"), None]
+
+
+async def _seed(session) -> tuple[int, int]:
+    user_id = (await session.execute(
+        insert(User).values(name="json", email=f"json-{uuid.uuid4()}", password="-").returning(User.id)
+    )).scalar_one()
+    car_id = (await session.execute(
+        insert(Car).values(
+            user_id_owner=user_id, brand="Лада", model='"Веста"', year=2020, mileage=None, color="белый",
+            created_at=RECORD_DATE, updated_at=RECORD_DATE,
+        ).returning(Car.id)
+    )).scalar_one()
+    await session.execute(insert(CarRecord), [
+        {"user_id_owner": user_id, "car_id": car_id, "record_type": "service", "name": f"ТО \\ {i}",
+         "description": "-", "record_date": RECORD_DATE, "mileage": 1000 + i, "service_place": None,
+         "cost": cost, "created_at": RECORD_DATE, "updated_at": RECORD_DATE}
+        for i, cost in enumerate(COSTS)
+    ])
+    return user_id, car_id
+
+
+async def _both_paths(monkeypatch) -> dict:
+    async with db_manager.get_db_session() as session:
+        user_id, car_id = await _seed(session)
+        try:
+            results = {}
+            for path in ("db", "python"):
+                if path == "python":
+                    monkeypatch.setattr(cars, "is_postgres", lambda session: False)
+                    monkeypatch.setattr(car_records, "is_postgres", lambda session: False)
+                results[path] = (
+                    await cars.list_cars_json(session, user_id_owner=user_id),
+                    await car_records.list_records_json(session, user_id_owner=user_id, car_id=car_id),
+                )
+            return results
+        finally:
+            await session.rollback()
+
+
+def test_db_json_has_same_values_as_python_json(run, monkeypatch):
+    results = run(_both_paths, monkeypatch)
+    (cars_db, records_db), (cars_python, records_python) = results["db"], results["python"]
+
+    assert json_values(cars_db) == json_values(cars_python)
+    assert json_values(records_db) == json_values(records_python)
+    assert [record["cost"] for record in json_values(records_db)] == COSTS
+
+
+def test_db_json_text_differences(run, monkeypatch):
+    # Отличия текста, описанные в src/repositories/base.py (json_array): если тест упал,
+    # поправьте описание там вместе с ним
+    results = run(_both_paths, monkeypatch)
+    records_db, records_python = results["db"][1].decode(), results["python"][1].decode()
+
+    assert '"cost" : 4990.50' in records_db and '"cost":4990.5' in records_python
+    assert '"cost" : 5.00' in records_db and '"cost":5.0' in records_python
+    assert '"cost" : 1200' in records_db and '"cost":1200' in records_python
+    assert '"2026-01-01T10:00:00.12+00:00"' in records_db
+    assert '"2026-01-01T10:00:00.120000+00:00"' in records_python
+    assert records_db != records_python
@@ -0,0 +1,65 @@
+# tests/test_owned_writes.py
+"""
+Параметры запросов репозиториев не должны совпадать с именами колонок изменяемых таблиц:
+такой параметр выполнения SQLAlchemy молча добавляет в SET/VALUES, в том числе у UPDATE
+внутри CTE (src/repositories/base.py, param). Во встроенном режиме Postgres-вариант запросов
+не выполняется, поэтому они собираются здесь без базы — сессией, которая запоминает запросы.
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.repositories import car_records, cars
+from src.repositories.base import OwnedWrite
+
+USER_ID = 7
+
+
+class RecordingSession:
+    def __init__(self):
+        self.info = {}
+        self.executed = []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=postgresql.dialect())
+
+    async def execute(self, statement, params):
+        self.executed.append((statement, params))
+        return SimpleNamespace(one=lambda: OwnedWrite(USER_ID, 1, 2))
+
+
+RECORD_VALUES = {
+    "record_type": "service", "name": "ТО", "description": "-", "record_date": datetime.now(timezone.utc),
+    "mileage": 1000, "service_place": "Сервис", "cost": 4990.5,
+}
+
+WRITES = {
+    "cars.update_car": lambda s: cars.update_car(s, USER_ID, 1, {"brand": "Lada", "mileage": 1}, expected_version=1),
+    "cars.delete_car": lambda s: cars.delete_car(s, USER_ID, 1),
+    "car_records.create_record": lambda s: car_records.create_record(s, USER_ID, 1, RECORD_VALUES),
+    "car_records.update_record": lambda s: car_records.update_record(s, USER_ID, 1, 1, RECORD_VALUES, 1),
+    "car_records.delete_record": lambda s: car_records.delete_record(s, USER_ID, 1),
+    "car_records.delete_image": lambda s: car_records.delete_image(s, USER_ID, 1, 1),
+}
+
+
+def render(statement, column_keys=None) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), column_keys=column_keys))
+
+
+@pytest.mark.parametrize("name", WRITES)
+def test_params_do_not_add_columns(run, name):
+    session = RecordingSession()
+    run(WRITES[name], session)
+
+    assert session.info["has_writes"] is True
+    [(statement, params)] = session.executed
+    # column_keys — имена параметров выполнения, как при session.execute(statement, params)
+    assert render(statement, list(params)) == render(statement)
+
+
+def test_render_detects_collision():
+    statement, params = cars.DELETE_CAR, {"car": 1, "user_id": USER_ID, "user_id_owner": USER_ID}
+    assert render(statement, list(params)) != render(statement)
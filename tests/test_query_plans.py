@@ -0,0 +1,327 @@
+# tests/test_query_plans.py
+"""
+Планы запросов горячих путей: машины, записи, изображения, вход и токены.
+
+Каждый сценарий вызывает настоящую функцию сервиса, все SQL-запросы, которые она
+отправила в Postgres, перехватываются и прогоняются через EXPLAIN (FORMAT JSON)
+с теми же параметрами. Для каждого плана проверяется:
+  - нет Seq Scan по большим таблицам (LARGE_TABLES, включая секции car_records);
+  - оценка стоимости плана не выше бюджета сценария;
+  - там, где сценарий этого ждёт, используется Index Only Scan по нужному индексу.
+
+Нужен Postgres (APP_MODE=server, PG_* из .env) со схемой из миграций и синтетическим
+набором данных: на маленьких таблицах планировщик честно выбирает Seq Scan, поэтому
+без набора тест пропускается. Сценарии создают, меняют и удаляют строки, поэтому
+выполняются одним тестом по порядку и передают друг другу созданные id и токены через Probe.
+
+    alembic upgrade head
+    python -m benchmarks.dataset --users 20000
+    APP_MODE=server python -m pytest -m slow tests/test_query_plans.py
+"""
+import json
+import re
+from dataclasses import dataclass, field, replace
+from typing import Awaitable, Callable
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Engine
+
+from benchmarks import dataset
+from src.core.security.password import hash_password
+from src.core.token import jwt_token_validator
+from src.db_clients.config import db_settings
+from src.models.user_models import CarRecord, CarRecordImage, User
+from src.services import auth_service, car, car_records, token_refresh_service
+from src.services.user_lookup import user_email_fields
+from src.session import db_manager
+
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.skipif(db_settings.db.EMBEDDED, reason="нужен Postgres: APP_MODE=server и PG_* из .env"),
+]
+
+# Таблицы, которые в рабочей базе растут с числом пользователей: полный просмотр любой из них — регрессия
+LARGE_TABLES = tuple(dataset.COLUMNS)
+# Секции car_records_p00..pNN (миграция 0005) относятся к car_records
+PARTITION = re.compile(r"^(?P<table>.+)_p\d+$")
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+# Бюджет стоимости одного запроса в единицах планировщика Postgres. Точечные запросы по индексу
+# стоят десятки единиц, поэтому превышение означает лишнее чтение, а не шум оценки
+DEFAULT_MAX_COST = 100.0
+LIST_MAX_COST = 2000.0
+DETAIL_MAX_COST = 300.0
+
+# Меньше строк в car_records — набор данных не загружен (python -m benchmarks.dataset)
+MIN_DATASET_RECORDS = 100_000
+
+PROBE_EMAIL = "plan-regression@example.com"
+PROBE_PASSWORD = "plan-regression"
+
+
+@dataclass
+class Probe:
+    """Данные, на которых выполняются сценарии; сценарии дописывают сюда созданные id и токены."""
+    user_id: int
+    car_id: int
+    record_id: int
+    image_id: int
+    state: dict = field(default_factory=dict)
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[Probe], Awaitable]
+    max_cost: float = DEFAULT_MAX_COST
+    # Индексы, по которым хотя бы один запрос сценария должен читать только индекс
+    index_only: tuple[str, ...] = ()
+
+
+@dataclass
+class CheckedStatement:
+    case: str
+    sql: str
+    cost: float
+    scans: list[str]
+    problems: list[str]
+    plan: dict
+
+
+class StatementCapture:
+    """Запоминает запросы, которые движки SQLAlchemy отправляют в БД, пока capture активен."""
+
+    def __init__(self):
+        self.active = False
+        self.statements: list[tuple[str, object]] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active and statement.lstrip().upper().startswith(EXPLAINABLE):
+            self.statements.append((statement, parameters))
+
+
+async def _login(probe: Probe):
+    tokens = await auth_service.auth(PROBE_EMAIL, PROBE_PASSWORD)
+    probe.state["access_token"] = tokens.access_token
+    probe.state["refresh_token"] = tokens.refresh_token
+
+
+async def _validate(probe: Probe):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=probe.state["access_token"])
+    await jwt_token_validator(credentials)
+
+
+async def _refresh(probe: Probe):
+    _, probe.state["refresh_token"], _, _ = await token_refresh_service.refresh_tokens_logic(
+        probe.state["refresh_token"]
+    )
+
+
+async def _logout(probe: Probe):
+    await auth_service.logout(probe.state["refresh_token"])
+
+
+async def _create_car(probe: Probe):
+    result = await car.create_car({"brand": "Lada", "model": "Vesta", "year": 2020}, probe.user_id)
+    probe.state["car_id"] = result["car_id"]
+
+
+async def _update_car(probe: Probe):
+    await car.update_car(probe.state["car_id"], probe.user_id, {"mileage": 1000}, expected_version=1)
+
+
+async def _create_record(probe: Probe):
+    payload = {"record_type": "service", "name": "ТО", "description": "Плановое ТО", "cost": 4990.5}
+    result = await car_records.create_car_record(payload, probe.user_id, probe.state["car_id"])
+    probe.state["record_id"] = result["record_id"]
+
+
+async def _update_record(probe: Probe):
+    payload = {"record_type": "service", "name": "ТО-2", "description": "Плановое ТО", "cost": 5990.5}
+    await car_records.update_car_record(
+        payload, probe.user_id, probe.state["car_id"], probe.state["record_id"], expected_version=1
+    )
+
+
+CASES = [
+    Case("auth.login", _login),
+    # Права роли читаются из первичного ключа role_permissions без обращения к таблице
+    Case("auth.validate_access_token", _validate, index_only=("role_permissions_pkey",)),
+    Case("token.refresh", _refresh),
+    Case("auth.logout", _logout),
+    Case("cars.list", lambda probe: car.get_user_cars(probe.user_id), max_cost=LIST_MAX_COST),
+    Case("cars.list_json", lambda probe: car.get_user_cars_json(probe.user_id), max_cost=LIST_MAX_COST),
+    Case("cars.create", _create_car),
+    Case("cars.update", _update_car),
+    Case(
+        "records.list",
+        lambda probe: car_records.get_car_records(probe.user_id, probe.car_id),
+        max_cost=LIST_MAX_COST,
+    ),
+    Case(
+        "records.list_json",
+        lambda probe: car_records.get_car_records_json(probe.user_id, probe.car_id),
+        max_cost=LIST_MAX_COST,
+    ),
+    # Владелец берётся подзапросом к cars, поэтому лишние секции car_records отсекаются только
+    # при выполнении: EXPLAIN без ANALYZE показывает поиск по первичному ключу в каждой секции
+    Case(
+        "records.detail",
+        lambda probe: car_records.get_car_record_detail(probe.user_id, probe.car_id, probe.record_id),
+        max_cost=DETAIL_MAX_COST,
+    ),
+    Case("records.create", _create_record),
+    Case("records.update", _update_record, max_cost=DETAIL_MAX_COST),
+    Case(
+        "images.delete",
+        lambda probe: car_records.delete_car_record_image(probe.user_id, probe.record_id, probe.image_id),
+    ),
+    Case("records.delete", lambda probe: car_records.delete_car_record(probe.state["record_id"], probe.user_id)),
+    Case("cars.delete", lambda probe: car.delete_car(probe.state["car_id"], probe.user_id)),
+]
+
+
+async def choose_probe() -> Probe:
+    """Живая машина с наибольшим числом записей и живая запись этой машины с изображением."""
+    async with db_manager.engine.connect() as conn:
+        heavy = (
+            await conn.execute(
+                select(CarRecord.car_id, CarRecord.user_id_owner)
+                .where(CarRecord.is_deleted == False)
+                .group_by(CarRecord.car_id, CarRecord.user_id_owner)
+                .order_by(func.count().desc(), CarRecord.car_id)
+                .limit(1)
+            )
+        ).one()
+        image = (
+            await conn.execute(
+                select(CarRecordImage.id, CarRecordImage.car_record_id)
+                .where(CarRecordImage.car_id == heavy.car_id, CarRecordImage.is_deleted == False)
+                .order_by(CarRecordImage.id)
+                .limit(1)
+            )
+        ).one()
+    return Probe(user_id=heavy.user_id_owner, car_id=heavy.car_id, record_id=image.car_record_id, image_id=image.id)
+
+
+def _nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+
+def _table(relation: str) -> str:
+    match = PARTITION.match(relation)
+    return match.group("table") if match else relation
+
+
+def check_plan(case: Case, sql: str, plan: dict) -> CheckedStatement:
+    root = plan["Plan"]
+    scans, problems = [], []
+    for node in _nodes(root):
+        relation = node.get("Relation Name")
+        if relation is None:
+            continue
+        scans.append(f"{node['Node Type']}:{relation}")
+        if node["Node Type"] == "Seq Scan" and _table(relation) in LARGE_TABLES:
+            problems.append(f"Seq Scan по {relation}")
+    if root["Total Cost"] > case.max_cost:
+        problems.append(f"стоимость {root['Total Cost']:.0f} > {case.max_cost:.0f}")
+    return CheckedStatement(case.name, sql, root["Total Cost"], scans, problems, plan)
+
+
+async def explain(conn, statement: str, parameters) -> dict:
+    raw = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)).scalar_one()
+    return (json.loads(raw) if isinstance(raw, str) else raw)[0]
+
+
+async def run_case(case: Case, probe: Probe, capture: StatementCapture) -> tuple[list[CheckedStatement], list[str]]:
+    capture.statements, capture.active = [], True
+    errors = []
+    try:
+        await case.run(probe)
+    except HTTPException as e:
+        errors.append(f"сценарий завершился {e.status_code}: {e.detail}")
+    except Exception as e:
+        errors.append(f"сценарий упал: {e!r}")
+    finally:
+        capture.active = False
+
+    checked, seen = [], set()
+    async with db_manager.engine.connect() as conn:
+        for statement, parameters in capture.statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            checked.append(check_plan(case, statement, await explain(conn, statement, parameters)))
+        await conn.rollback()
+
+    for index in case.index_only:
+        used = any(
+            node["Node Type"] == "Index Only Scan" and node.get("Index Name") == index
+            for item in checked for node in _nodes(item.plan["Plan"])
+        )
+        if not used:
+            errors.append(f"нет Index Only Scan по {index}")
+    if not checked:
+        errors.append("сценарий не выполнил ни одного запроса")
+    return checked, errors
+
+
+def _short(sql: str, width: int = 70) -> str:
+    flat = " ".join(sql.split())
+    return flat if len(flat) <= width else flat[:width - 1] + "…"
+
+
+async def _prepare_probe() -> Probe | None:
+    if (await dataset.table_sizes())["car_records"] < MIN_DATASET_RECORDS:
+        return None
+    async with db_manager.engine.begin() as conn:
+        await conn.execute(
+            pg_insert(User)
+            .values(name="plan regression", password=hash_password(PROBE_PASSWORD), role_id=2, is_active=True,
+                    **user_email_fields(PROBE_EMAIL))
+            .on_conflict_do_nothing()
+        )
+    return await choose_probe()
+
+
+@pytest.fixture(scope="module")
+def probe(run):
+    probe = run(_prepare_probe)
+    if probe is None:
+        pytest.skip(f"нет набора данных (car_records < {MIN_DATASET_RECORDS}): python -m benchmarks.dataset --users 20000")
+    return probe
+
+
+@pytest.fixture(scope="module")
+def capture():
+    capture = StatementCapture()
+    event.listen(Engine, "before_cursor_execute", capture)
+    yield capture
+    event.remove(Engine, "before_cursor_execute", capture)
+
+
+async def run_cases(probe: Probe, capture: StatementCapture) -> list[str]:
+    """Все сценарии по порядку на чистом состоянии: следующие используют то, что создали предыдущие."""
+    probe = replace(probe, state={})
+    report = []
+    for case in CASES:
+        checked, errors = await run_case(case, probe, capture)
+        failed = [item for item in checked if item.problems]
+        report += [
+            f"{case.name}: {_short(item.sql)}: {problem}; {', '.join(item.scans)}"
+            for item in failed for problem in item.problems
+        ]
+        report += [f"{case.name}: {error}" for error in errors]
+        report += [json.dumps(item.plan, ensure_ascii=False, indent=2) for item in failed]
+    return report
+
+
+def test_query_plans(run, probe, capture):
+    report = run(run_cases, probe, capture)
+    assert not report, "\n".join(report)
@@ -0,0 +1,36 @@
+# tests/test_query_stats.py
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db_clients import query_stats
+
+
+async def _execute_with_failure(url: str) -> query_stats.RequestQueryStats:
+    engine = create_async_engine(url)
+    query_stats.attach_query_stats(engine)
+    stats = query_stats.RequestQueryStats()
+    token = query_stats._request_stats.set(stats)
+    try:
+        async with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM missing_table"))
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+            info = dict(conn.info)
+    finally:
+        query_stats._request_stats.reset(token)
+        await engine.dispose()
+    assert "query_started" not in info
+    return stats
+
+
+def test_failed_statement_does_not_skew_timings(tmp_path):
+    stats = asyncio.run(_execute_with_failure(f"sqlite+aiosqlite:///{tmp_path / 'stats.sqlite3'}"))
+    # Упавший запрос учтён, а время следующих считается от их собственного начала
+    assert stats.count == 3
+    assert 0 <= stats.slowest < 1
+    assert stats.total < 1
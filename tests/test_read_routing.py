@@ -0,0 +1,66 @@
+# tests/test_read_routing.py
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.db_clients.config import db_settings
+from src.db_clients.pool_metrics import PoolMetrics
+from src.db_clients.replicas import Replica, ReplicaSet
+from src.services import car as car_service
+from src.session import create_db_engine, db_manager, request_user_id
+
+CAR = {"brand": "Lada", "model": "Vesta", "year": 2020, "mileage": 1000, "color": "белый"}
+
+
+@pytest.fixture
+def replica(run, monkeypatch):
+    """Реплика — второй пул к той же встроенной базе: по пулу видно, куда ушло чтение."""
+    engine = create_db_engine(db_settings.db.get_async_url())
+    replica = Replica(
+        name="replica-test",
+        engine=engine,
+        session_factory=async_sessionmaker(engine, expire_on_commit=False),
+        pool_metrics=PoolMetrics(engine, name="replica-test"),
+    )
+    monkeypatch.setattr(db_manager, "replicas", ReplicaSet([replica], max_lag=1.0, check_timeout=1.0))
+    yield replica
+    run(engine.dispose)
+
+
+def primary_engines() -> list:
+    return [db_manager.engine, *(pool.engine for pool in db_manager.workloads.values())]
+
+
+async def _read_bind(user_id: int):
+    token = request_user_id.set(user_id)
+    try:
+        async with db_manager.get_read_session() as session:
+            return session.bind
+    finally:
+        request_user_id.reset(token)
+
+
+async def _update_then_read_bind(user_id: int, car_id: int):
+    token = request_user_id.set(user_id)
+    try:
+        await car_service.update_car(car_id, user_id, {**CAR, "mileage": 2000})
+    finally:
+        request_user_id.reset(token)
+    return await _read_bind(user_id)
+
+
+def test_read_without_writes_goes_to_replica(run, make_user, replica):
+    user_id, _ = make_user()
+    assert run(_read_bind, user_id) is replica.engine
+
+
+def test_read_after_owned_write_goes_to_primary(run, make_user, replica):
+    user_id, _ = make_user()
+    # Машина создаётся вне запроса пользователя (request_user_id не задан), поэтому чтение ещё с реплики
+    car_id = run(car_service.create_car, CAR, user_id)["car_id"]
+    assert run(_read_bind, user_id) is replica.engine
+
+    # update_car — изменение с проверкой владельца (execute_owned_write): для ORM это SELECT
+    assert run(_update_then_read_bind, user_id, car_id) in primary_engines()
+    # Другие пользователи по-прежнему читают с реплики
+    other_user_id, _ = make_user()
+    assert run(_read_bind, other_user_id) is replica.engine
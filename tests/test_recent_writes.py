@@ -0,0 +1,65 @@
+# tests/test_recent_writes.py
+import multiprocessing
+import sys
+import time
+import uuid
+from multiprocessing import shared_memory
+
+import pytest
+
+from src.db_clients.recent_writes import InMemoryRecentWrites, SharedMemoryRecentWrites
+
+# SharedMemory(track=False) — с Python 3.13, на котором работает сервис (pyproject.toml)
+needs_shm = pytest.mark.skipif(sys.version_info < (3, 13), reason="SharedMemory(track=...) появился в Python 3.13")
+
+
+@pytest.fixture
+def shm_name():
+    name = f"test_recent_writes_{uuid.uuid4().hex[:8]}"
+    yield name
+    try:
+        shared_memory.SharedMemory(name=name).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _mark_in_worker(name: str, slots: int, user_id: int, until: float) -> None:
+    SharedMemoryRecentWrites(name, slots).mark(user_id, until)
+
+
+@needs_shm
+def test_mark_is_visible_to_other_workers(shm_name):
+    reader = SharedMemoryRecentWrites(shm_name, 64)
+    until = time.time() + 5
+    # Запись выполнил другой воркер uvicorn — отдельный процесс
+    worker = multiprocessing.get_context("spawn").Process(target=_mark_in_worker, args=(shm_name, 64, 42, until))
+    worker.start()
+    worker.join(timeout=30)
+    assert worker.exitcode == 0
+
+    assert reader.until(42) == until
+    assert reader.is_sticky(42)
+    assert not reader.is_sticky(43)
+
+
+@pytest.mark.parametrize("backend", ["memory", pytest.param("shm", marks=needs_shm)])
+def test_mark_expires(backend, shm_name):
+    writes = InMemoryRecentWrites() if backend == "memory" else SharedMemoryRecentWrites(shm_name, 64)
+    now = time.time()
+    writes.mark(1, now + 5)
+    writes.mark(2, now - 1)
+    assert writes.is_sticky(1, now)
+    assert not writes.is_sticky(2, now)
+    writes.mark(1, now + 10)
+    assert writes.until(1) == now + 10
+
+
+@needs_shm
+def test_full_table_evicts_earliest_mark(shm_name):
+    # Один слот и одна проба на вставку: каждая новая отметка вытесняет предыдущую
+    writes = SharedMemoryRecentWrites(shm_name, 1)
+    now = time.time()
+    writes.mark(1, now + 5)
+    writes.mark(2, now + 10)
+    assert not writes.is_sticky(1, now)
+    assert writes.is_sticky(2, now)
@@ -0,0 +1,66 @@
+# tests/test_strict_loading.py
+import pytest
+from sqlalchemy import ForeignKey, Integer, select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import DeclarativeBase, mapped_column, relationship
+
+from src.db_clients.strict_loading import eager_relationships
+from src.models.base_model import ORMBase
+from src.models.user_models import Car
+from src.session import db_manager
+from tests.conftest import API
+
+
+def _joins(statement: str) -> int:
+    return statement.upper().count(" JOIN ")
+
+
+def test_models_load_relationships_only_on_request():
+    # raiseload("*") строгого режима отменил бы lazy="joined" модели и спрятал бы лишний JOIN
+    assert eager_relationships(ORMBase.registry) == []
+
+
+def test_eager_relationship_is_reported():
+    class Base(DeclarativeBase):
+        pass
+
+    class Parent(Base):
+        __tablename__ = "parent"
+        id = mapped_column(Integer, primary_key=True)
+        children = relationship("Child", lazy="joined")
+
+    class Child(Base):
+        __tablename__ = "child"
+        id = mapped_column(Integer, primary_key=True)
+        parent_id = mapped_column(ForeignKey("parent.id"))
+
+    assert eager_relationships(Base.registry) == ["Parent.children (lazy=joined)"]
+
+
+async def _car_owner(car_id: int):
+    async with db_manager.get_db_session() as session:
+        car = (await session.execute(select(Car).where(Car.id == car_id))).scalar_one()
+        return car.user_owner
+
+
+def test_unloaded_relationship_raises(run, make_user, create_car, strict_loading):
+    _, headers = make_user()
+    car_id = create_car(headers)
+    with pytest.raises(InvalidRequestError):
+        run(_car_owner, car_id)
+
+
+def test_car_list_sql(client, make_user, create_car, strict_loading, captured_sql):
+    _, headers = make_user()
+    create_car(headers)
+    captured_sql.clear()
+
+    response = client.get(f"{API}/cars/list", headers=headers)
+    assert response.status_code == 200
+
+    principal = [statement for statement in captured_sql if "FROM users" in statement]
+    cars = [statement for statement in captured_sql if "FROM cars" in statement]
+    # Пользователь токена читается одним запросом с явным joinedload роли
+    assert len(principal) == 1 and _joins(principal[0]) == 1 and "roles" in principal[0]
+    # Список машин — один запрос без JOIN
+    assert len(cars) == 1 and _joins(cars[0]) == 0
@@ -0,0 +1,169 @@
+# tests/test_sync_pool.py
+"""Пул синхронного клиента (src/db_clients/clients.py) без Postgres: _connect выдаёт поддельные соединения."""
+import threading
+import time
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from src.db_clients import clients
+from src.db_clients.clients import SyncConnectionPool, _PooledConnection
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql):
+        self.conn.executed.append(sql)
+        if self.conn.dead:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    connections = []
+
+    def make(**options) -> tuple[SyncConnectionPool, list[FakeConnection]]:
+        settings = {"max_size": 2, "idle_timeout": 60, "check_after": 60, "wait_timeout": 1, "max_lifetime": 600}
+        pool = SyncConnectionPool(clients.config, **{**settings, **options})
+
+        def connect():
+            conn = FakeConnection()
+            connections.append(conn)
+            return _PooledConnection(conn)
+
+        monkeypatch.setattr(pool, "_connect", connect)
+        return pool, connections
+
+    return make
+
+
+def test_connection_is_reused(make_pool):
+    pool, connections = make_pool()
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second and len(connections) == 1
+    assert pool.snapshot() == {"max_size": 2, "in_use": 0, "idle": 1}
+
+
+def test_acquire_times_out_when_pool_is_exhausted(make_pool):
+    pool, _ = make_pool(max_size=1, wait_timeout=0.05)
+    with pool.connection():
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+        assert time.monotonic() - started >= 0.05
+    assert pool.snapshot()["in_use"] == 0
+
+
+def test_waiting_thread_gets_released_connection(make_pool):
+    pool, connections = make_pool(max_size=1, wait_timeout=5)
+    got = []
+
+    def wait_for_connection():
+        with pool.connection() as conn:
+            got.append(conn)
+
+    with pool.connection():
+        waiter = threading.Thread(target=wait_for_connection)
+        waiter.start()
+        time.sleep(0.05)
+        assert not got
+    waiter.join(timeout=5)
+    assert got == [connections[0]]
+
+
+def test_idle_connections_are_closed_outside_the_lock(make_pool):
+    pool, connections = make_pool(idle_timeout=10)
+    with pool.connection() as old:
+        pass
+    pool._idle[0].released_at -= 60
+
+    closed_under_lock = []
+    old.close = lambda: closed_under_lock.append(pool._cond._is_owned())
+    with pool.connection() as new:
+        pass
+    assert new is not old and len(connections) == 2
+    assert closed_under_lock == [False]
+
+
+def test_stale_connection_is_checked_with_select_1(make_pool):
+    pool, connections = make_pool(check_after=10)
+    with pool.connection() as first:
+        pass
+    pool._idle[0].released_at -= 20
+    with pool.connection() as again:
+        pass
+    assert again is first and first.executed == ["SELECT 1"]
+
+    pool._idle[0].released_at -= 20
+    first.dead = True
+    with pool.connection() as replaced:
+        pass
+    assert replaced is not first and first.closed
+
+
+def test_broken_connection_is_not_returned(make_pool):
+    pool, connections = make_pool()
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection():
+            raise psycopg2.OperationalError("connection lost")
+    assert connections[0].closed
+    assert pool.snapshot() == {"max_size": 2, "in_use": 0, "idle": 0}
+
+
+def test_pool_resets_after_fork(make_pool):
+    pool, connections = make_pool(max_size=1)
+    with pool.connection():
+        pass
+    # Как в дочернем процессе: соединения и занятые слоты принадлежат родителю
+    pool._in_use = 1
+    pool._pid = -1
+    with pool.connection() as conn:
+        assert conn is not connections[0]
+    assert pool.snapshot() == {"max_size": 1, "in_use": 0, "idle": 1}
+
+
+def test_get_db_connection_returns_plain_connection(monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(clients.psycopg2, "connect", lambda **kwargs: conn)
+    assert clients.get_db_connection() is conn